@@ -1,25 +1,101 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, abort, render_template, request, jsonify, redirect, session, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from sqlalchemy import bindparam, update
+from collections import Counter
 from datetime import datetime
+import atexit
 import json
 import os
+import uuid
 from src.ai_analysis.problem_analyzer import ProblemAnalyzer
+from src.ai_analysis.resources import load_resources
+from src.ai_analysis.spikes import SpikeDetector
+from src.ai_analysis.trending import TrendingTracker
+from src.data_ingestion.archive import ProblemArchive
+from src.data_ingestion.locations import Gazetteer, LocationNormalizer
 from src.visualization.chart_generator import ChartGenerator
+from src.visualization.columnar import BUCKET_FREQUENCIES, FACETS
+from src.visualization.rollups import TimelineRollup, snap_range
+from src.visualization.solution_analytics import collect_solution_stats
+from src.visualization.spatial import MAX_PRECISION, MIN_PRECISION, spatial_aggregate
 from src.stakeholder.engagement_manager import EngagementManager
+from src.stakeholder.matching import InterestMatcher
+from src.stakeholder.notifications import NotificationDispatcher, OutboxTransport, SmtpTransport, WebhookTransport
+from src.stakeholder.plans import PlanBuilder, save_plans
+from src.stakeholder.progress import EngagementProgressTracker
+from src.stakeholder.registry import StakeholderRegistry
+from src.web.events import EventBroadcaster
+from src.web.http_cache import HttpCache
+from src.web.profiling import RequestProfiler
+from src.web import read_models
+from src.web.ranking import HotRanking, format_cursor, parse_cursor
+from src.web.votes import VoteFilter
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'community-solver-2025'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///community_solver.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///community_solver.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['BATCH_MAX_ITEMS'] = int(os.getenv('BATCH_MAX_ITEMS', 500))
+app.config['GAZETTEER_PATH'] = os.getenv('GAZETTEER_PATH')
+app.config['NLP_RESOURCES_PATH'] = os.getenv('NLP_RESOURCES_PATH')
+app.config['ARCHIVE_PATH'] = os.getenv('ARCHIVE_PATH', 'archive')
+app.config['TRENDING_WINDOW_HOURS'] = int(os.getenv('TRENDING_WINDOW_HOURS', 24))
+app.config['TRENDING_WINDOWS'] = int(os.getenv('TRENDING_WINDOWS', 7))
+
+# Submission surge detection
+app.config['SPIKE_BUCKET_MINUTES'] = int(os.getenv('SPIKE_BUCKET_MINUTES', 60))
+app.config['SPIKE_THRESHOLD'] = float(os.getenv('SPIKE_THRESHOLD', 4))
+app.config['SPIKE_MIN_COUNT'] = int(os.getenv('SPIKE_MIN_COUNT', 5))
+app.config['SPIKE_STATE_PATH'] = os.getenv('SPIKE_STATE_PATH', 'spike_state.json')
+
+# Open dashboard event streams per process; each holds a server thread while connected
+app.config['EVENT_MAX_SUBSCRIBERS'] = int(os.getenv('EVENT_MAX_SUBSCRIBERS', 100))
+
+# Hours of recency worth a tenfold lead in votes when ranking solutions; rescore after changing it
+app.config['SOLUTION_HOT_DECAY_HOURS'] = float(os.getenv('SOLUTION_HOT_DECAY_HOURS', 168))
+
+# Votes the in-memory dedup filters are sized for at least; once full they are rebuilt for twice the votes stored
+app.config['VOTE_FILTER_CAPACITY'] = int(os.getenv('VOTE_FILTER_CAPACITY', 1000000))
+app.config['VOTE_FILTER_ERROR_RATE'] = float(os.getenv('VOTE_FILTER_ERROR_RATE', 0.001))
+
+# Stakeholder notifications; without an SMTP host or webhook URL they go to a local outbox
+app.config['NOTIFY_SEVERITIES'] = os.getenv('NOTIFY_SEVERITIES', 'Critical').split(',')
+app.config['NOTIFY_SMTP_HOST'] = os.getenv('NOTIFY_SMTP_HOST')
+app.config['NOTIFY_SMTP_PORT'] = int(os.getenv('NOTIFY_SMTP_PORT', 25))
+app.config['NOTIFY_SENDER'] = os.getenv('NOTIFY_SENDER', 'notifications@localhost')
+app.config['NOTIFY_WEBHOOK_URL'] = os.getenv('NOTIFY_WEBHOOK_URL')
+app.config['NOTIFY_OUTBOX'] = os.getenv('NOTIFY_OUTBOX')
+app.config['NOTIFY_CONCURRENCY'] = int(os.getenv('NOTIFY_CONCURRENCY', 4))
+
+# Request profiling (opt-in)
+app.config['PROFILE_REQUESTS'] = os.getenv('PROFILE_REQUESTS', 'False').lower() == 'true'
+app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 100))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
 
 db = SQLAlchemy(app)
 CORS(app)
+http_cache = HttpCache(app)
+request_profiler = RequestProfiler(app, db)
 
 # Initialize components
-problem_analyzer = ProblemAnalyzer()
+problem_analyzer = ProblemAnalyzer(load_resources(app.config['NLP_RESOURCES_PATH']))
 chart_generator = ChartGenerator()
-engagement_manager = EngagementManager()
+stakeholder_registry = StakeholderRegistry()
+engagement_manager = EngagementManager(stakeholder_registry)
+interest_matcher = InterestMatcher()
+event_broadcaster = EventBroadcaster(max_subscribers=app.config['EVENT_MAX_SUBSCRIBERS'])
+location_normalizer = LocationNormalizer(Gazetteer.load(app.config['GAZETTEER_PATH']))
+trending_tracker = TrendingTracker(problem_analyzer.issue_terms, app.config['TRENDING_WINDOW_HOURS'],
+                                   app.config['TRENDING_WINDOWS'])
+spike_detector = SpikeDetector(app.config['SPIKE_BUCKET_MINUTES'], threshold=app.config['SPIKE_THRESHOLD'],
+                               min_count=app.config['SPIKE_MIN_COUNT'], state_path=app.config['SPIKE_STATE_PATH'])
+spike_detector.restore()
+atexit.register(spike_detector.checkpoint)
+hot_ranking = HotRanking(app.config['SOLUTION_HOT_DECAY_HOURS'])
+
+PROBLEM_STATUSES = ['Open', 'In Progress', 'Resolved']
+PROBLEM_SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
 
 # Database Models
 class CommunityProblem(db.Model):
@@ -35,16 +111,66 @@ class CommunityProblem(db.Model):
     ai_analysis = db.Column(db.Text)
     stakeholder_count = db.Column(db.Integer, default=0)
     solution_count = db.Column(db.Integer, default=0)
+    # Set on every write; the analytics export picks up rows changed since its last run
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Canonical place resolved from the free-text location
+    location_key = db.Column(db.String(200))
+    place_id = db.Column(db.String(64), index=True)
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12))
+    
+    # Covering indexes for columnar timeline scans and geohash cell aggregation
+    __table_args__ = (
+        db.Index('ix_problem_timeline', 'submitted_date', 'category', 'severity', 'status'),
+        db.Index('ix_problem_geohash', 'geohash', 'latitude', 'longitude'),
+    )
 
 class Solution(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    problem_id = db.Column(db.Integer, db.ForeignKey('community_problem.id'), nullable=False)
+    problem_id = db.Column(db.Integer, db.ForeignKey('community_problem.id'), nullable=False, index=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     proposed_by = db.Column(db.String(100), nullable=False)
     proposed_date = db.Column(db.DateTime, default=datetime.utcnow)
     votes = db.Column(db.Integer, default=0)
     status = db.Column(db.String(50), default='Proposed')
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # Votes combined with recency; set on insert and on every vote, never rescored globally
+    hot_score = db.Column(db.Float)
+    
+    # Hottest solutions per problem and across all problems straight off an index
+    __table_args__ = (
+        db.Index('ix_solution_problem_hot', 'problem_id', 'hot_score'),
+        db.Index('ix_solution_hot', 'hot_score', 'id'),
+    )
+
+class SolutionVote(db.Model):
+    # One row per voter per solution; the primary key rejects repeat votes
+    solution_id = db.Column(db.Integer, db.ForeignKey('solution.id'), primary_key=True)
+    voter = db.Column(db.String(64), primary_key=True)
+    voted_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ArchivedProblem(db.Model):
+    # Stub left behind for a problem moved to the Parquet archive; id is the original problem id
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    severity = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(50))
+    submitted_date = db.Column(db.DateTime)
+    month = db.Column(db.String(7), nullable=False)
+    segment = db.Column(db.String(40), nullable=False, index=True)
+    archived_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ProblemRollup(db.Model):
+    granularity = db.Column(db.String(10), primary_key=True)
+    bucket_start = db.Column(db.Date, primary_key=True)
+    category = db.Column(db.String(100), primary_key=True)
+    severity = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    problem_count = db.Column(db.Integer, nullable=False, default=0)
 
 class Stakeholder(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -54,14 +180,197 @@ class Stakeholder(db.Model):
     organization = db.Column(db.String(200))
     interests = db.Column(db.Text)
     joined_date = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+class EngagementPlan(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    problem_id = db.Column(db.Integer, db.ForeignKey('community_problem.id'), nullable=False, unique=True)
+    category = db.Column(db.String(100), nullable=False)
+    severity = db.Column(db.String(50), nullable=False)
+    # Digest of category, severity and the chosen stakeholders; unchanged inputs mean an unchanged plan
+    inputs_hash = db.Column(db.String(64), nullable=False)
+    plan = db.Column(db.Text, nullable=False)
+    generated_date = db.Column(db.DateTime, default=datetime.utcnow)
+
+class EngagementActivity(db.Model):
+    # Append-only: activities are never updated or deleted
+    id = db.Column(db.Integer, primary_key=True)
+    problem_id = db.Column(db.Integer, db.ForeignKey('community_problem.id'), nullable=False)
+    phase = db.Column(db.String(50), nullable=False)
+    action = db.Column(db.String(200), nullable=False)
+    completed = db.Column(db.Boolean, nullable=False, default=True)
+    actor = db.Column(db.String(100))
+    recorded_date = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Latest state of one action is the last row of its index range
+    __table_args__ = (
+        db.Index('ix_activity_action', 'problem_id', 'phase', 'action', 'id'),
+    )
+
+class EngagementProgress(db.Model):
+    problem_id = db.Column(db.Integer, db.ForeignKey('community_problem.id'), primary_key=True)
+    phase = db.Column(db.String(50), primary_key=True)
+    position = db.Column(db.Integer, nullable=False)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False)
+
+# Keep timeline counts current on every problem write
+timeline_rollup = TimelineRollup(ProblemRollup)
+timeline_rollup.listen(db.session, CommunityProblem)
+
+# Resolve locations to canonical places whenever problems are written
+location_normalizer.listen(db.session, CommunityProblem)
+
+# Score solutions as they are proposed and voted on
+hot_ranking.listen(db.session, Solution)
+
+problem_archive = ProblemArchive(app.config['ARCHIVE_PATH'], CommunityProblem, Solution, ArchivedProblem)
+
+vote_filter = VoteFilter(SolutionVote, app.config['VOTE_FILTER_CAPACITY'], app.config['VOTE_FILTER_ERROR_RATE'])
+
+engagement_progress = EngagementProgressTracker(EngagementActivity, EngagementProgress, EngagementPlan, engagement_manager)
+
+def get_stakeholder_registry():
+    """The stakeholder registry, loaded on first use with only the roles engagement plans draw on"""
+    if not stakeholder_registry.loaded:
+        stakeholder_registry.load(db.session, Stakeholder, roles=engagement_manager.engagement_strategies.keys())
+    return stakeholder_registry
+
+def get_interest_matcher():
+    """The interest matcher, vectorizing every problem and stakeholder on first use"""
+    if not interest_matcher.loaded:
+        interest_matcher.load(db.session, CommunityProblem, Stakeholder)
+    return interest_matcher
+
+def get_trending_tracker():
+    """The trending tracker, counting the problems in its windows on first use"""
+    if not trending_tracker.loaded:
+        trending_tracker.load(db.session, CommunityProblem)
+    return trending_tracker
+
+def get_vote_filter():
+    """The vote dedup filters, rebuilt from the vote table on first use and when full"""
+    if not vote_filter.loaded or vote_filter.full:
+        vote_filter.rebuild(db.session)
+    return vote_filter
+
+def voter_id():
+    """Stable id for the browser session casting votes"""
+    if 'voter_id' not in session:
+        session['voter_id'] = uuid.uuid4().hex
+        session.permanent = True
+    return session['voter_id']
+
+def track_submissions(problems):
+    """Feed newly submitted problems to the surge detector, and to trending once its windows are loaded"""
+    for p in problems:
+        spike_detector.observe(p.category, p.place_id or p.location_key, p.submitted_date)
+    if trending_tracker.loaded:
+        trending_tracker.add_problems([(p.submitted_date, p.category, p.place_id or p.location_key, p.title,
+                                        p.description) for p in problems])
+
+def location_scope(location):
+    """Scope key for a location query, matched the way stored problems were normalized"""
+    if not location:
+        return None
+    fields = location_normalizer.fields(location)
+    return fields['place_id'] or fields['location_key']
+
+def spike_alert_event(alert):
+    """A surge alert with the engagement brief for its category"""
+    return dict(alert, engagement=engagement_manager.surge_response(alert['category']))
+
+spike_detector.listeners.append(lambda alert: event_broadcaster.publish('spike_alert', spike_alert_event(alert)))
+
+def refresh_engagement_plan(problem, force=False):
+    """Regenerate a problem's stored plan if its inputs changed (or always, with force)"""
+    builder = PlanBuilder(engagement_manager, get_stakeholder_registry(), get_interest_matcher())
+    existing = EngagementPlan.query.filter_by(problem_id=problem.id).first()
+    existing_hashes = {problem.id: existing.inputs_hash} if existing and not force else {}
+    
+    results = builder.build([(problem.id, problem.category, problem.severity)], existing_hashes)
+    if results:
+        save_plans(db.session.connection(), EngagementPlan, results, {problem.id} if existing else set(),
+                   engagement_progress)
+        db.session.commit()
+    return EngagementPlan.query.filter_by(problem_id=problem.id).first(), bool(results)
+
+def compose_notifications(problem):
+    """Notifications for a problem event, run on the dispatcher's worker threads"""
+    with app.app_context():
+        roles = engagement_manager.category_stakeholder_mapping.get(problem['category'], [])
+        stakeholders = get_stakeholder_registry().by_roles(roles)
+    return engagement_manager.notification_messages(problem, stakeholders)
+
+notification_outbox = OutboxTransport(app.config['NOTIFY_OUTBOX'])
+notification_dispatcher = NotificationDispatcher(compose_notifications, {
+    'email': (SmtpTransport(app.config['NOTIFY_SMTP_HOST'], app.config['NOTIFY_SMTP_PORT'], app.config['NOTIFY_SENDER'])
+              if app.config['NOTIFY_SMTP_HOST'] else notification_outbox),
+    'webhook': (WebhookTransport(app.config['NOTIFY_WEBHOOK_URL'])
+                if app.config['NOTIFY_WEBHOOK_URL'] else notification_outbox)
+}, concurrency=app.config['NOTIFY_CONCURRENCY'])
+
+def notify_stakeholders(problem):
+    """Queue the initial stakeholder notification for severe problems or ones in a surge; returns at once"""
+    surging = spike_detector.is_surging(problem.category, problem.place_id or problem.location_key)
+    if problem.severity in app.config['NOTIFY_SEVERITIES'] or surging:
+        notification_dispatcher.submit(dict(problem_event(problem), description=problem.description))
+
+def problem_event(problem):
+    """Dashboard delta for a new problem"""
+    return {
+        'id': problem.id,
+        'title': problem.title,
+        'description': problem.description[:100],
+        'category': problem.category,
+        'severity': problem.severity,
+        'status': problem.status,
+        'location': problem.location,
+        'submitted_date': problem.submitted_date.isoformat()
+    }
+
+def validate_fields(item, limits):
+    """Check required string fields against their maximum lengths"""
+    errors = []
+    for field, max_length in limits.items():
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            errors.append(f'{field} is required')
+        elif max_length and len(value) > max_length:
+            errors.append(f'{field} must be at most {max_length} characters')
+    return errors
+
+def validate_problem_item(item):
+    """Validation errors for one batch problem"""
+    if not isinstance(item, dict):
+        return ['item must be an object']
+    
+    errors = validate_fields(item, {'title': 200, 'description': None, 'category': 100,
+                                    'severity': 50, 'location': 200, 'submitted_by': 100})
+    if isinstance(item.get('category'), str) and item['category'] not in problem_analyzer.categories:
+        errors.append('unknown category')
+    if isinstance(item.get('severity'), str) and item['severity'] not in PROBLEM_SEVERITIES:
+        errors.append('unknown severity')
+    return errors
+
+def validate_solution_item(item):
+    """Validation errors for one batch solution (problem existence is checked separately)"""
+    if not isinstance(item, dict):
+        return ['item must be an object']
+    
+    errors = validate_fields(item, {'title': 200, 'description': None, 'proposed_by': 100})
+    if not isinstance(item.get('problem_id'), int) or isinstance(item.get('problem_id'), bool):
+        errors.append('problem_id must be an integer')
+    return errors
 
 # Routes
 @app.route('/')
 def index():
-    problems = CommunityProblem.query.order_by(CommunityProblem.submitted_date.desc()).limit(6).all()
-    total_problems = CommunityProblem.query.count()
-    total_solutions = Solution.query.count()
-    total_stakeholders = Stakeholder.query.count()
+    problems = read_models.recent_problems(db.session, CommunityProblem, limit=6)
+    total_problems = (read_models.row_count(db.session, CommunityProblem) +
+                      read_models.row_count(db.session, ArchivedProblem))
+    total_solutions = read_models.row_count(db.session, Solution)
+    total_stakeholders = read_models.row_count(db.session, Stakeholder)
     
     return render_template('index.html', 
                          problems=problems,
@@ -94,6 +403,11 @@ def submit_problem():
         
         db.session.add(problem)
         db.session.commit()
+        if interest_matcher.loaded:
+            interest_matcher.update_problems([(problem.id, title, description, category)])
+        track_submissions([problem])
+        event_broadcaster.publish('problem_created', problem_event(problem))
+        notify_stakeholders(problem)
         
         flash('Problem submitted successfully!', 'success')
         return redirect(url_for('view_problem', id=problem.id))
@@ -102,8 +416,14 @@ def submit_problem():
 
 @app.route('/problem/<int:id>')
 def view_problem(id):
-    problem = CommunityProblem.query.get_or_404(id)
-    solutions = Solution.query.filter_by(problem_id=id).order_by(Solution.votes.desc()).all()
+    problem = read_models.problem_detail(db.session, CommunityProblem, id)
+    if problem is None:
+        # Archived problems are read back from their Parquet segment
+        problem, solutions = problem_archive.load_problem(db.session, id)
+        if problem is None:
+            abort(404)
+        return render_template('view_problem.html', problem=problem, solutions=solutions, archived=True)
+    solutions = read_models.problem_solutions(db.session, Solution, id)
     return render_template('view_problem.html', problem=problem, solutions=solutions)
 
 @app.route('/submit_solution/<int:problem_id>', methods=['GET', 'POST'])
@@ -125,18 +445,61 @@ def submit_solution(problem_id):
         db.session.add(solution)
         problem.solution_count += 1
         db.session.commit()
+        event_broadcaster.publish('solution_created', {
+            'id': solution.id,
+            'problem_id': problem_id,
+            'category': problem.category,
+            'solution_count': problem.solution_count
+        })
         
         flash('Solution submitted successfully!', 'success')
         return redirect(url_for('view_problem', id=problem_id))
     
     return render_template('submit_solution.html', problem=problem)
 
-@app.route('/vote_solution/<int:solution_id>')
+@app.route('/vote_solution/<int:solution_id>', methods=['POST'])
 def vote_solution(solution_id):
     solution = Solution.query.get_or_404(solution_id)
-    solution.votes += 1
+    if not get_vote_filter().record(db.session, solution.id, voter_id()):
+        flash('You have already voted for this solution.', 'info')
+        return redirect(url_for('view_problem', id=solution.problem_id))
+    
+    # Incremented in the database so concurrent voters can't overwrite each other's votes
+    solution_id, problem_id = solution.id, solution.problem_id
+    votes, hot_score = hot_ranking.add_vote(db.session, Solution, solution_id)
+    category = db.session.query(CommunityProblem.category).filter_by(id=problem_id).scalar()
     db.session.commit()
-    return redirect(url_for('view_problem', id=solution.problem_id))
+    event_broadcaster.publish('vote_changed', {
+        'solution_id': solution_id,
+        'problem_id': problem_id,
+        'category': category,
+        'votes': votes,
+        'hot_score': hot_score
+    })
+    return redirect(url_for('view_problem', id=problem_id))
+
+@app.route('/problem/<int:id>/status', methods=['POST'])
+def update_problem_status(id):
+    problem = CommunityProblem.query.get_or_404(id)
+    status = request.form['status']
+    
+    if status not in PROBLEM_STATUSES:
+        flash('Unknown problem status.', 'error')
+        return redirect(url_for('view_problem', id=id))
+    
+    old_status = problem.status
+    if status != old_status:
+        problem.status = status
+        db.session.commit()
+        event_broadcaster.publish('problem_status_changed', {
+            'id': problem.id,
+            'category': problem.category,
+            'old_status': old_status,
+            'status': status
+        })
+    
+    flash(f'Problem marked as {status}.', 'success')
+    return redirect(url_for('view_problem', id=id))
 
 @app.route('/join_stakeholder', methods=['GET', 'POST'])
 def join_stakeholder():
@@ -157,6 +520,12 @@ def join_stakeholder():
         
         db.session.add(stakeholder)
         db.session.commit()
+        # An unloaded registry will pick the new row up when it loads
+        if stakeholder_registry.loaded:
+            stakeholder_registry.add(stakeholder)
+        if interest_matcher.loaded:
+            interest_matcher.update_stakeholders([(stakeholder.id, interests, organization)])
+        event_broadcaster.publish('stakeholder_joined', {'id': stakeholder.id, 'role': stakeholder.role})
         
         flash('Successfully joined as stakeholder!', 'success')
         return redirect(url_for('index'))
@@ -165,39 +534,349 @@ def join_stakeholder():
 
 @app.route('/dashboard')
 def dashboard():
-    problems = CommunityProblem.query.all()
-    solutions = Solution.query.all()
-    stakeholders = Stakeholder.query.all()
+    # Only counts and the handful of rows shown are read, never whole tables
+    recent_problems = read_models.recent_problems(db.session, CommunityProblem, limit=5, excerpt_length=100)
+    stakeholders = read_models.first_stakeholders(db.session, Stakeholder, limit=5)
+    by_status = read_models.counts_by(db.session, CommunityProblem, 'status')
+    totals = {
+        'problems': sum(by_status.values()),
+        'solutions': read_models.row_count(db.session, Solution),
+        'stakeholders': read_models.row_count(db.session, Stakeholder),
+        'resolved': by_status.get('Resolved', 0)
+    }
+    
+    archived = problem_archive.problem_columns(['category', 'severity'])
+    archived_counts = problem_archive.counts(db.session)
     
-    # Generate charts
-    category_chart = chart_generator.generate_category_chart(problems)
-    severity_chart = chart_generator.generate_severity_chart(problems)
-    timeline_chart = chart_generator.generate_timeline_chart(problems)
+    # Generate charts; the archive is counted alongside the hot table
+    category_chart = chart_generator.generate_category_chart(
+        counts=Counter(read_models.counts_by(db.session, CommunityProblem, 'category')) +
+        Counter(archived['category'].tolist()))
+    severity_chart = chart_generator.generate_severity_chart(
+        counts=Counter(read_models.counts_by(db.session, CommunityProblem, 'severity')) +
+        Counter(archived['severity'].tolist()))
+    timeline_chart = chart_generator.generate_timeline_chart(timeline_rollup.read(db.session, 'month'), weight='count')
+    spatial_chart = chart_generator.generate_spatial_chart(
+        spatial_aggregate(db.session, CommunityProblem, archive=problem_archive)[0])
+    
+    # Solution analytics come from grouped SQL aggregates
+    solution_stats = collect_solution_stats(db.session, CommunityProblem, Solution, problem_archive)
+    solution_chart = chart_generator.generate_solution_effectiveness_chart(stats=solution_stats)
+    trending = get_trending_tracker().trending()
+    alerts = [spike_alert_event(alert) for alert in spike_detector.recent_alerts(limit=5)]
+    distribution_chart = chart_generator.generate_solution_distribution_chart(solution_stats)
+    first_solution_chart = chart_generator.generate_time_to_first_solution_chart(solution_stats)
     
     return render_template('dashboard.html',
-                         problems=problems,
-                         solutions=solutions,
+                         recent_problems=recent_problems,
                          stakeholders=stakeholders,
+                         totals=totals,
+                         archived_counts=archived_counts,
                          category_chart=category_chart,
                          severity_chart=severity_chart,
-                         timeline_chart=timeline_chart)
+                         timeline_chart=timeline_chart,
+                         spatial_chart=spatial_chart,
+                         solution_chart=solution_chart,
+                         distribution_chart=distribution_chart,
+                         first_solution_chart=first_solution_chart,
+                         trending=trending,
+                         alerts=alerts,
+                         categories=problem_analyzer.categories)
 
 @app.route('/api/problems')
 def api_problems():
-    problems = CommunityProblem.query.all()
-    return jsonify([{
-        'id': p.id,
-        'title': p.title,
-        'category': p.category,
-        'severity': p.severity,
-        'location': p.location,
-        'status': p.status,
-        'submitted_date': p.submitted_date.isoformat(),
-        'stakeholder_count': p.stakeholder_count,
-        'solution_count': p.solution_count
-    } for p in problems])
+    problems = read_models.problem_listing(db.session, CommunityProblem)
+    return jsonify([dict(p.as_dict(), submitted_date=p.submitted_date.isoformat()) for p in problems])
+
+@app.route('/api/charts/timeline')
+def api_timeline_chart():
+    bucket = request.args.get('bucket', 'month')
+    facet = request.args.get('facet') or None
+    if bucket not in BUCKET_FREQUENCIES or (facet is not None and facet not in FACETS):
+        return jsonify({'error': f'bucket must be one of {list(BUCKET_FREQUENCIES)} and facet one of {list(FACETS)}'}), 400
+    
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO dates'}), 400
+    
+    # Only the pre-aggregated rollup is read, never the problems table, so the
+    # range covers whole buckets; the chart reports the range actually shown
+    start, end = snap_range(bucket, start, end)
+    columns = timeline_rollup.read(db.session, bucket, start, end)
+    chart = json.loads(chart_generator.generate_timeline_chart(columns, bucket, facet, weight='count'))
+    chart['range'] = {'start': start.isoformat() if start else None, 'end': end.isoformat() if end else None}
+    return jsonify(chart)
+
+@app.route('/api/spatial')
+def api_spatial():
+    try:
+        precision = int(request.args.get('precision', 4))
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'precision must be an integer and start and end ISO dates'}), 400
+    if not MIN_PRECISION <= precision <= MAX_PRECISION:
+        return jsonify({'error': f'precision must be between {MIN_PRECISION} and {MAX_PRECISION}'}), 400
+    
+    category = request.args.get('category') or None
+    cells, unresolved = spatial_aggregate(db.session, CommunityProblem, precision, category, start, end,
+                                          problem_archive)
+    if request.args.get('format') == 'chart':
+        return Response(chart_generator.generate_spatial_chart(cells), mimetype='application/json')
+    return jsonify({'precision': precision, 'cells': cells, 'unresolved': unresolved})
+
+@app.route('/api/trending')
+def api_trending():
+    try:
+        windows = int(request.args['windows']) if request.args.get('windows') else None
+        limit = min(max(int(request.args.get('limit', 10)), 1), trending_tracker.top_k)
+    except ValueError:
+        return jsonify({'error': 'windows and limit must be integers'}), 400
+    if windows is not None and not 1 <= windows <= trending_tracker.window_count:
+        return jsonify({'error': f'windows must be between 1 and {trending_tracker.window_count}'}), 400
+    
+    location = location_scope(request.args.get('location'))
+    return jsonify(get_trending_tracker().trending(request.args.get('category') or None, location, windows, limit))
+
+@app.route('/api/alerts')
+def api_alerts():
+    limit = min(max(request.args.get('limit', 50, type=int), 1), spike_detector.alerts.maxlen)
+    alerts = spike_detector.recent_alerts(request.args.get('category') or None,
+                                          location_scope(request.args.get('location')), limit)
+    return jsonify({'alerts': [spike_alert_event(alert) for alert in alerts]})
+
+@app.route('/api/solutions/hot')
+def api_hot_solutions():
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        after = parse_cursor(request.args['after']) if request.args.get('after') else None
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer and after a cursor from a previous page'}), 400
+    
+    solutions = read_models.hot_solutions(db.session, Solution, CommunityProblem, limit, after)
+    return jsonify({
+        'solutions': [dict(s.as_dict(), proposed_date=s.proposed_date.isoformat()) for s in solutions],
+        'next': format_cursor(solutions[-1]) if len(solutions) == limit else None
+    })
+
+@app.route('/api/engagement_plan')
+def api_engagement_plan():
+    category = request.args.get('category')
+    severity = request.args.get('severity', 'Medium')
+    if category not in problem_analyzer.categories or severity not in PROBLEM_SEVERITIES:
+        return jsonify({'error': 'category and severity must be known values'}), 400
+    
+    # Rendered once per stakeholder registry version
+    plan_json = engagement_manager.render_plan_json(category, severity, get_stakeholder_registry())
+    return Response(plan_json, mimetype='application/json')
+
+@app.route('/api/problems/<int:id>/engagement_plan')
+def api_problem_engagement_plan(id):
+    plan = EngagementPlan.query.filter_by(problem_id=id).first()
+    if plan is None:
+        plan, _ = refresh_engagement_plan(CommunityProblem.query.get_or_404(id))
+    return Response(plan.plan, mimetype='application/json')
+
+@app.route('/api/problems/<int:id>/engagement_plan/regenerate', methods=['POST'])
+def api_regenerate_engagement_plan(id):
+    problem = CommunityProblem.query.get_or_404(id)
+    force = request.args.get('force', 'false').lower() == 'true'
+    plan, regenerated = refresh_engagement_plan(problem, force)
+    return jsonify({
+        'problem_id': id,
+        'regenerated': regenerated,
+        'generated_date': plan.generated_date.isoformat(),
+        'plan': json.loads(plan.plan)
+    })
+
+@app.route('/api/problems/<int:id>/engagement_activities', methods=['GET', 'POST'])
+def api_engagement_activities(id):
+    problem = CommunityProblem.query.get_or_404(id)
+    if request.method == 'GET':
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        return jsonify({'problem_id': id, 'activities': engagement_progress.activities(db.session.connection(), id, limit)})
+    
+    data = request.get_json(silent=True) or {}
+    completed = data.get('completed', True)
+    if not isinstance(completed, bool):
+        return jsonify({'error': 'completed must be true or false'}), 400
+    
+    plan = EngagementPlan.query.filter_by(problem_id=id).first()
+    if plan is None:
+        plan, _ = refresh_engagement_plan(problem)
+    try:
+        activity_id = engagement_progress.record(
+            db.session.connection(), id, plan.category, plan.severity, data.get('phase'), data.get('action'),
+            completed=completed, actor=data.get('actor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'activity_id': activity_id,
+        'progress': engagement_progress.progress(db.session.connection(), id, plan.category, plan.severity)
+    }), 201
+
+@app.route('/api/problems/<int:id>/engagement_progress')
+def api_engagement_progress(id):
+    plan = EngagementPlan.query.filter_by(problem_id=id).first()
+    if plan is None:
+        plan = CommunityProblem.query.get_or_404(id)
+    return jsonify(engagement_progress.progress(db.session.connection(), id, plan.category, plan.severity))
+
+@app.route('/api/problems/<int:id>/matches')
+def api_problem_matches(id):
+    k = min(max(request.args.get('k', 10, type=int), 1), interest_matcher.cache_k)
+    matches = get_interest_matcher().stakeholders_for_problem(id, k)
+    if matches is None:
+        return jsonify({'error': 'Problem not found'}), 404
+    
+    stakeholders = {s.id: s for s in read_models.stakeholders_by_id(db.session, Stakeholder, [sid for sid, _ in matches])}
+    return jsonify({'problem_id': id, 'matches': [{
+        'stakeholder_id': sid,
+        'name': stakeholders[sid].name,
+        'role': stakeholders[sid].role,
+        'organization': stakeholders[sid].organization,
+        'score': score
+    } for sid, score in matches if sid in stakeholders]})
+
+@app.route('/api/stakeholders/<int:id>/matches')
+def api_stakeholder_matches(id):
+    k = min(max(request.args.get('k', 10, type=int), 1), interest_matcher.cache_k)
+    matches = get_interest_matcher().problems_for_stakeholder(id, k)
+    if matches is None:
+        return jsonify({'error': 'Stakeholder not found'}), 404
+    
+    problems = {p.id: p for p in read_models.problems_by_id(db.session, CommunityProblem, [pid for pid, _ in matches])}
+    return jsonify({'stakeholder_id': id, 'matches': [{
+        'problem_id': pid,
+        'title': problems[pid].title,
+        'category': problems[pid].category,
+        'severity': problems[pid].severity,
+        'status': problems[pid].status,
+        'score': score
+    } for pid, score in matches if pid in problems]})
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected a JSON object with "problems" and/or "solutions" lists'}), 400
+    
+    problem_items = payload.get('problems', [])
+    solution_items = payload.get('solutions', [])
+    if not isinstance(problem_items, list) or not isinstance(solution_items, list):
+        return jsonify({'error': '"problems" and "solutions" must be lists'}), 400
+    
+    max_items = app.config['BATCH_MAX_ITEMS']
+    if len(problem_items) + len(solution_items) > max_items:
+        return jsonify({'error': f'A batch may contain at most {max_items} items'}), 413
+    
+    problem_results = [{'index': i, 'errors': validate_problem_item(item)} for i, item in enumerate(problem_items)]
+    solution_results = [{'index': i, 'errors': validate_solution_item(item)} for i, item in enumerate(solution_items)]
+    
+    # Resolve every referenced problem with one query
+    referenced_ids = {item['problem_id'] for item, result in zip(solution_items, solution_results) if not result['errors']}
+    problems_by_id = {}
+    if referenced_ids:
+        rows = db.session.query(CommunityProblem.id, CommunityProblem.category).filter(CommunityProblem.id.in_(referenced_ids))
+        problems_by_id = {row.id: row.category for row in rows}
+    for item, result in zip(solution_items, solution_results):
+        if not result['errors'] and item['problem_id'] not in problems_by_id:
+            result['errors'].append('problem not found')
+    
+    valid_problems = [(item, result) for item, result in zip(problem_items, problem_results) if not result['errors']]
+    valid_solutions = [(item, result) for item, result in zip(solution_items, solution_results) if not result['errors']]
+    
+    # AI Analysis for the whole batch at once
+    analyses = problem_analyzer.analyze_problems(
+        [(item['title'], item['description'], item['category']) for item, _ in valid_problems])
+    
+    problems = [
+        CommunityProblem(
+            title=item['title'],
+            description=item['description'],
+            category=item['category'],
+            severity=item['severity'],
+            location=item['location'],
+            submitted_by=item['submitted_by'],
+            ai_analysis=analysis
+        ) for (item, _), analysis in zip(valid_problems, analyses)
+    ]
+    solutions = [
+        Solution(
+            problem_id=item['problem_id'],
+            title=item['title'],
+            description=item['description'],
+            proposed_by=item['proposed_by']
+        ) for item, _ in valid_solutions
+    ]
+    
+    # Everything goes in as one transaction
+    db.session.add_all(problems)
+    db.session.add_all(solutions)
+    db.session.flush()
+    
+    # One aggregated counter update per problem, sent as a single executemany
+    added_per_problem = {}
+    for solution in solutions:
+        added_per_problem[solution.problem_id] = added_per_problem.get(solution.problem_id, 0) + 1
+    if added_per_problem:
+        db.session.execute(
+            update(CommunityProblem.__table__)
+            .where(CommunityProblem.__table__.c.id == bindparam('problem_id'))
+            .values(solution_count=CommunityProblem.__table__.c.solution_count + bindparam('added')),
+            [{'problem_id': pid, 'added': added} for pid, added in added_per_problem.items()]
+        )
+    db.session.commit()
+    
+    if interest_matcher.loaded and problems:
+        interest_matcher.update_problems([(p.id, p.title, p.description, p.category) for p in problems])
+    track_submissions(problems)
+    for problem, (_, result) in zip(problems, valid_problems):
+        result['id'] = problem.id
+        event_broadcaster.publish('problem_created', problem_event(problem))
+        notify_stakeholders(problem)
+    for solution, (_, result) in zip(solutions, valid_solutions):
+        result['id'] = solution.id
+        event_broadcaster.publish('solution_created', {
+            'id': solution.id,
+            'problem_id': solution.problem_id,
+            'category': problems_by_id[solution.problem_id]
+        })
+    
+    for result in problem_results + solution_results:
+        if not result['errors']:
+            del result['errors']
+    
+    created = len(problems) + len(solutions)
+    return jsonify({
+        'created': created,
+        'failed': len(problem_items) + len(solution_items) - created,
+        'problems': problem_results,
+        'solutions': solution_results
+    }), 201 if created else 400
+
+@app.route('/api/notifications/stats')
+def api_notification_stats():
+    return jsonify(notification_dispatcher.stats())
+
+@app.route('/api/events')
+def api_events():
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    stream = event_broadcaster.stream(last_event_id)
+    if stream is None:
+        # The browser's EventSource gives up on a 503; the dashboard still works without live updates
+        return Response('Too many open event streams', status=503, headers={'Retry-After': '30'})
+    return Response(stream,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    app.run(debug=True, host='0.0.0.0', port=5000)
+        get_vote_filter()
+    # Threaded so open event streams don't block other requests
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -29,18 +29,19 @@ def install_requirements():
         print(f"❌ Failed to install requirements: {e}")
         return False
 
-def setup_nltk_data():
-    """Download required NLTK data"""
-    print("\n🧠 Setting up NLTK data...")
+def build_nlp_resources():
+    """Build the NLP resource bundle (stopwords, sentiment lexicon, keyword tables)"""
+    print("\n🧠 Building NLP resource bundle...")
     try:
-        import nltk
-        nltk.download('punkt', quiet=True)
-        nltk.download('stopwords', quiet=True)
-        print("✅ NLTK data downloaded")
+        from src.ai_analysis.resources import DEFAULT_RESOURCES, NLPResources, write_bundle
+        path = os.getenv('NLP_RESOURCES_PATH') or DEFAULT_RESOURCES
+        write_bundle(path)
+        resources = NLPResources.open(path)
+        print(f"✅ Wrote {path} (version {resources.version}, stopwords from {resources.meta['stopwords_source']})")
         return True
     except Exception as e:
-        print(f"⚠️  Warning: Could not download NLTK data: {e}")
-        print("   The application will still work, but some AI features may be limited")
+        print(f"⚠️  Warning: Could not build the NLP resource bundle: {e}")
+        print("   The application will build it on first start instead")
         return True
 
 def create_directories():
@@ -54,6 +55,21 @@ def create_directories():
     
     return True
 
+def build_static_assets():
+    """Generate precompressed variants of static assets"""
+    print("\n🗜️  Precompressing static assets...")
+    try:
+        from src.web.http_cache import precompress_static, brotli
+        written = precompress_static('static')
+        print(f"✅ Wrote {len(written)} compressed asset variants")
+        if brotli is None:
+            print("   Install 'brotli' to also generate .br variants")
+        return True
+    except Exception as e:
+        print(f"⚠️  Warning: Could not precompress static assets: {e}")
+        print("   Assets will be served uncompressed")
+        return True
+
 def check_database():
     """Check database setup"""
     print("\n🗄️  Checking database...")
@@ -121,8 +137,11 @@ def main():
     if not install_requirements():
         return False
     
-    # Setup NLTK data
-    setup_nltk_data()
+    # Build NLP resources
+    build_nlp_resources()
+    
+    # Build static assets
+    build_static_assets()
     
     # Check database
     if not check_database():
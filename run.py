@@ -7,12 +7,13 @@ BYTE Hacks 2025 - Strengthening Society
 import os
 import sys
 from app import app, db
+from src.data_ingestion.schema import upgrade_schema
 
 def setup_database():
     """Initialize the database with sample data"""
     with app.app_context():
-        # Create all tables
-        db.create_all()
+        # Create all tables and add columns introduced since the database was created
+        upgrade_schema(db)
         
         # Check if we already have data
         from app import CommunityProblem, Solution, Stakeholder
@@ -124,6 +125,28 @@ def setup_database():
             print("Sample data added successfully!")
         else:
             print("Database already contains data.")
+        
+        # Databases created before the timeline rollup existed need a backfill
+        from app import ProblemRollup, problem_archive, timeline_rollup
+        if ProblemRollup.query.first() is None and CommunityProblem.query.first() is not None:
+            print("Building timeline rollup...")
+            timeline_rollup.backfill(db.session, problem_archive)
+        
+        # Problems stored before location normalization existed
+        from app import location_normalizer
+        if CommunityProblem.query.filter(CommunityProblem.location_key.is_(None)).first() is not None:
+            print("Normalizing problem locations...")
+            location_normalizer.backfill(db.session, CommunityProblem)
+        
+        # Solutions stored before hot ranking existed
+        from app import hot_ranking
+        if Solution.query.filter(Solution.hot_score.is_(None)).first() is not None:
+            print("Scoring solutions...")
+            hot_ranking.backfill(db.session, Solution)
+        
+        # Restore the vote dedup filters before requests arrive
+        from app import get_vote_filter
+        get_vote_filter()
 
 def main():
     """Main application entry point"""
@@ -150,8 +173,8 @@ def main():
     print(f"🤝 Join as Stakeholder: http://localhost:{port}/join_stakeholder")
     print("\n" + "=" * 60)
     
-    # Run the application
-    app.run(debug=debug_mode, host=host, port=port)
+    # Run the application; threaded so open event streams don't block other requests
+    app.run(debug=debug_mode, host=host, port=port, threaded=True)
 
 if __name__ == '__main__':
     main()
@@ -1,62 +1,90 @@
 import re
-from textblob import TextBlob
-import nltk
 from collections import Counter
 import json
+import numpy as np
 import pandas as pd
+from src.ai_analysis.resources import load_resources, sentiment_analyzer
+
+# Batches at least this large match keywords with one vectorized scan per keyword instead of per text
+VECTORIZE_MIN_BATCH = 16
 
 class ProblemAnalyzer:
-    def __init__(self):
-        # Download required NLTK data
-        try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt')
-        
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+    def __init__(self, resources=None):
+        # Stopwords, sentiment lexicon and keyword tables come from the shared, memory-mapped bundle
+        self.resources = resources or load_resources()
+        self.sentiment = sentiment_analyzer(self.resources)
+        self.stop_words = self.resources.stopwords
         
         # Define problem categories and keywords
-        self.categories = {
-            'Social Division': ['division', 'conflict', 'tension', 'disagreement', 'polarization', 'us vs them', 'exclusion'],
-            'Disinformation': ['fake news', 'misinformation', 'false information', 'rumor', 'conspiracy', 'propaganda'],
-            'Community Safety': ['safety', 'crime', 'security', 'violence', 'threat', 'danger', 'protection'],
-            'Infrastructure': ['infrastructure', 'roads', 'utilities', 'transportation', 'facilities', 'maintenance'],
-            'Environment': ['environment', 'pollution', 'climate', 'sustainability', 'green', 'waste', 'conservation'],
-            'Education': ['education', 'school', 'learning', 'academic', 'student', 'teacher', 'curriculum'],
-            'Healthcare': ['health', 'medical', 'healthcare', 'hospital', 'doctor', 'treatment', 'wellness'],
-            'Economic': ['economic', 'employment', 'business', 'economy', 'financial', 'jobs', 'income']
-        }
-        
-        self.severity_keywords = {
-            'Critical': ['urgent', 'emergency', 'crisis', 'critical', 'immediate', 'severe', 'dangerous'],
-            'High': ['serious', 'important', 'significant', 'major', 'concerning', 'worrying'],
-            'Medium': ['moderate', 'average', 'standard', 'typical', 'normal'],
-            'Low': ['minor', 'small', 'slight', 'minimal', 'insignificant']
-        }
+        self.categories = self.resources.keywords['categories']
+        self.severity_keywords = self.resources.keywords['severity']
+        self.stakeholder_keywords = self.resources.keywords['stakeholders']
+        
+        # Every keyword once, and per table a keyword x group matrix counting how often each group lists it
+        tables = {'categories': self.categories, 'severity': self.severity_keywords,
+                  'stakeholders': self.stakeholder_keywords}
+        self.keywords = sorted({keyword for table in tables.values() for words in table.values() for keyword in words})
+        position = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self.keyword_groups = {}
+        for name, table in tables.items():
+            membership = np.zeros((len(self.keywords), len(table)), dtype=np.int64)
+            for j, words in enumerate(table.values()):
+                for keyword in words:
+                    membership[position[keyword], j] += 1
+            self.keyword_groups[name] = membership
 
     def analyze_problem(self, title, description, category):
         """Analyze a community problem and provide AI insights"""
-        
-        # Combine title and description for analysis
-        full_text = f"{title} {description}".lower()
+        return self.analyze_problems([(title, description, category)])[0]
+
+    def analyze_problems(self, items):
+        """Analyze a batch of (title, description, category) tuples
+
+        Identical problems are analyzed once. Keyword matching for categories,
+        severity and stakeholders runs over the whole batch as one hit matrix
+        and a matrix product per table; sentiment and key issues stay per text.
+        """
+        analysis_date = str(pd.Timestamp.now())
+        unique = list(dict.fromkeys(items))
+        texts = [f"{title} {description}".lower() for title, description, _ in unique]
+        scores = self._keyword_scores(texts)
+        
+        results = {}
+        for i, (item, text) in enumerate(zip(unique, texts)):
+            row_scores = {name: matrix[i].tolist() for name, matrix in scores.items()}
+            results[item] = json.dumps(self._build_analysis(text, item[2], row_scores, analysis_date), indent=2)
+        
+        return [results[item] for item in items]
+
+    def _keyword_scores(self, texts):
+        """Per table, a texts x groups matrix of how many of the group's keywords each text contains"""
+        if len(texts) >= VECTORIZE_MIN_BATCH:
+            array = np.array(texts)
+            hits = np.empty((len(texts), len(self.keywords)), dtype=np.int64)
+            for j, keyword in enumerate(self.keywords):
+                hits[:, j] = np.char.find(array, keyword) >= 0
+        else:
+            hits = np.array([[keyword in text for keyword in self.keywords] for text in texts],
+                            dtype=np.int64).reshape(len(texts), len(self.keywords))
+        return {name: hits @ membership for name, membership in self.keyword_groups.items()}
+
+    def _build_analysis(self, full_text, category, scores, analysis_date):
+        """Run every analysis step over one problem's lowercased text and its keyword scores"""
         
         # Sentiment analysis
         sentiment = self._analyze_sentiment(full_text)
         
         # Category confidence
-        category_confidence = self._analyze_category(full_text, category)
+        category_confidence = self._analyze_category(scores['categories'], category)
         
         # Severity assessment
-        severity_assessment = self._assess_severity(full_text)
+        severity_assessment = self._assess_severity(scores['severity'])
         
         # Key issues extraction
         key_issues = self._extract_key_issues(full_text)
         
         # Stakeholder identification
-        stakeholders = self._identify_stakeholders(full_text)
+        stakeholders = self._identify_stakeholders(scores['stakeholders'])
         
         # Generate recommendations
         recommendations = self._generate_recommendations(category, severity_assessment, key_issues)
@@ -68,15 +96,14 @@ class ProblemAnalyzer:
             'key_issues': key_issues,
             'stakeholders': stakeholders,
             'recommendations': recommendations,
-            'analysis_date': str(pd.Timestamp.now())
+            'analysis_date': analysis_date
         }
         
-        return json.dumps(analysis, indent=2)
+        return analysis
 
     def _analyze_sentiment(self, text):
         """Analyze sentiment of the text"""
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
+        polarity, subjectivity = self.sentiment(text)
         
         if polarity > 0.1:
             sentiment = 'Positive'
@@ -88,16 +115,12 @@ class ProblemAnalyzer:
         return {
             'sentiment': sentiment,
             'polarity': round(polarity, 3),
-            'subjectivity': round(blob.sentiment.subjectivity, 3)
+            'subjectivity': round(subjectivity, 3)
         }
 
-    def _analyze_category(self, text, provided_category):
+    def _analyze_category(self, scores, provided_category):
         """Analyze how well the text matches the provided category"""
-        category_scores = {}
-        
-        for cat, keywords in self.categories.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            category_scores[cat] = score
+        category_scores = dict(zip(self.categories, scores))
         
         # Find best matching category
         best_category = max(category_scores, key=category_scores.get)
@@ -110,13 +133,9 @@ class ProblemAnalyzer:
             'all_scores': category_scores
         }
 
-    def _assess_severity(self, text):
+    def _assess_severity(self, scores):
         """Assess the severity level of the problem"""
-        severity_scores = {}
-        
-        for severity, keywords in self.severity_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            severity_scores[severity] = score
+        severity_scores = dict(zip(self.severity_keywords, scores))
         
         # Determine severity based on scores
         if severity_scores['Critical'] > 0:
@@ -133,14 +152,17 @@ class ProblemAnalyzer:
             'scores': severity_scores
         }
 
-    def _extract_key_issues(self, text):
-        """Extract key issues and themes from the text"""
+    def issue_terms(self, text):
+        """Words of the text that can name an issue: no stop words or short words"""
         # Simple keyword extraction
         words = re.findall(r'\b\w+\b', text.lower())
         
-        # Remove common stop words
-        stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should'])
-        filtered_words = [word for word in words if word not in stop_words and len(word) > 3]
+        # Remove stop words
+        return [word for word in words if word not in self.stop_words and len(word) > 3]
+
+    def _extract_key_issues(self, text):
+        """Extract key issues and themes from the text"""
+        filtered_words = self.issue_terms(text)
         
         # Count word frequency
         word_freq = Counter(filtered_words)
@@ -150,23 +172,10 @@ class ProblemAnalyzer:
             'total_issues': len(set(filtered_words))
         }
 
-    def _identify_stakeholders(self, text):
+    def _identify_stakeholders(self, scores):
         """Identify potential stakeholders based on the problem description"""
-        stakeholder_keywords = {
-            'Government': ['government', 'city', 'municipal', 'mayor', 'council', 'official', 'policy'],
-            'Community Groups': ['community', 'neighborhood', 'residents', 'citizens', 'local'],
-            'Business': ['business', 'company', 'corporate', 'industry', 'commerce', 'economic'],
-            'Education': ['school', 'university', 'college', 'education', 'student', 'teacher'],
-            'Healthcare': ['hospital', 'clinic', 'health', 'medical', 'doctor', 'nurse'],
-            'Media': ['media', 'news', 'journalist', 'press', 'communication'],
-            'NGOs': ['nonprofit', 'organization', 'charity', 'foundation', 'ngo']
-        }
-        
-        identified_stakeholders = []
-        
-        for stakeholder_type, keywords in stakeholder_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                identified_stakeholders.append(stakeholder_type)
+        identified_stakeholders = [stakeholder_type for stakeholder_type, score in zip(self.stakeholder_keywords, scores)
+                                   if score > 0]
         
         return {
             'identified_stakeholders': identified_stakeholders,
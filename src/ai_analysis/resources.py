@@ -0,0 +1,316 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime
+from functools import cached_property, lru_cache
+
+DEFAULT_RESOURCES = os.path.join(os.path.dirname(__file__), 'data', 'nlp_resources.bin')
+
+MAGIC = b'CSNLPRES'
+FORMAT_VERSION = 1
+# Bump when the stopword sources, lexicon extraction or keyword tables change
+RESOURCES_VERSION = 1
+
+# magic, format version, section count, sha256 of everything after the header
+HEADER = struct.Struct('<8sII32s')
+# section name, offset, length
+SECTION = struct.Struct('<16sQQ')
+
+LEXICON_MODIFIER = 1
+
+# Always treated as stopwords, whatever list the bundle is built from
+BASE_STOPWORDS = ['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are',
+                  'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+                  'should']
+
+CATEGORY_KEYWORDS = {
+    'Social Division': ['division', 'conflict', 'tension', 'disagreement', 'polarization', 'us vs them', 'exclusion'],
+    'Disinformation': ['fake news', 'misinformation', 'false information', 'rumor', 'conspiracy', 'propaganda'],
+    'Community Safety': ['safety', 'crime', 'security', 'violence', 'threat', 'danger', 'protection'],
+    'Infrastructure': ['infrastructure', 'roads', 'utilities', 'transportation', 'facilities', 'maintenance'],
+    'Environment': ['environment', 'pollution', 'climate', 'sustainability', 'green', 'waste', 'conservation'],
+    'Education': ['education', 'school', 'learning', 'academic', 'student', 'teacher', 'curriculum'],
+    'Healthcare': ['health', 'medical', 'healthcare', 'hospital', 'doctor', 'treatment', 'wellness'],
+    'Economic': ['economic', 'employment', 'business', 'economy', 'financial', 'jobs', 'income']
+}
+
+SEVERITY_KEYWORDS = {
+    'Critical': ['urgent', 'emergency', 'crisis', 'critical', 'immediate', 'severe', 'dangerous'],
+    'High': ['serious', 'important', 'significant', 'major', 'concerning', 'worrying'],
+    'Medium': ['moderate', 'average', 'standard', 'typical', 'normal'],
+    'Low': ['minor', 'small', 'slight', 'minimal', 'insignificant']
+}
+
+STAKEHOLDER_KEYWORDS = {
+    'Government': ['government', 'city', 'municipal', 'mayor', 'council', 'official', 'policy'],
+    'Community Groups': ['community', 'neighborhood', 'residents', 'citizens', 'local'],
+    'Business': ['business', 'company', 'corporate', 'industry', 'commerce', 'economic'],
+    'Education': ['school', 'university', 'college', 'education', 'student', 'teacher'],
+    'Healthcare': ['hospital', 'clinic', 'health', 'medical', 'doctor', 'nurse'],
+    'Media': ['media', 'news', 'journalist', 'press', 'communication'],
+    'NGOs': ['nonprofit', 'organization', 'charity', 'foundation', 'ngo']
+}
+
+
+def _word_table(words):
+    """Sorted words as: count, count + 1 offsets, then the UTF-8 text"""
+    encoded = [word.encode('utf-8') for word in words]
+    offsets = array('I', [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+    return struct.pack('<I', len(encoded)) + offsets.tobytes() + b''.join(encoded)
+
+
+class WordTable:
+    """A sorted word table read in place from the bundle, searched by bisection"""
+
+    def __init__(self, buffer):
+        self._count = struct.unpack_from('<I', buffer)[0]
+        end = 4 + 4 * (self._count + 1)
+        self._offsets = buffer[4:end].cast('I')
+        self._text = buffer[end:]
+
+    def __len__(self):
+        return self._count
+
+    def _key(self, i):
+        return self._text[self._offsets[i]:self._offsets[i + 1]].tobytes()
+
+    def __getitem__(self, i):
+        return self._key(i).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+    def index(self, word):
+        """Position of word in the table, or -1"""
+        key = word.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._count and self._key(low) == key else -1
+
+    def __contains__(self, word):
+        return self.index(word) >= 0
+
+
+def _stopwords():
+    """English stopwords from the local NLTK corpus, or scikit-learn's list when it isn't installed"""
+    words = set(BASE_STOPWORDS)
+    try:
+        from nltk.corpus import stopwords
+        words.update(stopwords.words('english'))
+        return words, 'nltk'
+    except (ImportError, LookupError):
+        from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+        words.update(ENGLISH_STOP_WORDS)
+        return words, 'scikit-learn'
+
+
+def _sentiment_lexicon():
+    """TextBlob's English sentiment lexicon after its own loading rules, as sorted rows"""
+    from textblob.en import sentiment
+
+    # The first access parses the XML lexicon and derives the -ly adverbs, as in normal TextBlob use
+    len(sentiment)
+    rows = []
+    for word, senses in sorted(dict.items(sentiment), key=lambda item: item[0].encode('utf-8')):
+        polarity, subjectivity, intensity = senses[None]
+        flags = LEXICON_MODIFIER if any(pos in senses for pos in sentiment.modifiers) else 0
+        rows.append((word, polarity, subjectivity, intensity, flags))
+    return rows, dict(sentiment.labeler)
+
+
+def build_bundle():
+    """The resource bundle as bytes"""
+    stopwords, stopwords_source = _stopwords()
+    lexicon, labels = _sentiment_lexicon()
+
+    scores = array('d')
+    flags = array('B')
+    for _, polarity, subjectivity, intensity, word_flags in lexicon:
+        scores.extend((polarity, subjectivity, intensity))
+        flags.append(word_flags)
+
+    meta = {
+        'version': RESOURCES_VERSION,
+        'byteorder': sys.byteorder,
+        'built_date': datetime.utcnow().isoformat(),
+        'stopwords_source': stopwords_source,
+        'stopwords': len(stopwords),
+        'lexicon_words': len(lexicon)
+    }
+    keywords = {'categories': CATEGORY_KEYWORDS, 'severity': SEVERITY_KEYWORDS, 'stakeholders': STAKEHOLDER_KEYWORDS}
+    sections = [
+        ('meta', json.dumps(meta).encode('utf-8')),
+        ('stopwords', _word_table(sorted(stopwords, key=lambda word: word.encode('utf-8')))),
+        ('lexicon.words', _word_table([row[0] for row in lexicon])),
+        ('lexicon.scores', scores.tobytes()),
+        ('lexicon.flags', flags.tobytes()),
+        ('lexicon.labels', json.dumps(labels).encode('utf-8')),
+        ('keywords', json.dumps(keywords).encode('utf-8'))
+    ]
+
+    # Sections start on 8-byte boundaries so the score array can be cast in place
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory, body = [], bytearray()
+    for name, data in sections:
+        padding = -(offset + len(body)) % 8
+        body.extend(b'\0' * padding)
+        directory.append(SECTION.pack(name.encode('ascii'), offset + len(body), len(data)))
+        body.extend(data)
+    payload = b''.join(directory) + bytes(body)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), hashlib.sha256(payload).digest()) + payload
+
+
+def write_bundle(path=DEFAULT_RESOURCES):
+    """Build the bundle and move it into place atomically; returns the bytes written"""
+    data = build_bundle()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+    return data
+
+
+class NLPResources:
+    """Stopwords, sentiment lexicon and keyword tables read from one binary bundle
+
+    The bundle is memory-mapped read-only, so every worker on a host shares
+    the same pages and opening it costs a checksum over the file rather than
+    parsing NLTK corpora and TextBlob's XML lexicon. Word tables are searched
+    in place; only the small stopword set and keyword tables become objects.
+    """
+
+    def __init__(self, buffer):
+        view = memoryview(buffer)
+        magic, format_version, count, checksum = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError('Not an NLP resource bundle')
+        if format_version != FORMAT_VERSION:
+            raise ValueError(f'Bundle format {format_version} is not supported')
+        if hashlib.sha256(view[HEADER.size:]).digest() != checksum:
+            raise ValueError('NLP resource bundle checksum mismatch')
+
+        self.checksum = checksum.hex()
+        self._buffer = buffer
+        self._sections = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            self._sections[name.rstrip(b'\0').decode('ascii')] = view[offset:offset + length]
+
+        self.meta = self._json('meta')
+        if self.meta['byteorder'] != sys.byteorder:
+            raise ValueError('NLP resource bundle was built on a host with a different byte order')
+        self.keywords = self._json('keywords')
+        self.lexicon_words = WordTable(self._sections['lexicon.words'])
+        self.lexicon_scores = self._sections['lexicon.scores'].cast('d')
+        self.lexicon_flags = self._sections['lexicon.flags']
+        self.lexicon_labels = self._json('lexicon.labels')
+
+    @classmethod
+    def open(cls, path=DEFAULT_RESOURCES):
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def _json(self, name):
+        return json.loads(self._sections[name].tobytes().decode('utf-8'))
+
+    @property
+    def version(self):
+        return f"{self.meta['version']}-{self.checksum[:12]}"
+
+    @cached_property
+    def stopwords(self):
+        return frozenset(WordTable(self._sections['stopwords']))
+
+    def lexicon_entry(self, word):
+        """(polarity, subjectivity, intensity, is_modifier) for a lexicon word, or None"""
+        i = self.lexicon_words.index(word)
+        if i < 0:
+            return None
+        polarity, subjectivity, intensity = self.lexicon_scores[3 * i:3 * i + 3]
+        return polarity, subjectivity, intensity, bool(self.lexicon_flags[i] & LEXICON_MODIFIER)
+
+
+def load_resources(path=None):
+    """Open the bundle, building it first if it is missing, stale or damaged
+
+    A bundle that can't be written (read-only install) is kept in memory instead.
+    """
+    path = path or DEFAULT_RESOURCES
+    try:
+        resources = NLPResources.open(path)
+        if resources.meta['version'] == RESOURCES_VERSION:
+            return resources
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        write_bundle(path)
+        return NLPResources.open(path)
+    except OSError:
+        return NLPResources(build_bundle())
+
+
+def sentiment_analyzer(resources):
+    """TextBlob's pattern sentiment scorer reading its lexicon from the bundle"""
+    from textblob._text import Sentiment
+    from textblob.en import parser
+
+    class BundleSentiment(Sentiment):
+        """Looks words up in the mapped lexicon instead of loading the XML into a dict"""
+
+        def __init__(self):
+            super().__init__(negations=('no', 'not', "n't", 'never'), modifiers=('RB',),
+                             modifier=lambda w: w.endswith('ly'), tokenizer=parser.find_tokens, language='en')
+            self.labeler = resources.lexicon_labels
+            self._senses = lru_cache(maxsize=16384)(self._lookup)
+
+        def _lookup(self, word):
+            entry = resources.lexicon_entry(word)
+            if entry is None:
+                return None
+            scores = entry[:3]
+            # assessments() only reads the untagged sense and whether the word is a modifier
+            return {None: scores, 'RB': scores} if entry[3] else {None: scores}
+
+        def load(self, path=None):
+            pass
+
+        def __contains__(self, word):
+            return self._senses(word) is not None
+
+        def __getitem__(self, word):
+            senses = self._senses(word)
+            if senses is None:
+                raise KeyError(word)
+            return senses
+
+    return BundleSentiment()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the NLP resource bundle used by the problem analyzer')
+    parser.add_argument('--output', default=DEFAULT_RESOURCES, help='bundle path')
+    args = parser.parse_args(argv)
+
+    data = write_bundle(args.output)
+    resources = NLPResources.open(args.output)
+    print(f'Wrote {args.output} ({len(data):,} bytes): version {resources.version}, '
+          f"{len(resources.stopwords)} stopwords from {resources.meta['stopwords_source']}, "
+          f"{len(resources.lexicon_words):,} lexicon words")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from src.ai_analysis.trending import EPOCH, problem_location
+
+CHECKPOINT_VERSION = 1
+
+# Per-key state: [bucket, count in bucket, EWMA mean, EWMA variance, bucket last alerted]
+BUCKET, COUNT, MEAN, VARIANCE, ALERTED = range(5)
+
+
+def scope_key(category, location):
+    return f"{category}\x1f{location or ''}"
+
+
+class SpikeDetector:
+    """Online surge detection on submission counts per (category, location)
+
+    Submissions are counted per bucket for each (category, location) and for
+    the category across all locations. Each closed bucket updates an
+    exponentially weighted mean and variance, and runs of empty buckets are
+    applied in closed form, so a submission costs O(1) whatever the history.
+    A bucket whose running count reaches min_count and lies threshold
+    standard deviations above the mean raises one alert. The variance is
+    floored at the mean (as for Poisson counts) so quiet scopes don't alert
+    on a couple of reports.
+
+    State lives in the process and is checkpointed to a JSON file, so
+    restarts keep their baselines; each process detects surges in what it saw.
+    """
+
+    def __init__(self, bucket_minutes=60, alpha=0.05, threshold=4.0, min_count=5, warmup_buckets=24,
+                 state_path=None, checkpoint_seconds=60, max_alerts=200):
+        self.bucket = timedelta(minutes=bucket_minutes)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.state_path = state_path
+        self.checkpoint_seconds = checkpoint_seconds
+        self.alerts = deque(maxlen=max_alerts)
+        self.listeners = []
+        self._states = {}
+        self._first_bucket = None
+        self._dirty = False
+        self._checkpointed = time.monotonic()
+        self._lock = threading.Lock()
+
+    def bucket_index(self, when):
+        return (when - EPOCH) // self.bucket
+
+    def bucket_start(self, index):
+        return EPOCH + index * self.bucket
+
+    def _advance(self, state, bucket):
+        """Fold the state's bucket into the averages, then any empty buckets up to bucket"""
+        if bucket <= state[BUCKET]:
+            return
+        count, mean, variance = state[COUNT], state[MEAN], state[VARIANCE]
+        difference = count - mean
+        increment = self.alpha * difference
+        mean += increment
+        variance = (1 - self.alpha) * (variance + difference * increment)
+
+        # k empty buckets: mean decays by (1 - alpha)^k and the variance has the same closed form
+        decay = (1 - self.alpha) ** (bucket - state[BUCKET] - 1)
+        state[VARIANCE] = decay * (variance + mean * mean * (1 - decay))
+        state[MEAN] = decay * mean
+        state[BUCKET] = bucket
+        state[COUNT] = 0
+
+    def observe(self, category, location, when=None):
+        """Count one submission; returns the alerts it raised"""
+        bucket = self.bucket_index(when or datetime.utcnow())
+        raised = []
+        with self._lock:
+            if self._first_bucket is None:
+                self._first_bucket = bucket
+            for scope in ((category, location), (category, None)) if location else ((category, None),):
+                key = scope_key(*scope)
+                state = self._states.get(key)
+                if state is None:
+                    # A new scope had no submissions since the detector started
+                    state = self._states[key] = [min(self._first_bucket, bucket), 0, 0.0, 0.0, None]
+                self._advance(state, bucket)
+                # Late submissions count toward the current bucket
+                state[COUNT] += 1
+                self._dirty = True
+
+                alert = self._check(scope, state)
+                if alert is not None:
+                    self.alerts.append(alert)
+                    raised.append(alert)
+
+        for alert in raised:
+            for listener in self.listeners:
+                listener(alert)
+        if self.state_path and time.monotonic() - self._checkpointed >= self.checkpoint_seconds:
+            self.checkpoint()
+        return raised
+
+    def _check(self, scope, state):
+        count, mean = state[COUNT], state[MEAN]
+        if count < self.min_count or state[ALERTED] == state[BUCKET]:
+            return None
+        if state[BUCKET] - self._first_bucket < self.warmup_buckets:
+            return None
+        deviation = math.sqrt(max(state[VARIANCE], mean, 1.0))
+        zscore = (count - mean) / deviation
+        if zscore < self.threshold:
+            return None
+
+        state[ALERTED] = state[BUCKET]
+        return {
+            'category': scope[0],
+            'location': scope[1],
+            'bucket_start': self.bucket_start(state[BUCKET]).isoformat(),
+            'bucket_minutes': self.bucket.total_seconds() / 60,
+            'count': count,
+            'expected': round(mean, 3),
+            'zscore': round(zscore, 2),
+            'detected_date': datetime.utcnow().isoformat()
+        }
+
+    def is_surging(self, category, location=None, now=None):
+        """Whether the scope (or its category overall) alerted in this bucket or the previous one"""
+        bucket = self.bucket_index(now or datetime.utcnow())
+        with self._lock:
+            for scope in ((category, location), (category, None)):
+                state = self._states.get(scope_key(*scope))
+                if state is not None and state[ALERTED] is not None and bucket - state[ALERTED] <= 1:
+                    return True
+        return False
+
+    def recent_alerts(self, category=None, location=None, limit=50):
+        """Most recent alerts first, optionally for one category or location"""
+        with self._lock:
+            alerts = list(self.alerts)
+        alerts = [a for a in reversed(alerts)
+                  if (category is None or a['category'] == category) and (location is None or a['location'] == location)]
+        return alerts[:limit]
+
+    def baseline(self, category, location=None, now=None):
+        """Current expected submissions per bucket and deviation for a scope, or None if never seen"""
+        with self._lock:
+            state = self._states.get(scope_key(category, location))
+            if state is None:
+                return None
+            state = list(state)
+        self._advance(state, self.bucket_index(now or datetime.utcnow()))
+        return {'expected': state[MEAN], 'deviation': math.sqrt(max(state[VARIANCE], state[MEAN], 1.0))}
+
+    def checkpoint(self, path=None):
+        """Write every scope's state and the recent alerts atomically, if anything changed"""
+        path = path or self.state_path
+        with self._lock:
+            if not self._dirty:
+                return
+            bucket = self.bucket_index(datetime.utcnow())
+            # Scopes that have decayed to nothing restart from zero anyway
+            stale = [key for key, state in self._states.items()
+                     if state[BUCKET] < bucket and state[MEAN] < 1e-4 and state[VARIANCE] < 1e-4]
+            for key in stale:
+                del self._states[key]
+            snapshot = {
+                'version': CHECKPOINT_VERSION,
+                'bucket_minutes': self.bucket.total_seconds() / 60,
+                'alpha': self.alpha,
+                'first_bucket': self._first_bucket,
+                'scopes': dict(self._states),
+                'alerts': list(self.alerts)
+            }
+            self._checkpointed = time.monotonic()
+            self._dirty = False
+            temporary = f'{path}.{os.getpid()}.tmp'
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(temporary, 'w') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+            os.replace(temporary, path)
+
+    def restore(self, path=None):
+        """Load a checkpoint written with the same bucket size; returns whether one was loaded"""
+        path = path or self.state_path
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if (snapshot.get('version') != CHECKPOINT_VERSION
+                or snapshot.get('bucket_minutes') != self.bucket.total_seconds() / 60):
+            return False
+        with self._lock:
+            self._states = {key: list(state) for key, state in snapshot['scopes'].items()}
+            self._first_bucket = snapshot['first_bucket']
+            self.alerts.clear()
+            self.alerts.extend(snapshot['alerts'])
+        return True
+
+    def replay(self, session, problem_model, days=30, chunk_size=10000):
+        """Rebuild baselines from the problems submitted in the last days, without raising alerts"""
+        p = problem_model.__table__.c
+        since = datetime.utcnow() - timedelta(days=days)
+        stmt = select(p.category, problem_location(p), p.submitted_date).where(
+            p.submitted_date >= since).order_by(p.submitted_date)
+
+        listeners, self.listeners = self.listeners, []
+        with self._lock:
+            self._states = {}
+            self._first_bucket = self.bucket_index(since)
+        try:
+            observed = 0
+            for rows in session.execute(stmt.execution_options(yield_per=chunk_size)).partitions():
+                for category, location, submitted_date in rows:
+                    self.observe(category, location, submitted_date)
+                observed += len(rows)
+        finally:
+            self.listeners = listeners
+            self.alerts.clear()
+        return observed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the submission spike baselines from stored problems')
+    parser.add_argument('--days', type=int, default=30, help='history to replay')
+    args = parser.parse_args(argv)
+
+    from app import app, db, spike_detector, CommunityProblem
+
+    with app.app_context():
+        observed = spike_detector.replay(db.session, CommunityProblem, args.days)
+    spike_detector.checkpoint()
+    print(f'Replayed {observed:,} submissions into {spike_detector.state_path}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
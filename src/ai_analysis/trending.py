@@ -0,0 +1,261 @@
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+
+EPOCH = datetime(1970, 1, 1)
+
+# Scope kinds tracked besides the corpus-wide one
+SCOPE_KINDS = ('category', 'location')
+
+
+class CountMinSketch:
+    """Fixed-size frequency sketch with conservative update
+
+    Estimates never undercount; overcounts come only from hash collisions and
+    stay small while the table is wide relative to the distinct keys.
+    """
+
+    def __init__(self, width=2 ** 15, depth=4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int32)
+        self._rows = np.arange(depth)[:, None]
+
+    def _cells(self, keys):
+        """Column per row for each key, by double hashing one 128-bit digest"""
+        digests = [hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest() for key in keys]
+        first = np.array([int.from_bytes(d[:8], 'little') for d in digests], dtype=np.uint64)
+        second = np.array([int.from_bytes(d[8:], 'little') | 1 for d in digests], dtype=np.uint64)
+        return ((first[None, :] + self._rows.astype(np.uint64) * second[None, :]) % np.uint64(self.width)).astype(
+            np.int64)
+
+    def add(self, keys):
+        """Count each key once"""
+        if not keys:
+            return
+        cells = self._cells(keys)
+        values = self.table[self._rows, cells]
+        # Only raise the counters that hold the key's current minimum
+        raised = np.maximum(values, values.min(axis=0) + 1)
+        np.maximum.at(self.table, (np.broadcast_to(self._rows, cells.shape), cells), raised)
+
+    def estimate(self, keys):
+        if not keys:
+            return []
+        return self.table[self._rows, self._cells(keys)].min(axis=0).tolist()
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+
+class SpaceSaving:
+    """Space-Saving top-k counter over at most capacity items
+
+    When full, a new item replaces the least counted one and inherits its
+    count, so every count is an upper bound on the true count. base is added
+    for summaries started after their scope had already seen problems.
+    """
+
+    def __init__(self, capacity, base=0):
+        self.capacity = capacity
+        self.base = base
+        self.counts = {}
+
+    def add(self, item):
+        """Count an item; returns the item it displaced, if any"""
+        counts = self.counts
+        if item in counts:
+            counts[item] += 1
+            return None
+        if len(counts) < self.capacity:
+            counts[item] = 1
+            return None
+        victim = min(counts, key=counts.get)
+        counts[item] = counts.pop(victim) + 1
+        return victim
+
+    def floor(self):
+        """Upper bound for any item not being tracked"""
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def upper(self, item):
+        return self.counts.get(item, self.floor()) + self.base
+
+    def top(self, n):
+        return sorted(self.counts, key=self.counts.get, reverse=True)[:n]
+
+
+class TrendingWindow:
+    """Issue term counts for one time window, in fixed memory
+
+    Problems per category and per location go through Space-Saving counters
+    so only the busiest scopes keep a term summary; the Count-Min sketch holds
+    a count for every (scope, term) and tightens the summaries' upper bounds.
+    """
+
+    def __init__(self, start, top_k, max_scopes, sketch_width, sketch_depth):
+        self.start = start
+        self.top_k = top_k
+        self.problems = 0
+        self.sketch = CountMinSketch(sketch_width, sketch_depth)
+        self.scopes = {kind: SpaceSaving(max_scopes[kind]) for kind in SCOPE_KINDS}
+        self.terms = {('all', None): SpaceSaving(top_k)}
+
+    def add(self, terms, scopes):
+        self.problems += 1
+        keys = []
+        for scope in [('all', None)] + scopes:
+            kind, value = scope
+            if kind != 'all':
+                counter = self.scopes[kind]
+                evicted = counter.add(value)
+                if evicted is not None:
+                    self.terms.pop((kind, evicted), None)
+                if scope not in self.terms:
+                    # Problems counted for this scope before it was tracked could hold any term
+                    self.terms[scope] = SpaceSaving(self.top_k, base=counter.counts[value] - 1)
+            summary = self.terms[scope]
+            for term in terms:
+                summary.add(term)
+                keys.append(sketch_key(scope, term))
+        self.sketch.add(keys)
+
+    def scope_problems(self, scope):
+        kind, value = scope
+        return self.problems if kind == 'all' else self.scopes[kind].counts.get(value, 0)
+
+    def estimates(self, scope, terms):
+        """Upper bounds on each term's count in this window, the tighter of sketch and summary"""
+        sketched = self.sketch.estimate([sketch_key(scope, term) for term in terms])
+        summary = self.terms.get(scope)
+        if summary is None:
+            return sketched
+        return [min(count, summary.upper(term)) for count, term in zip(sketched, terms)]
+
+    @property
+    def nbytes(self):
+        return self.sketch.nbytes
+
+
+def sketch_key(scope, term):
+    kind, value = scope
+    return f'{kind}\x1f{value or ""}\x1f{term}'
+
+
+class TrendingTracker:
+    """Corpus-wide, per-category and per-location trending issue terms over rolling windows
+
+    Each analyzed problem's distinct issue terms are counted into the window
+    its submission falls in. Windows are fixed-size sketches, so memory is
+    bounded by the window count whatever the volume; rotating drops the
+    oldest window and starts an empty one.
+    """
+
+    def __init__(self, tokenize, window_hours=24, windows=7, top_k=50, max_categories=32, max_locations=256,
+                 sketch_width=2 ** 15, sketch_depth=4):
+        self.tokenize = tokenize
+        self.window = timedelta(hours=window_hours)
+        self.window_count = windows
+        self.top_k = top_k
+        self.max_scopes = {'category': max_categories, 'location': max_locations}
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.windows = deque(maxlen=windows)
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def window_start(self, when):
+        return EPOCH + ((when - EPOCH) // self.window) * self.window
+
+    def _rotate(self, now):
+        """Open windows up to the one holding now, dropping those that fall off the end"""
+        current = self.window_start(now)
+        if self.windows and self.windows[-1].start >= current:
+            return
+        start = current - (self.window_count - 1) * self.window
+        if self.windows:
+            start = max(start, self.windows[-1].start + self.window)
+        while start <= current:
+            self.windows.append(TrendingWindow(start, self.top_k, self.max_scopes, self.sketch_width,
+                                               self.sketch_depth))
+            start += self.window
+
+    def add(self, submitted_date, category, location, text):
+        """Count one problem's issue terms; location is its place id or normalized location key"""
+        submitted_date = submitted_date or datetime.utcnow()
+        terms = sorted(set(self.tokenize(text)))
+        scopes = [(kind, value) for kind, value in zip(SCOPE_KINDS, (category, location)) if value]
+
+        with self._lock:
+            self._rotate(max(submitted_date, datetime.utcnow()))
+            start = self.window_start(submitted_date)
+            for window in self.windows:
+                if window.start == start:
+                    window.add(terms, scopes)
+                    return True
+        # Older than every window kept
+        return False
+
+    def add_problems(self, problems):
+        """Count (submitted_date, category, location, title, description) tuples"""
+        for submitted_date, category, location, title, description in problems:
+            self.add(submitted_date, category, location, f'{title} {description}')
+
+    def load(self, session, problem_model, chunk_size=10000):
+        """Count the problems submitted within the tracked windows"""
+        p = problem_model.__table__.c
+        since = self.window_start(datetime.utcnow()) - (self.window_count - 1) * self.window
+        stmt = select(p.submitted_date, p.category, problem_location(p), p.title, p.description).where(
+            p.submitted_date >= since)
+        for rows in session.execute(stmt.execution_options(yield_per=chunk_size)).partitions():
+            self.add_problems(rows)
+        self.loaded = True
+
+    def trending(self, category=None, location=None, windows=None, limit=10):
+        """Top terms for a scope over the most recent windows, with their estimated problem counts"""
+        scope = ('category', category) if category else ('location', location) if location else ('all', None)
+        with self._lock:
+            self._rotate(datetime.utcnow())
+            recent = list(self.windows)[-(windows or self.window_count):]
+            candidates = set()
+            for window in recent:
+                summary = window.terms.get(scope)
+                if summary is not None:
+                    candidates.update(summary.top(self.top_k))
+            candidates = sorted(candidates)
+            totals = np.zeros(len(candidates), dtype=np.int64)
+            problems = 0
+            for window in recent:
+                problems += window.scope_problems(scope)
+                if candidates:
+                    totals += np.array(window.estimates(scope, candidates), dtype=np.int64)
+
+        ranked = sorted(zip(candidates, totals.tolist()), key=lambda item: (-item[1], item[0]))[:limit]
+        return {
+            'scope': {'kind': scope[0], 'value': scope[1]},
+            'start': recent[0].start.isoformat() if recent else None,
+            'end': (recent[-1].start + self.window).isoformat() if recent else None,
+            'problems': problems,
+            'terms': [{'term': term, 'count': count, 'share': round(count / problems, 3) if problems else 0}
+                      for term, count in ranked if count]
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'windows': len(self.windows),
+                'window_hours': self.window.total_seconds() / 3600,
+                'problems': sum(window.problems for window in self.windows),
+                'sketch_bytes': sum(window.nbytes for window in self.windows),
+                'tracked_scopes': sum(len(window.terms) for window in self.windows)
+            }
+
+
+def problem_location(columns):
+    """Location scope of a problem row: its gazetteer place, else its normalized location text"""
+    return func.coalesce(columns.place_id, columns.location_key)
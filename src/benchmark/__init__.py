@@ -0,0 +1,3 @@
+"""
+benchmark module for Community Solver.
+"""
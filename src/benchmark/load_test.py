@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Relative weights of the routes replayed by default
+DEFAULT_MIX = {
+    'index': 15,
+    'submit_problem': 5,
+    'view_problem': 30,
+    'submit_solution': 5,
+    'vote_solution': 20,
+    'dashboard': 10,
+    'api_problems': 15
+}
+
+CATEGORIES = ['Social Division', 'Disinformation', 'Community Safety', 'Infrastructure',
+              'Environment', 'Education', 'Healthcare', 'Economic']
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def parse_mix(text):
+    """Parse 'route=weight,route=weight' into a mix dict"""
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        route, _, weight = part.partition('=')
+        route = route.strip()
+        if route not in DEFAULT_MIX:
+            raise ValueError(f"Unknown route in mix: {route}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+class LoadGenerator:
+    """Replays a weighted mix of the real routes against an in-process app"""
+
+    def __init__(self, app, mix=None, concurrency=4, seed=42):
+        self.app = app
+        self.mix = mix or dict(DEFAULT_MIX)
+        self.concurrency = concurrency
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._problem_ids = []
+        self._solution_ids = []
+        self._samples = {route: [] for route in self.mix}
+        self._errors = {route: 0 for route in self.mix}
+
+    def prepare(self, min_problems=20, min_solutions=20):
+        """Make sure there are problems and solutions for the read/vote routes to hit"""
+        from app import db, CommunityProblem, Solution
+
+        with self.app.app_context():
+            db.create_all()
+
+            client = self.app.test_client()
+            rng = random.Random(self.seed)
+            for i in range(max(0, min_problems - CommunityProblem.query.count())):
+                client.post('/submit_problem', data=self._problem_form(rng, i))
+
+            problem_ids = [row[0] for row in db.session.query(CommunityProblem.id)]
+            for i in range(max(0, min_solutions - Solution.query.count())):
+                client.post(f'/submit_solution/{rng.choice(problem_ids)}', data=self._solution_form(i))
+
+            self._problem_ids = [row[0] for row in db.session.query(CommunityProblem.id)]
+            self._solution_ids = [row[0] for row in db.session.query(Solution.id)]
+
+    def run(self, total_requests=1000):
+        """Issue total_requests requests across the worker threads"""
+        routes = list(self.mix)
+        weights = [self.mix[r] for r in routes]
+        per_worker = [total_requests // self.concurrency] * self.concurrency
+        for i in range(total_requests % self.concurrency):
+            per_worker[i] += 1
+
+        def worker(index, count):
+            rng = random.Random(self.seed + index)
+            client = self.app.test_client()
+            for i in range(count):
+                route = rng.choices(routes, weights)[0]
+                self._issue(client, rng, route, f"{index}-{i}")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [executor.submit(worker, i, n) for i, n in enumerate(per_worker)]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+        return self._report(elapsed, total_requests)
+
+    def _issue(self, client, rng, route, tag):
+        """Send one request for a route and record its latency"""
+        with self._lock:
+            problem_id = rng.choice(self._problem_ids) if self._problem_ids else 1
+            solution_id = rng.choice(self._solution_ids) if self._solution_ids else 1
+
+        if route == 'index':
+            call = lambda: client.get('/')
+        elif route == 'submit_problem':
+            call = lambda: client.post('/submit_problem', data=self._problem_form(rng, tag))
+        elif route == 'view_problem':
+            call = lambda: client.get(f'/problem/{problem_id}')
+        elif route == 'submit_solution':
+            call = lambda: client.post(f'/submit_solution/{problem_id}', data=self._solution_form(tag))
+        elif route == 'vote_solution':
+            call = lambda: client.post(f'/vote_solution/{solution_id}')
+        elif route == 'dashboard':
+            call = lambda: client.get('/dashboard')
+        else:
+            call = lambda: client.get('/api/problems')
+
+        failed = False
+        started = time.perf_counter()
+        try:
+            response = call()
+            failed = response.status_code >= 400
+            location = response.headers.get('Location', '')
+            response.close()
+        except Exception:
+            failed = True
+            location = ''
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            self._samples[route].append(latency)
+            if failed:
+                self._errors[route] += 1
+            elif route == 'submit_problem' and '/problem/' in location:
+                # Let later reads and solutions target the new problem
+                self._problem_ids.append(int(location.rsplit('/', 1)[1]))
+
+    def _problem_form(self, rng, tag):
+        category = rng.choice(CATEGORIES)
+        return {
+            'title': f'Load test problem {tag}',
+            'description': f'Residents report a serious {category.lower()} issue affecting the local community and schools.',
+            'category': category,
+            'severity': rng.choice(SEVERITIES),
+            'location': 'Springfield, IL',
+            'submitted_by': 'Load Tester'
+        }
+
+    def _solution_form(self, tag):
+        return {
+            'title': f'Load test solution {tag}',
+            'description': 'Organize community forums and publish verified information weekly.',
+            'proposed_by': 'Load Tester'
+        }
+
+    def _report(self, elapsed, total_requests):
+        routes = {}
+        for route, samples in self._samples.items():
+            latencies = sorted(samples)
+            count = len(latencies)
+            routes[route] = {
+                'requests': count,
+                'errors': self._errors[route],
+                'error_rate': round(self._errors[route] / count, 4) if count else 0.0,
+                'throughput_rps': round(count / elapsed, 2) if elapsed > 0 else 0.0,
+                'mean_ms': round(sum(latencies) / count * 1000, 3) if count else 0.0,
+                'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+                'max_ms': round(latencies[-1] * 1000, 3) if count else 0.0
+            }
+
+        total_errors = sum(self._errors.values())
+        return {
+            'version': _git_revision(),
+            'run_date': datetime.utcnow().isoformat(),
+            'config': {
+                'requests': total_requests,
+                'concurrency': self.concurrency,
+                'seed': self.seed,
+                'mix': self.mix
+            },
+            'totals': {
+                'requests': total_requests,
+                'errors': total_errors,
+                'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+                'elapsed_seconds': round(elapsed, 3),
+                'throughput_rps': round(total_requests / elapsed, 2) if elapsed > 0 else 0.0
+            },
+            'routes': routes
+        }
+
+
+def _git_revision():
+    """Current commit, so result files can be compared across versions"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def print_report(result, baseline=None):
+    """Print a per-route table, with deltas against a baseline result if given"""
+    totals = result['totals']
+    print(f"\nVersion {result['version']}: {totals['requests']} requests in {totals['elapsed_seconds']}s "
+          f"({totals['throughput_rps']} req/s, {totals['error_rate'] * 100:.2f}% errors)")
+    print(f"{'route':<16}{'reqs':>7}{'err%':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+
+    for route, stats in result['routes'].items():
+        line = (f"{route:<16}{stats['requests']:>7}{stats['error_rate'] * 100:>8.2f}"
+                f"{stats['throughput_rps']:>10.2f}{stats['p50_ms']:>10.2f}"
+                f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+        previous = (baseline or {}).get('routes', {}).get(route)
+        if previous and previous['p95_ms']:
+            change = (stats['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+            line += f"   p95 {change:+.1f}% vs {baseline['version']}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a route mix against a local Community Solver instance')
+    parser.add_argument('--requests', type=int, default=1000, help='total requests to issue')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of worker threads')
+    parser.add_argument('--mix', help="route weights, e.g. 'view_problem=50,vote_solution=20'")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database', help='database URL (defaults to a fresh temporary SQLite file)')
+    parser.add_argument('--output', default='load_test_results.json', help='JSON result file')
+    parser.add_argument('--compare', help='earlier JSON result file to compare against')
+    args = parser.parse_args(argv)
+
+    # The app reads its database URL at import time
+    if args.database:
+        os.environ['DATABASE_URL'] = args.database
+    elif 'DATABASE_URL' not in os.environ:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='community_solver_load_'), 'load_test.db')
+        os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+
+    from app import app
+
+    generator = LoadGenerator(app, parse_mix(args.mix) if args.mix else None,
+                              concurrency=args.concurrency, seed=args.seed)
+    generator.prepare()
+    result = generator.run(args.requests)
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_report(result, baseline)
+    print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+import argparse
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import delete, exists, func, insert, or_, select
+
+from src.data_ingestion.parquet import arrow_schema, write_table
+
+PENDING_PREFIX = '_pending-'
+
+# Columns the analytics read from archived problems and solutions
+PROBLEM_ANALYTICS_COLUMNS = ['id', 'category', 'severity', 'status', 'submitted_date', 'location', 'place_id',
+                             'latitude', 'longitude', 'geohash', 'solution_count']
+SOLUTION_ANALYTICS_COLUMNS = ['problem_id', 'votes', 'proposed_date']
+
+
+def month_of(value):
+    return value.strftime('%Y-%m')
+
+
+class ProblemArchive:
+    """Cold storage for old and resolved problems as zstd Parquet segments partitioned by month
+
+    archive() moves rows out of the hot tables: each chunk is written to
+    problems/month=YYYY-MM/part-<segment>.parquet (and the same under
+    solutions/), then stub rows are inserted and the hot rows deleted in one
+    transaction, together with the rows in other tables that reference them
+    (engagement plans, activities and progress, solution votes). Segments are only published after that commit, and a segment
+    left unpublished by a crash is published or discarded on the next run
+    depending on whether its stubs exist, so a row is never in both places.
+    """
+
+    def __init__(self, root, problem_model, solution_model, stub_model):
+        self.root = root
+        self.problem = problem_model.__table__
+        self.solution = solution_model.__table__
+        self.stubs = stub_model.__table__
+        self.problem_schema = arrow_schema(self.problem)
+        self.solution_schema = arrow_schema(self.solution)
+        self._frames = {}
+
+    def _directory(self, kind, month=None):
+        path = os.path.join(self.root, kind)
+        return os.path.join(path, f'month={month}') if month else path
+
+    def _segment_path(self, kind, month, segment, pending=False):
+        return os.path.join(self._directory(kind, month), f"{PENDING_PREFIX if pending else ''}part-{segment}.parquet")
+
+    def candidates(self, session, retain_days=365, resolved_days=30, now=None):
+        """Ids of problems to archive: any older than retain_days, or resolved and older than resolved_days"""
+        now = now or datetime.utcnow()
+        p = self.problem.c
+        # Submission order keeps each chunk within a few monthly partitions
+        stmt = select(p.id).where(or_(
+            p.submitted_date < now - timedelta(days=retain_days),
+            (p.status == 'Resolved') & (p.submitted_date < now - timedelta(days=resolved_days))
+        )).order_by(p.submitted_date, p.id)
+
+        # SQLite hands out max(id) + 1 for new rows, so archiving the newest
+        # problem or solution would let its id be reused by the next insert
+        newest_problem = session.execute(select(func.max(p.id))).scalar()
+        newest_solution = session.execute(select(self.solution.c.problem_id).order_by(
+            self.solution.c.id.desc()).limit(1)).scalar()
+        return [problem_id for problem_id in session.execute(stmt).scalars()
+                if problem_id not in (newest_problem, newest_solution)]
+
+    def archive(self, session, retain_days=365, resolved_days=30, chunk_size=5000, log=print):
+        """Move qualifying problems and their solutions into the archive"""
+        self.recover(session)
+        removed = self.remove_orphans(session)
+        if removed:
+            log(f'   removed {removed:,} rows left behind by earlier archiving')
+        ids = self.candidates(session, retain_days, resolved_days)
+        archived = {'problems': 0, 'solutions': 0}
+
+        for start in range(0, len(ids), chunk_size):
+            counts = self._archive_chunk(session, ids[start:start + chunk_size])
+            archived['problems'] += counts[0]
+            archived['solutions'] += counts[1]
+            log(f"   {archived['problems']:,}/{len(ids):,} problems archived")
+
+        self._frames.clear()
+        return archived
+
+    def _archive_chunk(self, session, ids):
+        p = self.problem.c
+        s = self.solution.c
+        problems = pd.DataFrame(session.execute(select(self.problem).where(p.id.in_(ids))).mappings().all(),
+                                columns=self.problem_schema.names)
+        solutions = pd.DataFrame(session.execute(select(self.solution).where(s.problem_id.in_(ids))).mappings().all(),
+                                 columns=self.solution_schema.names)
+        if problems.empty:
+            return 0, 0
+
+        segment = f"{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        problems['month'] = problems['submitted_date'].map(month_of)
+        months = dict(zip(problems['id'], problems['month']))
+        solutions['month'] = solutions['problem_id'].map(months)
+
+        written = []
+        for kind, frame, schema in (('problems', problems, self.problem_schema),
+                                    ('solutions', solutions, self.solution_schema)):
+            for month, rows in frame.groupby('month'):
+                path = self._segment_path(kind, month, segment, pending=True)
+                write_table(pa.Table.from_pandas(rows.drop(columns='month'), schema=schema, preserve_index=False), path)
+                written.append(path)
+
+        now = datetime.utcnow()
+        stubs = [{
+            'id': int(row.id),
+            'title': row.title,
+            'category': row.category,
+            'severity': row.severity,
+            'status': row.status,
+            'submitted_date': row.submitted_date.to_pydatetime(),
+            'month': row.month,
+            'segment': segment,
+            'archived_date': now
+        } for row in problems.itertuples(index=False)]
+
+        try:
+            session.execute(insert(self.stubs), stubs)
+            # Dependent rows go first so backends enforcing foreign keys accept the deletes
+            for table, column, parent in self.references():
+                parent_ids = ids if parent is self.problem else select(s.id).where(s.problem_id.in_(ids))
+                session.execute(delete(table).where(column.in_(parent_ids)))
+            session.execute(delete(self.solution).where(s.problem_id.in_(ids)))
+            session.execute(delete(self.problem).where(p.id.in_(ids)))
+            session.commit()
+        except Exception:
+            session.rollback()
+            for path in written:
+                os.remove(path)
+            raise
+
+        for path in written:
+            self._publish(path)
+        return len(problems), len(solutions)
+
+    def references(self):
+        """(table, column, parent table) for each foreign key into problems or solutions from other tables"""
+        archived = (self.problem, self.solution)
+        # Reverse dependency order, so a referencing table is cleared before the tables it references
+        for table in reversed(self.problem.metadata.sorted_tables):
+            if table in archived:
+                continue
+            for key in table.foreign_keys:
+                if key.column.table in archived:
+                    yield table, key.parent, key.column.table
+
+    def orphans(self, session):
+        """Rows per table whose problem or solution is no longer in the database"""
+        counts = {}
+        for table, column, parent in self.references():
+            orphaned = ~exists().where(parent.c.id == column)
+            counts[table.name] = counts.get(table.name, 0) + session.execute(
+                select(func.count()).select_from(table).where(orphaned)).scalar()
+        return counts
+
+    def remove_orphans(self, session):
+        """Delete rows referencing problems or solutions that are gone; returns how many"""
+        removed = 0
+        for table, column, parent in self.references():
+            removed += session.execute(delete(table).where(~exists().where(parent.c.id == column))).rowcount
+        session.commit()
+        return removed
+
+    def _publish(self, pending_path):
+        directory, name = os.path.split(pending_path)
+        os.replace(pending_path, os.path.join(directory, name[len(PENDING_PREFIX):]))
+
+    def recover(self, session):
+        """Publish segments whose stubs were committed and drop the rest"""
+        for kind in ('problems', 'solutions'):
+            directory = self._directory(kind)
+            if not os.path.isdir(directory):
+                continue
+            for month_dir in os.scandir(directory):
+                for entry in os.scandir(month_dir.path):
+                    if entry.name.startswith('_tmp-'):
+                        os.remove(entry.path)
+                    if not entry.name.startswith(PENDING_PREFIX):
+                        continue
+                    segment = entry.name[len(PENDING_PREFIX) + len('part-'):-len('.parquet')]
+                    committed = session.execute(
+                        select(self.stubs.c.id).where(self.stubs.c.segment == segment).limit(1)).first()
+                    if committed:
+                        self._publish(entry.path)
+                    else:
+                        os.remove(entry.path)
+
+    def find_stub(self, session, problem_id):
+        return session.execute(select(self.stubs).where(self.stubs.c.id == problem_id)).first()
+
+    def load_problem(self, session, problem_id):
+        """An archived problem and its solutions as attribute objects, or (None, []) if not archived"""
+        stub = self.find_stub(session, problem_id)
+        if stub is None:
+            return None, []
+
+        problem_rows = pq.read_table(self._segment_path('problems', stub.month, stub.segment),
+                                     filters=[('id', '=', problem_id)]).to_pylist()
+        if not problem_rows:
+            return None, []
+        solutions_path = self._segment_path('solutions', stub.month, stub.segment)
+        solution_rows = pq.read_table(solutions_path, filters=[('problem_id', '=', problem_id)]).to_pylist() \
+            if os.path.exists(solutions_path) else []
+
+        solutions = sorted((SimpleNamespace(**row) for row in solution_rows), key=lambda s: -(s.votes or 0))
+        return SimpleNamespace(**problem_rows[0]), solutions
+
+    def _dataset(self, kind):
+        directory = self._directory(kind)
+        if not os.path.isdir(directory):
+            return None
+        month = pa.field('month', pa.string())
+        partitioning = ds.partitioning(pa.schema([month]), flavor='hive')
+        # Segments written before a column was added read it as null
+        schema = (self.problem_schema if kind == 'problems' else self.solution_schema).append(month)
+        return ds.dataset(directory, format='parquet', partitioning=partitioning, schema=schema)
+
+    def segments(self, kind):
+        """Published segment paths of problems or solutions relative to the archive root, oldest month first"""
+        directory = self._directory(kind)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(kind, month_dir.name, entry.name) for month_dir in os.scandir(directory)
+                      for entry in os.scandir(month_dir.path) if not entry.name.startswith('_'))
+
+    def segment_batches(self, kind, segment, columns, batch_size=10000):
+        """Record batches of one segment's columns; columns added after it was written read as null"""
+        schema = self.problem_schema if kind == 'problems' else self.solution_schema
+        dataset = ds.dataset(os.path.join(self.root, segment), format='parquet', schema=schema)
+        return dataset.to_batches(columns=columns, batch_size=batch_size)
+
+    def _generation(self, kind):
+        """Changes whenever segments are published"""
+        directory = self._directory(kind)
+        if not os.path.isdir(directory):
+            return ()
+        return tuple(sorted((month_dir.name, entry.name) for month_dir in os.scandir(directory)
+                            for entry in os.scandir(month_dir.path) if not entry.name.startswith('_')))
+
+    def _frame(self, kind, columns):
+        """Archived columns as a DataFrame, cached until new segments appear"""
+        key = (kind, tuple(columns))
+        generation = self._generation(kind)
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        dataset = self._dataset(kind)
+        schema = self.problem_schema if kind == 'problems' else self.solution_schema
+        if dataset is None or not generation:
+            frame = schema.empty_table().select(columns).to_pandas()
+        else:
+            frame = dataset.to_table(columns=columns).to_pandas()
+        self._frames[key] = (generation, frame)
+        return frame
+
+    def problem_columns(self, columns=PROBLEM_ANALYTICS_COLUMNS, start=None, end=None):
+        """Archived problems' columns, optionally limited to a submission window"""
+        frame = self._frame('problems', list(dict.fromkeys(list(columns) + ['submitted_date'])))
+        if start is not None:
+            frame = frame[frame['submitted_date'] >= start]
+        if end is not None:
+            frame = frame[frame['submitted_date'] < end]
+        return frame[list(columns)]
+
+    def solution_columns(self, columns=SOLUTION_ANALYTICS_COLUMNS):
+        return self._frame('solutions', list(columns))
+
+    def counts(self, session):
+        """Archived problems in total and per status (from the stub table) and archived solutions"""
+        rows = session.execute(select(self.stubs.c.status, func.count()).group_by(self.stubs.c.status)).all()
+        return {
+            'total': sum(count for _, count in rows),
+            'by_status': dict(rows),
+            'solutions': len(self.solution_columns(['problem_id']))
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move old and resolved problems into the Parquet archive')
+    parser.add_argument('--retain-days', type=int, default=365, help='archive any problem older than this')
+    parser.add_argument('--resolved-days', type=int, default=30, help='archive resolved problems older than this')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--check', action='store_true',
+                        help='only report rows still referencing archived problems or solutions')
+    args = parser.parse_args(argv)
+
+    from app import app, db, problem_archive
+    from src.data_ingestion.schema import upgrade_schema
+
+    with app.app_context():
+        upgrade_schema(db)
+        if args.check:
+            orphans = problem_archive.orphans(db.session)
+            for table, count in orphans.items():
+                print(f'{table}: {count:,} orphaned rows')
+            return 1 if any(orphans.values()) else 0
+        archived = problem_archive.archive(db.session, args.retain_days, args.resolved_days, args.chunk_size)
+    print(f"Archived {archived['problems']:,} problems and {archived['solutions']:,} solutions "
+          f"to {problem_archive.root}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,346 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import and_, func, or_, select
+
+from src.data_ingestion.parquet import COMPRESSION, arrow_schema
+
+MANIFEST_NAME = 'manifest.json'
+
+EXPORT_FORMATS = ('parquet', 'arrow')
+
+# Fields parsed out of each problem's ai_analysis JSON, which replace the raw text in exports
+ANALYSIS_FIELDS = [
+    pa.field('sentiment', pa.string()),
+    pa.field('polarity', pa.float64()),
+    pa.field('subjectivity', pa.float64()),
+    pa.field('best_match_category', pa.string()),
+    pa.field('category_confidence', pa.float64()),
+    pa.field('assessed_severity', pa.string()),
+    pa.field('key_issues', pa.list_(pa.string())),
+    pa.field('identified_stakeholders', pa.list_(pa.string())),
+    pa.field('recommendations', pa.list_(pa.string())),
+    pa.field('priority_level', pa.string()),
+    pa.field('analysis_date', pa.timestamp('us'))
+]
+
+
+def parse_analysis(text):
+    """Flat analysis fields from an ai_analysis JSON document (all None if missing or unreadable)"""
+    try:
+        analysis = json.loads(text) if text else {}
+    except ValueError:
+        analysis = {}
+    sentiment = analysis.get('sentiment', {})
+    category = analysis.get('category_confidence', {})
+    severity = analysis.get('severity_assessment', {})
+    recommendations = analysis.get('recommendations', {})
+    try:
+        analysis_date = datetime.fromisoformat(analysis['analysis_date']) if analysis.get('analysis_date') else None
+    except ValueError:
+        analysis_date = None
+
+    return {
+        'sentiment': sentiment.get('sentiment'),
+        'polarity': sentiment.get('polarity'),
+        'subjectivity': sentiment.get('subjectivity'),
+        'best_match_category': category.get('best_match'),
+        'category_confidence': category.get('confidence'),
+        'assessed_severity': severity.get('assessed_severity'),
+        'key_issues': list(analysis.get('key_issues', {}).get('top_issues', {})) if analysis else None,
+        'identified_stakeholders': analysis.get('stakeholders', {}).get('identified_stakeholders'),
+        'recommendations': recommendations.get('recommendations'),
+        'priority_level': recommendations.get('priority_level'),
+        'analysis_date': analysis_date
+    }
+
+
+class ExportTable:
+    """One exported table: its fixed schema, the column that orders changes and how rows are shaped
+
+    Tables with an archive_kind also export the rows moved to the problem
+    archive, flagged by an archived column.
+    """
+
+    def __init__(self, name, model, created_column, parse_column=None, parse=None, parsed_fields=(),
+                 archive_kind=None):
+        self.name = name
+        self.table = model.__table__
+        self.created_column = created_column
+        self.columns = [column.name for column in self.table.columns if column.name != parse_column]
+        self.parse = parse
+        self.parsed_names = [field.name for field in parsed_fields]
+        self.archive_kind = archive_kind
+        extra = list(parsed_fields) + ([pa.field('archived', pa.bool_())] if archive_kind else [])
+        self.schema = arrow_schema(self.table, self.columns, extra)
+        self.source_columns = self.columns + ([parse_column] if parse_column else [])
+
+    def changed_since(self, since):
+        """Select rows changed at or after since (every row when since is None), in change order"""
+        c = self.table.c
+        # Rows that predate the updated_date column count as changed when created
+        changed = func.coalesce(c.updated_date, c[self.created_column])
+        stmt = select(*[c[name] for name in self.source_columns]).order_by(changed, c.id)
+        if since is not None:
+            # Spelled out rather than filtering on the coalesce so the updated_date index applies
+            stmt = stmt.where(or_(c.updated_date >= since,
+                                  and_(c.updated_date.is_(None), c[self.created_column] >= since)))
+        return stmt, changed
+
+    def record_batch(self, rows, archived=False):
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(self.columns)}
+        if self.parse is not None:
+            parsed = [self.parse(row[len(self.columns)]) for row in rows]
+            for field in self.parsed_names:
+                columns[field] = [p[field] for p in parsed]
+        if 'updated_date' in columns:
+            created = columns[self.created_column]
+            columns['updated_date'] = [updated or created[i] for i, updated in enumerate(columns['updated_date'])]
+        if self.archive_kind:
+            columns['archived'] = [archived] * len(rows)
+        return pa.RecordBatch.from_pydict(columns, schema=self.schema)
+
+    def archived_rows(self, archive, segment, batch_size):
+        """(rows, change times) per batch of an archive segment, rows shaped like changed_since's"""
+        for batch in archive.segment_batches(self.archive_kind, segment, self.source_columns, batch_size):
+            values = batch.to_pydict()
+            rows = list(zip(*(values[name] for name in self.source_columns)))
+            created = values[self.created_column]
+            changed = [updated or created[i] for i, updated in enumerate(values['updated_date'])]
+            yield rows, changed
+
+
+def schema_fingerprint(schema):
+    return [[field.name, str(field.type)] for field in schema]
+
+
+class SnapshotExporter:
+    """Incremental export of problems, solutions and stakeholders to Parquet (or Arrow IPC) files
+
+    Each run appends one file per table holding the rows changed since the
+    table's watermark, streamed from the database in record batches so memory
+    stays bounded by the batch size. The manifest lists every file in order
+    with its row count and change-time range; it is replaced atomically after
+    the files are complete, so readers only ever see finished files. A row
+    changed again shows up in a later file too, and readers keep its last copy.
+
+    The watermark is rewound by lag_seconds on each run so rows written by
+    transactions that committed after the previous export are not missed; the
+    overlap only produces duplicates that readers drop.
+
+    With an archive, each run also exports the archive segments published
+    since the last one, after the hot rows. Archived rows have left the hot
+    tables, so their archived copy is the last one readers see.
+    """
+
+    def __init__(self, root, tables, export_format='parquet', batch_size=10000, lag_seconds=60, archive=None):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f'format must be one of {EXPORT_FORMATS}')
+        self.root = root
+        self.tables = tables
+        self.format = export_format
+        self.batch_size = batch_size
+        self.lag_seconds = lag_seconds
+        self.archive = archive
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_NAME)
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest):
+        temporary = self.manifest_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+    def export(self, session, full=False, log=print):
+        """Append changed rows for every table; full starts over with a fresh export"""
+        os.makedirs(self.root, exist_ok=True)
+        manifest = None if full else self.load_manifest()
+        if manifest is not None and manifest.get('format') != self.format:
+            raise ValueError(f"Existing export is {manifest.get('format')}; run a full export to switch formats")
+        if manifest is None:
+            manifest = {'version': 1, 'format': self.format, 'tables': {}}
+
+        run = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        for table in self.tables:
+            entry = manifest['tables'].get(table.name)
+            fingerprint = schema_fingerprint(table.schema)
+            if entry is not None and entry['schema'] != fingerprint:
+                raise ValueError(f'The {table.name} schema changed since the last export; run a full export')
+            if entry is None:
+                entry = manifest['tables'][table.name] = {'schema': fingerprint, 'watermark': None, 'rows': 0,
+                                                         'files': []}
+
+            since = None
+            if entry['watermark']:
+                since = datetime.fromisoformat(entry['watermark']) - timedelta(seconds=self.lag_seconds)
+            path = os.path.join(table.name, f'part-{run}.{self.format}')
+            stmt, changed = table.changed_since(since)
+            result = session.execute(stmt.add_columns(changed).execution_options(yield_per=self.batch_size))
+            batches = (([row[:-1] for row in partition], [row[-1] for row in partition])
+                       for partition in result.partitions())
+            written = self._write(table, batches, path)
+            if written is None:
+                log(f'   {table.name}: no changes')
+            else:
+                self._add_file(entry, path, *written)
+                entry['watermark'] = max(written[2].isoformat(), entry['watermark'] or '')
+                log(f'   {table.name}: {written[0]:,} rows to {path}')
+
+            if self.archive is not None and table.archive_kind:
+                self._export_archived(table, entry, run, log)
+
+        if full:
+            self._remove_unlisted(manifest)
+        self._save_manifest(manifest)
+        return manifest
+
+    def _export_archived(self, table, entry, run, log):
+        """Append the archive segments not exported yet as one file"""
+        exported = set(entry.setdefault('archived_segments', []))
+        segments = [segment for segment in self.archive.segments(table.archive_kind) if segment not in exported]
+        if not segments:
+            return
+
+        path = os.path.join(table.name, f'part-{run}-archived.{self.format}')
+        batches = (batch for segment in segments for batch in table.archived_rows(self.archive, segment,
+                                                                                  self.batch_size))
+        written = self._write(table, batches, path, archived=True)
+        if written is not None:
+            self._add_file(entry, path, *written, source='archive')
+            log(f'   {table.name}: {written[0]:,} archived rows to {path}')
+        entry['archived_segments'].extend(segments)
+
+    def _add_file(self, entry, path, rows, low, high, source='database'):
+        entry['files'].append({
+            'path': path,
+            'source': source,
+            'rows': rows,
+            'bytes': os.path.getsize(os.path.join(self.root, path)),
+            'min_updated': low.isoformat(),
+            'max_updated': high.isoformat(),
+            'exported_date': datetime.utcnow().isoformat()
+        })
+        entry['rows'] += rows
+
+    def _write(self, table, batches, path, archived=False):
+        """Stream (rows, change times) batches into one file; returns (rows, earliest change, latest change) or None"""
+        path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        writer = None
+        rows = 0
+        low = high = None
+        try:
+            for batch_rows, changed in batches:
+                if not batch_rows:
+                    continue
+                if writer is None:
+                    writer = (pq.ParquetWriter(temporary, table.schema, compression=COMPRESSION)
+                              if self.format == 'parquet' else pa.ipc.new_file(temporary, table.schema))
+                low = min(low, min(changed)) if low else min(changed)
+                high = max(high, max(changed)) if high else max(changed)
+                batch = table.record_batch(batch_rows, archived)
+                if self.format == 'parquet':
+                    writer.write_batch(batch)
+                else:
+                    writer.write(batch)
+                rows += len(batch_rows)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if writer is None:
+            return None
+        os.replace(temporary, path)
+        return rows, low, high
+
+    def _remove_unlisted(self, manifest):
+        """Delete files a full export superseded"""
+        listed = {os.path.normpath(f['path']) for entry in manifest['tables'].values() for f in entry['files']}
+        for table in self.tables:
+            directory = os.path.join(self.root, table.name)
+            for name in os.listdir(directory) if os.path.isdir(directory) else ():
+                if os.path.normpath(os.path.join(table.name, name)) not in listed:
+                    os.remove(os.path.join(directory, name))
+
+
+def read_export(root, table_name, columns=None, latest=True):
+    """Read an exported table through the manifest with memory-mapped files
+
+    Arrow IPC exports are mapped without copying; Parquet files are mapped
+    and decoded. With latest, only the last exported copy of each id is kept.
+    """
+    with open(os.path.join(root, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    entry = manifest['tables'][table_name]
+
+    tables = []
+    for file in entry['files']:
+        path = os.path.join(root, file['path'])
+        if manifest['format'] == 'arrow':
+            table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+            tables.append(table.select(columns) if columns else table)
+        else:
+            tables.append(pq.read_table(path, columns=columns, memory_map=True))
+    if not tables:
+        return None
+    table = pa.concat_tables(tables)
+
+    if latest and 'id' in table.column_names:
+        # Files are in export order, so the highest row number per id is its latest copy
+        positions = pa.array(range(table.num_rows))
+        last = pa.table({'id': table['id'], 'position': positions}).group_by('id').aggregate([('position', 'max')])
+        keep = last['position_max']
+        table = table.take(pc.take(keep, pc.sort_indices(keep)))
+    return table
+
+
+def export_tables(problem_model, solution_model, stakeholder_model):
+    return [
+        ExportTable('problems', problem_model, 'submitted_date', parse_column='ai_analysis', parse=parse_analysis,
+                    parsed_fields=ANALYSIS_FIELDS, archive_kind='problems'),
+        ExportTable('solutions', solution_model, 'proposed_date', archive_kind='solutions'),
+        ExportTable('stakeholders', stakeholder_model, 'joined_date')
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export problems, solutions and stakeholders for analytics')
+    parser.add_argument('--output', default='exports', help='export directory')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='parquet',
+                        help='parquet (compressed) or arrow (uncompressed IPC, zero-copy reads)')
+    parser.add_argument('--full', action='store_true', help='discard the previous export and start over')
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per record batch')
+    parser.add_argument('--lag-seconds', type=int, default=60, help='overlap with the previous run')
+    args = parser.parse_args(argv)
+
+    from app import app, db, problem_archive, CommunityProblem, Solution, Stakeholder
+    from src.data_ingestion.schema import upgrade_schema
+
+    exporter = SnapshotExporter(args.output, export_tables(CommunityProblem, Solution, Stakeholder), args.format,
+                                args.batch_size, args.lag_seconds, problem_archive)
+    with app.app_context():
+        upgrade_schema(db)
+        manifest = exporter.export(db.session, args.full)
+    total = sum(entry['rows'] for entry in manifest['tables'].values())
+    print(f'Export manifest at {exporter.manifest_path} lists {total:,} rows')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,265 @@
+import argparse
+import csv
+import os
+import re
+import sys
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+from sqlalchemy import event, inspect, select, update
+
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(__file__), 'data', 'gazetteer.csv')
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Stored precision; coarser cells are prefixes of the stored hash (7 chars is ~150m)
+GEOHASH_PRECISION = 7
+
+US_STATES = {
+    'AL': 'Alabama', 'AK': 'Alaska', 'AZ': 'Arizona', 'AR': 'Arkansas', 'CA': 'California',
+    'CO': 'Colorado', 'CT': 'Connecticut', 'DE': 'Delaware', 'DC': 'District of Columbia',
+    'FL': 'Florida', 'GA': 'Georgia', 'HI': 'Hawaii', 'ID': 'Idaho', 'IL': 'Illinois',
+    'IN': 'Indiana', 'IA': 'Iowa', 'KS': 'Kansas', 'KY': 'Kentucky', 'LA': 'Louisiana',
+    'ME': 'Maine', 'MD': 'Maryland', 'MA': 'Massachusetts', 'MI': 'Michigan', 'MN': 'Minnesota',
+    'MS': 'Mississippi', 'MO': 'Missouri', 'MT': 'Montana', 'NE': 'Nebraska', 'NV': 'Nevada',
+    'NH': 'New Hampshire', 'NJ': 'New Jersey', 'NM': 'New Mexico', 'NY': 'New York',
+    'NC': 'North Carolina', 'ND': 'North Dakota', 'OH': 'Ohio', 'OK': 'Oklahoma', 'OR': 'Oregon',
+    'PA': 'Pennsylvania', 'RI': 'Rhode Island', 'SC': 'South Carolina', 'SD': 'South Dakota',
+    'TN': 'Tennessee', 'TX': 'Texas', 'UT': 'Utah', 'VT': 'Vermont', 'VA': 'Virginia',
+    'WA': 'Washington', 'WV': 'West Virginia', 'WI': 'Wisconsin', 'WY': 'Wyoming'
+}
+
+COUNTRY_SUFFIXES = ('usa', 'us', 'united states')
+
+Place = namedtuple('Place', ['place_id', 'name', 'admin1', 'latitude', 'longitude', 'population'])
+
+
+def normalize_location(text):
+    """Lowercased, punctuation-free form used as the lookup and grouping key"""
+    tokens = re.findall(r'[a-z0-9]+', (text or '').lower().replace('&', ' and '))
+    # Postal codes and a trailing country name don't help pick a city
+    tokens = [token for token in tokens if not token.isdigit()]
+    key = ' '.join(tokens)
+    for suffix in COUNTRY_SUFFIXES:
+        if key.endswith(' ' + suffix):
+            key = key[:-len(suffix) - 1]
+            break
+    return key
+
+
+def trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def geohash_encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a coordinate"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        value_range, value = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+class Gazetteer:
+    """Offline place lookup through exact, prefix and trigram indexes over place names and aliases
+
+    Ambiguous names ("Springfield", "Portland") resolve to the most populous
+    match unless a state narrows them down.
+    """
+
+    def __init__(self, places, aliases=None, min_similarity=0.55, min_prefix=4, cache_size=100000):
+        self.places = {place.place_id: place for place in places}
+        self.min_similarity = min_similarity
+        self.min_prefix = min_prefix
+        self.cache_size = cache_size
+        self._cache = {}
+
+        # Every spelling of a place maps to its candidates, most populous first
+        self._exact = {}
+        for place in places:
+            for alias in self._aliases(place, (aliases or {}).get(place.place_id, ())):
+                matches = self._exact.setdefault(normalize_location(alias), [])
+                if place not in matches:
+                    matches.append(place)
+        for matches in self._exact.values():
+            matches.sort(key=lambda p: -p.population)
+
+        # Sorted keys serve prefix lookups; trigram postings serve misspellings
+        self._keys = sorted(self._exact)
+        self._key_trigrams = [len(trigrams(key)) for key in self._keys]
+        self._trigram_index = {}
+        for i, key in enumerate(self._keys):
+            for trigram in trigrams(key):
+                self._trigram_index.setdefault(trigram, []).append(i)
+
+    @classmethod
+    def load(cls, path=None, **kwargs):
+        """Read a gazetteer CSV (place_id, name, admin1, latitude, longitude, population, aliases)"""
+        places = []
+        aliases = {}
+        with open(path or DEFAULT_GAZETTEER, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                place = Place(row['place_id'], row['name'], row['admin1'], float(row['latitude']),
+                              float(row['longitude']), int(row['population'] or 0))
+                places.append(place)
+                aliases[place.place_id] = [alias for alias in (row.get('aliases') or '').split('|') if alias]
+
+        return cls(places, aliases, **kwargs)
+
+    def _aliases(self, place, extra):
+        state = US_STATES.get(place.admin1)
+        for name in (place.name,) + tuple(extra):
+            yield name
+            yield f'{name} {place.admin1}'
+            if state:
+                yield f'{name} {state}'
+
+    def resolve(self, text):
+        """Best matching Place for a free-text location, or None"""
+        key = normalize_location(text)
+        if key in self._cache:
+            return self._cache[key]
+
+        place = self._lookup(key) if key else None
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[key] = place
+        return place
+
+    def _lookup(self, key):
+        matches = self._exact.get(key)
+        if matches:
+            return matches[0]
+
+        if len(key) >= self.min_prefix:
+            prefixed = []
+            i = bisect_left(self._keys, key)
+            while i < len(self._keys) and self._keys[i].startswith(key):
+                prefixed.extend(self._exact[self._keys[i]])
+                i += 1
+            if prefixed:
+                return max(prefixed, key=lambda p: p.population)
+
+        return self._fuzzy(key)
+
+    def _fuzzy(self, key):
+        """Closest key by trigram Jaccard similarity, if it is close enough"""
+        query = trigrams(key)
+        shared = Counter()
+        for trigram in query:
+            for i in self._trigram_index.get(trigram, ()):
+                shared[i] += 1
+
+        best = None
+        best_rank = None
+        for i, common in shared.items():
+            score = common / (len(query) + self._key_trigrams[i] - common)
+            if score < self.min_similarity:
+                continue
+            place = self._exact[self._keys[i]][0]
+            if best_rank is None or (score, place.population) > best_rank:
+                best, best_rank = place, (score, place.population)
+        return best
+
+
+class LocationNormalizer:
+    """Fills the canonical place columns of problems from their free-text location"""
+
+    def __init__(self, gazetteer, precision=GEOHASH_PRECISION):
+        self.gazetteer = gazetteer
+        self.precision = precision
+
+    def fields(self, location):
+        """Column values for one location string"""
+        place = self.gazetteer.resolve(location)
+        if place is None:
+            return {'location_key': normalize_location(location)[:200], 'place_id': None,
+                    'latitude': None, 'longitude': None, 'geohash': None}
+        return {
+            'location_key': normalize_location(location)[:200],
+            'place_id': place.place_id,
+            'latitude': place.latitude,
+            'longitude': place.longitude,
+            'geohash': geohash_encode(place.latitude, place.longitude, self.precision)
+        }
+
+    def apply(self, row):
+        """Normalize a problem row dict in place (for core inserts)"""
+        row.update(self.fields(row['location']))
+        return row
+
+    def listen(self, session, problem_model):
+        """Normalize problems added or relocated through a session (or session factory)"""
+        self.problem_model = problem_model
+        event.listen(session, 'before_flush', self._before_flush)
+
+    def _before_flush(self, session, flush_context, instances):
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, self.problem_model):
+                continue
+            if obj in session.new or inspect(obj).attrs.location.history.has_changes():
+                for attr, value in self.fields(obj.location).items():
+                    setattr(obj, attr, value)
+
+    def backfill(self, session, problem_model, force=False):
+        """Normalize stored problems with one update per distinct location string"""
+        table = problem_model.__table__
+        stmt = select(table.c.location).distinct()
+        if not force:
+            stmt = stmt.where(table.c.location_key.is_(None))
+
+        locations = session.execute(stmt).scalars().all()
+        for location in locations:
+            session.execute(update(table).where(table.c.location == location).values(**self.fields(location)))
+        session.commit()
+        return len(locations)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Normalize problem locations against the offline gazetteer')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subparsers.add_parser('backfill', help='normalize stored problems')
+    backfill_parser.add_argument('--force', action='store_true', help='re-resolve already normalized rows')
+    resolve_parser = subparsers.add_parser('resolve', help='show how a location string resolves')
+    resolve_parser.add_argument('location')
+    args = parser.parse_args(argv)
+
+    from app import app, db, location_normalizer, CommunityProblem
+    from src.data_ingestion.schema import upgrade_schema
+
+    if args.command == 'resolve':
+        fields = location_normalizer.fields(args.location)
+        place = location_normalizer.gazetteer.places.get(fields['place_id'])
+        print(f"{args.location!r} -> {f'{place.name}, {place.admin1}' if place else 'unresolved'} {fields}")
+        return 0 if place else 1
+
+    with app.app_context():
+        upgrade_schema(db)
+        count = location_normalizer.backfill(db.session, CommunityProblem, args.force)
+    print(f'Normalized {count} distinct locations')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import os
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, String, Text
+
+COMPRESSION = 'zstd'
+
+# Arrow types for the SQLAlchemy column types our models use
+ARROW_TYPES = [
+    (Boolean, pa.bool_()),
+    (Integer, pa.int64()),
+    (Float, pa.float64()),
+    (DateTime, pa.timestamp('us')),
+    (Date, pa.date32()),
+    (Text, pa.string()),
+    (String, pa.string())
+]
+
+
+def arrow_type(column_type):
+    for sql_type, arrow in ARROW_TYPES:
+        if isinstance(column_type, sql_type):
+            return arrow
+    raise TypeError(f'No Arrow type for {column_type!r}')
+
+
+def arrow_schema(table, columns=None, extra=()):
+    """Fixed Arrow schema for a table's columns (all of them by default), plus extra fields"""
+    names = columns or [column.name for column in table.columns]
+    return pa.schema([pa.field(name, arrow_type(table.c[name].type)) for name in names] + list(extra))
+
+
+def write_table(table, path, compression=COMPRESSION):
+    """Write a Parquet file under a temporary name and move it into place
+
+    Readers never see a partly written file; the temporary name starts with an
+    underscore so dataset discovery skips it.
+    """
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    temporary = os.path.join(directory, f'_tmp-{name}')
+    pq.write_table(table, temporary, compression=compression)
+    os.replace(temporary, path)
@@ -0,0 +1,24 @@
+from sqlalchemy import inspect, text
+
+
+def upgrade_schema(db):
+    """Create missing tables, then add any columns and indexes the models gained since
+
+    Only additive changes are handled. New columns are added as nullable, so
+    rows that predate them need a backfill.
+    """
+    db.create_all()
+    engine = db.engine
+    preparer = engine.dialect.identifier_preparer
+    existing_tables = inspect(engine)
+
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {column['name'] for column in existing_tables.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} '
+                                      f'ADD COLUMN {preparer.format_column(column)} {column_type}'))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -0,0 +1,333 @@
+import argparse
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert
+
+CATEGORIES = ['Social Division', 'Disinformation', 'Community Safety', 'Infrastructure',
+              'Environment', 'Education', 'Healthcare', 'Economic']
+SEVERITIES = ['Critical', 'High', 'Medium', 'Low']
+SEVERITY_WEIGHTS = [0.07, 0.28, 0.45, 0.20]
+ROLES = ['Government', 'Community Groups', 'Business', 'Education', 'Healthcare', 'Media', 'NGOs']
+ROLE_WEIGHTS = [0.12, 0.30, 0.14, 0.12, 0.08, 0.09, 0.15]
+
+# Free-text spellings are deliberately inconsistent, like real submissions
+LOCATIONS = [
+    'Springfield, IL', 'springfield il', 'Austin, TX', 'Austin TX', 'Portland, OR', 'portland',
+    'Chicago, IL', 'Denver, CO', 'Seattle, WA', 'Boston, MA', 'Atlanta, GA', 'Phoenix, AZ',
+    'Columbus, OH', 'Detroit, MI', 'Nashville, TN', 'Madison, WI', 'Albuquerque, NM',
+    'Sacramento, CA', 'Raleigh, NC', 'Tulsa, OK', 'downtown', 'north side', 'Lincoln, NE',
+    'Boise, ID', 'Richmond, VA', 'Omaha, NE', 'Fresno, CA', 'Spokane, WA', 'Des Moines, IA', 'Dayton, OH'
+]
+
+# Prime, so stepping through it by any stride visits every voter once before repeating
+VOTER_POOL = 100003
+
+SUBJECTS = {
+    'Social Division': ['polarization between neighborhoods', 'tension at council meetings',
+                        'exclusion of newcomers', 'conflict over local policy'],
+    'Disinformation': ['fake news about the school board', 'misinformation on social media',
+                       'rumors about water quality', 'conspiracy posts about elections'],
+    'Community Safety': ['crime near the park', 'unsafe crossings', 'violence after dark',
+                         'poor street lighting'],
+    'Infrastructure': ['potholes on main roads', 'unreliable transportation', 'aging utilities',
+                       'closed facilities'],
+    'Environment': ['pollution in the river', 'illegal waste dumping', 'loss of green space',
+                    'air quality near the highway'],
+    'Education': ['overcrowded school classrooms', 'teacher shortages', 'student absenteeism',
+                  'outdated curriculum'],
+    'Healthcare': ['long hospital wait times', 'no local clinic', 'medical costs for seniors',
+                   'mental health wellness gaps'],
+    'Economic': ['business closures downtown', 'lack of jobs for youth', 'rising living costs',
+                 'income inequality']
+}
+QUALIFIERS = ['urgent', 'serious', 'growing', 'moderate', 'minor', 'persistent', 'significant']
+IMPACTS = ['Residents are worried and local groups are asking for help.',
+           'This affects families, students and small businesses in the area.',
+           'Community members report the situation is getting worse every month.',
+           'Several neighbors raised this at the last town hall meeting.']
+INTERESTS = ['community development', 'social cohesion', 'public policy', 'media literacy',
+             'fact-checking', 'public safety', 'urban planning', 'climate action', 'youth programs',
+             'public health', 'small business', 'education equity', 'digital citizenship',
+             'transportation', 'housing']
+FIRST_NAMES = ['Alex', 'Maria', 'James', 'Priya', 'Chen', 'Fatima', 'Diego', 'Olivia', 'Samuel', 'Aisha']
+LAST_NAMES = ['Johnson', 'Garcia', 'Kim', 'Nguyen', 'Patel', 'Smith', 'Brown', 'Lopez', 'Ali', 'Chen']
+
+
+def _zipf_weights(n, exponent=1.1):
+    """Skewed weights where a few values dominate"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+class SyntheticDataGenerator:
+    """Deterministic generator of realistic problems, solutions, stakeholders and votes"""
+
+    def __init__(self, seed=42, start_date=None, days=730):
+        self.seed = seed
+        self.end_date = datetime(2025, 9, 1)
+        self.start_date = start_date or self.end_date - timedelta(days=days)
+        self.span_seconds = int((self.end_date - self.start_date).total_seconds())
+        self.rng = np.random.default_rng(seed)
+        # Votes draw from their own stream so problems and solutions stay the same for a seed
+        self.vote_rng = np.random.default_rng([seed, 1])
+
+    def problem_batches(self, count, start_id=1, batch_size=50000):
+        """Yield batches of problem rows"""
+        category_weights = _zipf_weights(len(CATEGORIES))
+        location_weights = _zipf_weights(len(LOCATIONS), 0.9)
+
+        for offset in range(0, count, batch_size):
+            n = min(batch_size, count - offset)
+            rng = self.rng
+
+            categories = rng.choice(len(CATEGORIES), size=n, p=category_weights)
+            severities = rng.choice(len(SEVERITIES), size=n, p=SEVERITY_WEIGHTS)
+            locations = rng.choice(len(LOCATIONS), size=n, p=location_weights)
+            subjects = rng.integers(0, 4, size=n)
+            qualifiers = rng.integers(0, len(QUALIFIERS), size=n)
+            impacts = rng.integers(0, len(IMPACTS), size=n)
+            submitted = self._bursty_offsets(n)
+
+            # Older problems are more likely to have been worked on
+            age = 1.0 - submitted / self.span_seconds
+            status_roll = rng.random(n)
+            resolved = status_roll < 0.05 + 0.35 * age
+            in_progress = ~resolved & (status_roll < 0.25 + 0.45 * age)
+
+            rows = []
+            for i in range(n):
+                category = CATEGORIES[categories[i]]
+                subject = SUBJECTS[category][subjects[i]]
+                qualifier = QUALIFIERS[qualifiers[i]]
+                rows.append({
+                    'id': start_id + offset + i,
+                    'title': f'{qualifier.capitalize()} {subject}',
+                    'description': f'There is a {qualifier} problem with {subject}. {IMPACTS[impacts[i]]}',
+                    'category': category,
+                    'severity': SEVERITIES[severities[i]],
+                    'location': LOCATIONS[locations[i]],
+                    'submitted_by': f'{FIRST_NAMES[i % 10]} {LAST_NAMES[(i // 10) % 10]}',
+                    'submitted_date': self.start_date + timedelta(seconds=int(submitted[i])),
+                    'status': 'Resolved' if resolved[i] else 'In Progress' if in_progress[i] else 'Open',
+                    'stakeholder_count': 0,
+                    'solution_count': 0
+                })
+
+            yield rows
+
+    def solution_rows(self, problems, solutions_per_problem, start_id=1):
+        """Build solution rows for a batch of problems with a long-tailed count per problem"""
+        rng = self.rng
+        n = len(problems)
+
+        # Lognormal popularity gives most problems few solutions and a few problems many
+        popularity = rng.lognormal(mean=0.0, sigma=1.2, size=n)
+        expected = popularity / popularity.mean() * solutions_per_problem
+        counts = rng.poisson(expected)
+
+        total = int(counts.sum())
+        delays = rng.exponential(scale=5 * 86400, size=total)
+        votes = np.minimum(np.floor(rng.pareto(1.3, size=total) * 3), 5000).astype(int)
+        proposer = rng.integers(0, 100, size=total)
+
+        rows = []
+        k = 0
+        for problem, count in zip(problems, counts):
+            problem['solution_count'] = int(count)
+            for j in range(count):
+                proposed = min(problem['submitted_date'] + timedelta(seconds=int(delays[k])), self.end_date)
+                rows.append({
+                    'id': start_id + k,
+                    'problem_id': problem['id'],
+                    'title': f'Solution {j + 1} for {problem["title"].lower()}',
+                    'description': 'Bring residents, officials and local organizations together to act on this.',
+                    'proposed_by': f'{FIRST_NAMES[proposer[k] % 10]} {LAST_NAMES[proposer[k] // 10]}',
+                    'proposed_date': proposed,
+                    'votes': int(votes[k]),
+                    'status': 'Proposed'
+                })
+                k += 1
+
+        return rows
+
+    def vote_batches(self, solutions, batch_size=200000):
+        """Yield batches of vote rows, one per counted vote, each solution's from distinct synthetic voters"""
+        votes = np.array([s['votes'] for s in solutions], dtype=np.int64)
+        total = int(votes.sum())
+        if not total:
+            return
+        rng = self.vote_rng
+
+        owners = np.repeat(np.arange(len(solutions)), votes)
+        ranks = np.arange(total) - np.repeat(np.cumsum(votes) - votes, votes)
+        starts = rng.integers(0, VOTER_POOL, size=len(solutions))
+        strides = rng.integers(1, VOTER_POOL, size=len(solutions))
+        voters = (starts[owners] + ranks * strides[owners]) % VOTER_POOL
+        delays = rng.exponential(scale=3 * 86400, size=total)
+
+        for offset in range(0, total, batch_size):
+            rows = []
+            for k in range(offset, min(offset + batch_size, total)):
+                solution = solutions[owners[k]]
+                rows.append({
+                    'solution_id': solution['id'],
+                    'voter': f'synthetic-{voters[k]:06d}',
+                    'voted_date': min(solution['proposed_date'] + timedelta(seconds=int(delays[k])), self.end_date)
+                })
+            yield rows
+
+    def stakeholder_batches(self, count, start_id=1, batch_size=50000):
+        """Yield batches of stakeholder rows"""
+        for offset in range(0, count, batch_size):
+            n = min(batch_size, count - offset)
+            rng = self.rng
+            roles = rng.choice(len(ROLES), size=n, p=ROLE_WEIGHTS)
+            interest_picks = rng.integers(0, len(INTERESTS), size=(n, 3))
+            joined = rng.integers(0, self.span_seconds, size=n)
+
+            rows = []
+            for i in range(n):
+                sid = start_id + offset + i
+                role = ROLES[roles[i]]
+                rows.append({
+                    'id': sid,
+                    'name': f'{FIRST_NAMES[sid % 10]} {LAST_NAMES[(sid // 10) % 10]}',
+                    'email': f'stakeholder{sid}@example.org',
+                    'role': role,
+                    'organization': f'{role} Network {sid % 250}',
+                    'interests': ', '.join(dict.fromkeys(INTERESTS[j] for j in interest_picks[i])),
+                    'joined_date': self.start_date + timedelta(seconds=int(joined[i]))
+                })
+
+            yield rows
+
+    def _bursty_offsets(self, n):
+        """Submission times as a steady background plus short bursts"""
+        rng = self.rng
+        background = rng.random(n) < 0.6
+        offsets = np.empty(n)
+        offsets[background] = rng.random(int(background.sum())) * self.span_seconds
+
+        bursts = int((~background).sum())
+        if bursts:
+            # Bursts last a few days around a handful of incidents
+            centers = rng.random(max(1, self.span_seconds // (30 * 86400))) * self.span_seconds
+            chosen = rng.choice(centers, size=bursts)
+            offsets[~background] = chosen + rng.normal(0, 2 * 86400, size=bursts)
+
+        return np.clip(offsets, 0, self.span_seconds - 1)
+
+
+def load_synthetic_data(db, models, problems=1000, solutions_per_problem=3, stakeholders=100,
+                        seed=42, with_analysis=False, analyzer=None, normalizer=None, ranking=None, batch_size=50000,
+                        log=print):
+    """Bulk-insert a synthetic dataset through core inserts in large transactions
+
+    Core inserts skip the session hooks, so locations are normalized and
+    solutions scored here when a normalizer and ranking are given. With a
+    vote model in models, every seeded vote is recorded for a synthetic voter.
+    """
+    problem_model, solution_model, stakeholder_model = models[:3]
+    vote_model = models[3] if len(models) > 3 else None
+    generator = SyntheticDataGenerator(seed)
+    analysis_cache = {}
+    started = time.perf_counter()
+
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'sqlite':
+            # Durability isn't needed while seeding a throwaway dataset
+            conn.exec_driver_sql('PRAGMA synchronous=OFF')
+            conn.exec_driver_sql('PRAGMA journal_mode=MEMORY')
+
+        next_problem_id = (conn.execute(func.max(problem_model.id).select()).scalar() or 0) + 1
+        next_solution_id = (conn.execute(func.max(solution_model.id).select()).scalar() or 0) + 1
+        next_stakeholder_id = (conn.execute(func.max(stakeholder_model.id).select()).scalar() or 0) + 1
+        conn.commit()
+
+        inserted = {'problems': 0, 'solutions': 0, 'stakeholders': 0, 'votes': 0}
+
+        # One transaction per batch of problems together with their solutions
+        for rows in generator.problem_batches(problems, next_problem_id, batch_size):
+            solutions = generator.solution_rows(rows, solutions_per_problem, next_solution_id)
+            next_solution_id += len(solutions)
+
+            if with_analysis:
+                # Templated text repeats a lot, so analyze each distinct text once, a batch at a time
+                keys = [(row['title'], row['description'], row['category']) for row in rows]
+                missing = [key for key in dict.fromkeys(keys) if key not in analysis_cache]
+                analysis_cache.update(zip(missing, analyzer.analyze_problems(missing)))
+                for row, key in zip(rows, keys):
+                    row['ai_analysis'] = analysis_cache[key]
+
+            if normalizer is not None:
+                for row in rows:
+                    normalizer.apply(row)
+            if ranking is not None:
+                for solution in solutions:
+                    ranking.apply(solution)
+
+            conn.execute(insert(problem_model.__table__), rows)
+            if solutions:
+                conn.execute(insert(solution_model.__table__), solutions)
+                if vote_model is not None:
+                    for votes in generator.vote_batches(solutions):
+                        conn.execute(insert(vote_model.__table__), votes)
+            conn.commit()
+
+            inserted['problems'] += len(rows)
+            inserted['solutions'] += len(solutions)
+            inserted['votes'] += sum(s['votes'] for s in solutions)
+            log(f"   {inserted['problems']:,} problems, {inserted['solutions']:,} solutions "
+                f"({time.perf_counter() - started:.1f}s)")
+
+        for rows in generator.stakeholder_batches(stakeholders, next_stakeholder_id, batch_size):
+            conn.execute(insert(stakeholder_model.__table__), rows)
+            conn.commit()
+            inserted['stakeholders'] += len(rows)
+
+    inserted['seconds'] = round(time.perf_counter() - started, 2)
+    return inserted
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seed the database with a synthetic dataset')
+    parser.add_argument('--problems', type=int, default=1000)
+    parser.add_argument('--solutions-per-problem', type=float, default=3.0)
+    parser.add_argument('--stakeholders', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--with-analysis', action='store_true', help='precompute AI analysis for each problem')
+    args = parser.parse_args(argv)
+
+    from app import (app, db, hot_ranking, location_normalizer, problem_analyzer, problem_archive, timeline_rollup,
+                     CommunityProblem, Solution, SolutionVote, Stakeholder)
+    from src.data_ingestion.schema import upgrade_schema
+
+    with app.app_context():
+        upgrade_schema(db)
+        print(f"Generating {args.problems:,} problems (seed {args.seed})...")
+        result = load_synthetic_data(db, (CommunityProblem, Solution, Stakeholder, SolutionVote),
+                                     problems=args.problems,
+                                     solutions_per_problem=args.solutions_per_problem,
+                                     stakeholders=args.stakeholders,
+                                     seed=args.seed,
+                                     with_analysis=args.with_analysis,
+                                     analyzer=problem_analyzer,
+                                     normalizer=location_normalizer,
+                                     ranking=hot_ranking,
+                                     batch_size=args.batch_size)
+        # Core inserts bypass the ORM hooks that maintain the rollup
+        print("Rebuilding timeline rollup...")
+        timeline_rollup.backfill(db.session, problem_archive)
+
+    print(f"Inserted {result['problems']:,} problems, {result['solutions']:,} solutions, "
+          f"{result['stakeholders']:,} stakeholders and {result['votes']:,} votes "
+          f"in {result['seconds']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,44 @@
 import json
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
+from src.stakeholder.notifications import Notification
+from src.stakeholder.registry import StakeholderRegistry
+
+class FrozenDict(dict):
+    """A dict that refuses changes, so plan parts shared between plans stay intact"""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Engagement plan templates are read-only')
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+def freeze(value):
+    """Deep read-only copy: dicts become FrozenDicts and lists become tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+# Static parts of every plan for one (category, severity), frozen and pre-serialized
+PlanTemplate = namedtuple('PlanTemplate', ['category', 'severity', 'relevant_roles', 'timeline',
+                                           'success_metrics', 'timeline_json', 'success_metrics_json'])
+
+# Role-dependent parts for one category and set of roles present
+RoleParts = namedtuple('RoleParts', ['strategies', 'communication_plan', 'strategies_json', 'communication_plan_json'])
 
 class EngagementManager:
-    def __init__(self):
+    def __init__(self, registry=None, rendered_cache_size=256):
+        self.registry = registry
+        self.rendered_cache_size = rendered_cache_size
+        self._templates = {}
+        self._role_parts = {}
+        self._rendered = OrderedDict()
+        self._rendered_lock = threading.Lock()
         self.engagement_strategies = {
             'Government': {
                 'communication': 'Direct meetings with city officials and policy makers',
@@ -41,65 +76,157 @@ class EngagementManager:
                 'collaboration': 'Program development and resource sharing'
             }
         }
-
-    def generate_engagement_plan(self, problem_category, stakeholders, problem_severity):
-        """Generate a comprehensive engagement plan for a specific problem"""
         
-        # Identify relevant stakeholders for the problem category
-        relevant_stakeholders = self._identify_relevant_stakeholders(problem_category, stakeholders)
-        
-        # Create engagement timeline
-        timeline = self._create_engagement_timeline(problem_severity)
-        
-        # Generate specific strategies for each stakeholder type
-        strategies = {}
-        for stakeholder in relevant_stakeholders:
-            if stakeholder.role in self.engagement_strategies:
-                strategies[stakeholder.role] = self.engagement_strategies[stakeholder.role]
+        self.category_stakeholder_mapping = {
+            'Social Division': ['Government', 'Community Groups', 'Education', 'Media'],
+            'Disinformation': ['Media', 'Education', 'Government', 'NGOs'],
+            'Community Safety': ['Government', 'Community Groups', 'Business', 'NGOs'],
+            'Infrastructure': ['Government', 'Business', 'Community Groups'],
+            'Environment': ['Government', 'NGOs', 'Education', 'Community Groups'],
+            'Education': ['Education', 'Government', 'Community Groups', 'NGOs'],
+            'Healthcare': ['Healthcare', 'Government', 'NGOs', 'Community Groups'],
+            'Economic': ['Business', 'Government', 'Education', 'NGOs']
+        }
         
-        # Create communication plan
-        communication_plan = self._create_communication_plan(problem_category, relevant_stakeholders)
+        self.communication_channels = {
+            'Government': ['Official meetings', 'Public hearings', 'Government websites', 'Press releases'],
+            'Community Groups': ['Community forums', 'Social media', 'Newsletters', 'Local events'],
+            'Business': ['Business meetings', 'Corporate communications', 'Industry publications'],
+            'Education': ['Educational workshops', 'Academic conferences', 'Student organizations'],
+            'Healthcare': ['Health forums', 'Medical conferences', 'Health publications'],
+            'Media': ['Press conferences', 'Media interviews', 'News articles', 'Social media'],
+            'NGOs': ['Advocacy campaigns', 'Community outreach', 'Volunteer networks']
+        }
+
+    def generate_engagement_plan(self, problem_category, stakeholders=None, problem_severity='Medium'):
+        """Generate a comprehensive engagement plan for a specific problem
         
-        # Generate success metrics
-        success_metrics = self._define_success_metrics(problem_category, problem_severity)
+        stakeholders may be a StakeholderRegistry (the manager's own by default)
+        or a plain list of stakeholders.
+        """
+        template, role_parts, relevant_stakeholders = self._assemble(problem_category, stakeholders, problem_severity)
         
+        # Timeline, strategies, channels, messages and metrics are shared read-only parts
         engagement_plan = {
             'problem_category': problem_category,
             'severity': problem_severity,
-            'relevant_stakeholders': [
-                {
-                    'name': s.name,
-                    'role': s.role,
-                    'organization': s.organization,
-                    'contact': s.email
-                } for s in relevant_stakeholders
-            ],
-            'timeline': timeline,
-            'strategies': strategies,
-            'communication_plan': communication_plan,
-            'success_metrics': success_metrics,
+            'relevant_stakeholders': self._stakeholder_contacts(relevant_stakeholders),
+            'timeline': template.timeline,
+            'strategies': role_parts.strategies,
+            'communication_plan': role_parts.communication_plan,
+            'success_metrics': template.success_metrics,
             'created_date': datetime.now().isoformat()
         }
         
         return engagement_plan
 
+    def render_plan_json(self, problem_category, problem_severity, registry=None):
+        """Engagement plan as JSON, cached per (category, severity, registry version)
+        
+        Only the stakeholder list is serialized per render; the static parts are
+        spliced in from their pre-serialized form.
+        """
+        registry = registry or self.registry
+        key = (problem_category, problem_severity, registry.version)
+        with self._rendered_lock:
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+                return cached
+        
+        template, role_parts, relevant_stakeholders = self._assemble(problem_category, registry, problem_severity)
+        plan_json = (
+            '{"problem_category": ' + json.dumps(problem_category) +
+            ', "severity": ' + json.dumps(problem_severity) +
+            ', "relevant_stakeholders": ' + json.dumps(self._stakeholder_contacts(relevant_stakeholders)) +
+            ', "timeline": ' + template.timeline_json +
+            ', "strategies": ' + role_parts.strategies_json +
+            ', "communication_plan": ' + role_parts.communication_plan_json +
+            ', "success_metrics": ' + template.success_metrics_json +
+            ', "created_date": ' + json.dumps(datetime.now().isoformat()) + '}'
+        )
+        
+        with self._rendered_lock:
+            self._rendered[key] = plan_json
+            # Entries for older registry versions are never read again and age out
+            while len(self._rendered) > self.rendered_cache_size:
+                self._rendered.popitem(last=False)
+        return plan_json
+
+    def plan_template(self, problem_category, problem_severity):
+        """Frozen static plan parts for a category and severity, built once"""
+        key = (problem_category, problem_severity)
+        template = self._templates.get(key)
+        if template is None:
+            timeline = freeze(self._create_engagement_timeline(problem_severity))
+            success_metrics = freeze(self._define_success_metrics(problem_category, problem_severity))
+            template = PlanTemplate(
+                category=problem_category,
+                severity=problem_severity,
+                relevant_roles=tuple(self.category_stakeholder_mapping.get(problem_category, [])),
+                timeline=timeline,
+                success_metrics=success_metrics,
+                timeline_json=json.dumps(timeline),
+                success_metrics_json=json.dumps(success_metrics)
+            )
+            self._templates[key] = template
+        return template
+
+    def _assemble(self, problem_category, stakeholders, problem_severity):
+        if stakeholders is None:
+            stakeholders = self.registry
+        template = self.plan_template(problem_category, problem_severity)
+        
+        # Identify relevant stakeholders for the problem category
+        relevant_stakeholders = self._identify_relevant_stakeholders(problem_category, stakeholders)
+        
+        # Work per role present rather than per stakeholder
+        if isinstance(stakeholders, StakeholderRegistry):
+            present_roles = stakeholders.roles()
+        else:
+            present_roles = {s.role for s in relevant_stakeholders}
+        matched_roles = tuple(role for role in template.relevant_roles if role in present_roles)
+        
+        return template, self._parts_for_roles(problem_category, matched_roles), relevant_stakeholders
+
+    def _parts_for_roles(self, problem_category, roles):
+        """Frozen strategies and communication plan for the roles involved, built once per role set"""
+        key = (problem_category, roles)
+        parts = self._role_parts.get(key)
+        if parts is None:
+            # Generate specific strategies for each stakeholder type
+            strategies = freeze({role: self.engagement_strategies[role] for role in roles
+                                 if role in self.engagement_strategies})
+            
+            # Create communication plan
+            communication_plan = freeze(self._create_communication_plan(problem_category, roles))
+            
+            parts = RoleParts(strategies, communication_plan, json.dumps(strategies), json.dumps(communication_plan))
+            self._role_parts[key] = parts
+        return parts
+
+    def _stakeholder_contacts(self, stakeholders):
+        return [
+            {
+                'name': s.name,
+                'role': s.role,
+                'organization': s.organization,
+                'contact': s.email
+            } for s in stakeholders
+        ]
+
     def _identify_relevant_stakeholders(self, problem_category, all_stakeholders):
         """Identify which stakeholders are most relevant for a specific problem category"""
-        category_stakeholder_mapping = {
-            'Social Division': ['Government', 'Community Groups', 'Education', 'Media'],
-            'Disinformation': ['Media', 'Education', 'Government', 'NGOs'],
-            'Community Safety': ['Government', 'Community Groups', 'Business', 'NGOs'],
-            'Infrastructure': ['Government', 'Business', 'Community Groups'],
-            'Environment': ['Government', 'NGOs', 'Education', 'Community Groups'],
-            'Education': ['Education', 'Government', 'Community Groups', 'NGOs'],
-            'Healthcare': ['Healthcare', 'Government', 'NGOs', 'Community Groups'],
-            'Economic': ['Business', 'Government', 'Education', 'NGOs']
-        }
+        relevant_roles = self.category_stakeholder_mapping.get(problem_category, [])
         
-        relevant_roles = category_stakeholder_mapping.get(problem_category, [])
+        # The registry answers from its role index without touching other roles
+        if isinstance(all_stakeholders, StakeholderRegistry):
+            return all_stakeholders.by_roles(relevant_roles)
+        
+        relevant_role_set = set(relevant_roles)
         relevant_stakeholders = [
             s for s in all_stakeholders 
-            if s.role in relevant_roles
+            if s.role in relevant_role_set
         ]
         
         return relevant_stakeholders
@@ -155,18 +282,8 @@ class EngagementManager:
         
         return base_timeline
 
-    def _create_communication_plan(self, problem_category, stakeholders):
-        """Create a communication plan for stakeholder engagement"""
-        
-        communication_channels = {
-            'Government': ['Official meetings', 'Public hearings', 'Government websites', 'Press releases'],
-            'Community Groups': ['Community forums', 'Social media', 'Newsletters', 'Local events'],
-            'Business': ['Business meetings', 'Corporate communications', 'Industry publications'],
-            'Education': ['Educational workshops', 'Academic conferences', 'Student organizations'],
-            'Healthcare': ['Health forums', 'Medical conferences', 'Health publications'],
-            'Media': ['Press conferences', 'Media interviews', 'News articles', 'Social media'],
-            'NGOs': ['Advocacy campaigns', 'Community outreach', 'Volunteer networks']
-        }
+    def _create_communication_plan(self, problem_category, roles):
+        """Create a communication plan for the stakeholder roles involved"""
         
         plan = {
             'primary_channels': [],
@@ -175,15 +292,16 @@ class EngagementManager:
             'key_messages': self._generate_key_messages(problem_category)
         }
         
-        # Assign communication channels based on stakeholder types
-        for stakeholder in stakeholders:
-            if stakeholder.role in communication_channels:
-                plan['primary_channels'].extend(communication_channels[stakeholder.role][:2])
-                plan['secondary_channels'].extend(communication_channels[stakeholder.role][2:])
+        # Assign communication channels once per stakeholder type, keeping first-seen order
+        primary = {}
+        secondary = {}
+        for role in roles:
+            channels = self.communication_channels.get(role, [])
+            primary.update(dict.fromkeys(channels[:2]))
+            secondary.update(dict.fromkeys(channels[2:]))
         
-        # Remove duplicates
-        plan['primary_channels'] = list(set(plan['primary_channels']))
-        plan['secondary_channels'] = list(set(plan['secondary_channels']))
+        plan['primary_channels'] = list(primary)
+        plan['secondary_channels'] = list(secondary)
         
         return plan
 
@@ -274,9 +392,59 @@ class EngagementManager:
         
         return base_metrics
 
+    def surge_response(self, problem_category):
+        """Rapid-response brief for a surge of submissions in a category"""
+        template = self.plan_template(problem_category, 'Critical')
+        return {
+            'roles': list(template.relevant_roles),
+            'first_contact': {role: self.engagement_strategies[role]['communication']
+                              for role in template.relevant_roles if role in self.engagement_strategies},
+            'immediate_actions': list(template.timeline['immediate']['actions'])
+        }
+
+    def notification_messages(self, problem, stakeholders):
+        """Initial stakeholder notification for a problem: an email per stakeholder and a webhook per role"""
+        
+        roles = self.category_stakeholder_mapping.get(problem['category'], [])
+        subject = f"[{problem['severity']}] {problem['title']}"
+        dedup_key = f"problem:{problem['id']}"
+        
+        messages = []
+        per_role = defaultdict(int)
+        for s in stakeholders:
+            if s.role not in roles or not s.email:
+                continue
+            per_role[s.role] += 1
+            strategy = self.engagement_strategies.get(s.role, {})
+            body = (f"A {problem['severity'].lower()} {problem['category']} problem was reported in "
+                    f"{problem['location']}:\n{problem['description']}\n\n"
+                    f"Suggested first step for {s.role}: {strategy.get('communication', 'review the problem')}.\n"
+                    f"/problem/{problem['id']}")
+            messages.append(Notification('email', s.email, subject, body, dedup_key))
+        
+        for role, count in per_role.items():
+            body = json.dumps({'problem_id': problem['id'], 'role': role, 'stakeholders_notified': count})
+            messages.append(Notification('webhook', role, subject, body, dedup_key))
+        
+        return messages
+
     def track_engagement_progress(self, engagement_plan, current_activities):
         """Track progress of stakeholder engagement activities"""
         
+        # One pass over the activities rather than one per phase
+        completed = defaultdict(int)
+        for activity in current_activities:
+            if activity.get('completed', False):
+                completed[activity.get('phase')] += 1
+        
+        return self.progress_report(
+            (phase, completed[phase], len(details['actions']))
+            for phase, details in engagement_plan['timeline'].items()
+        )
+
+    def progress_report(self, phase_counts):
+        """Progress report from (phase, completed, total) counts, in timeline order"""
+        
         progress_report = {
             'timeline_progress': {},
             'stakeholder_participation': {},
@@ -284,10 +452,7 @@ class EngagementManager:
             'overall_progress': 0
         }
         
-        # Calculate timeline progress
-        for phase, details in engagement_plan['timeline'].items():
-            completed_actions = len([a for a in current_activities if a.get('phase') == phase and a.get('completed', False)])
-            total_actions = len(details['actions'])
+        for phase, completed_actions, total_actions in phase_counts:
             progress_report['timeline_progress'][phase] = {
                 'completed': completed_actions,
                 'total': total_actions,
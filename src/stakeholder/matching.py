@@ -0,0 +1,317 @@
+import threading
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sqlalchemy import select
+
+N_FEATURES = 2 ** 20
+
+
+def problem_text(title, description, category):
+    return f'{title or ""} {description or ""} {category or ""}'
+
+
+def stakeholder_text(interests, organization):
+    return f'{interests or ""} {organization or ""}'
+
+
+class _VectorIndex:
+    """One sparse row per item, with cheap appends and removals
+
+    New rows go to a small delta block and removed rows are masked out; both
+    are folded into the base matrix once the delta grows past a fraction of it.
+    """
+
+    def __init__(self, n_features, compact_ratio=0.1, compact_min=5000):
+        self.n_features = n_features
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self._base = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self._base_ids = np.empty(0, dtype=np.int64)
+        self._base_alive = np.empty(0, dtype=bool)
+        self._delta_rows = []
+        self._delta_ids = []
+        self._delta_alive = []
+        self._delta = None
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, item_id):
+        return item_id in self._positions
+
+    def ids(self):
+        return list(self._positions)
+
+    def set_all(self, ids, matrix):
+        self._base = matrix.tocsr()
+        self._base_ids = np.asarray(ids, dtype=np.int64)
+        self._base_alive = np.ones(len(ids), dtype=bool)
+        self._delta_rows, self._delta_ids, self._delta_alive, self._delta = [], [], [], None
+        self._positions = {int(item_id): ('base', i) for i, item_id in enumerate(self._base_ids)}
+
+    def add(self, ids, matrix):
+        """Insert or replace rows"""
+        matrix = matrix.tocsr()
+        for i, item_id in enumerate(ids):
+            self.remove(item_id)
+            self._positions[item_id] = ('delta', len(self._delta_ids))
+            self._delta_ids.append(item_id)
+            self._delta_rows.append(matrix[i])
+            self._delta_alive.append(True)
+        self._delta = None
+
+        if len(self._delta_ids) > max(self.compact_min, self.compact_ratio * len(self._base_ids)):
+            self.compact()
+
+    def remove(self, item_id):
+        position = self._positions.pop(item_id, None)
+        if position is None:
+            return False
+        block, i = position
+        if block == 'base':
+            self._base_alive[i] = False
+        else:
+            self._delta_alive[i] = False
+        return True
+
+    def compact(self):
+        """Fold the delta block into the base and drop removed rows"""
+        blocks = [self._base[self._base_alive]]
+        ids = [self._base_ids[self._base_alive]]
+        if self._delta_rows:
+            alive = np.array(self._delta_alive, dtype=bool)
+            blocks.append(self._delta_matrix()[alive])
+            ids.append(np.array(self._delta_ids, dtype=np.int64)[alive])
+        self.set_all(np.concatenate(ids), sparse.vstack(blocks, format='csr'))
+
+    def _delta_matrix(self):
+        if self._delta is None:
+            self._delta = sparse.vstack(self._delta_rows, format='csr') if self._delta_rows else None
+        return self._delta
+
+    def rows(self, ids):
+        """Matrix of the given items' vectors, in order"""
+        base_rows = []
+        delta_rows = []
+        order = []
+        for item_id in ids:
+            block, i = self._positions[item_id]
+            if block == 'base':
+                order.append((0, len(base_rows)))
+                base_rows.append(i)
+            else:
+                order.append((1, len(delta_rows)))
+                delta_rows.append(i)
+
+        parts = [self._base[base_rows], self._delta_matrix()[delta_rows] if delta_rows else
+                 sparse.csr_matrix((0, self.n_features), dtype=np.float32)]
+        stacked = sparse.vstack(parts, format='csr')
+        offset = len(base_rows)
+        return stacked[[i if block == 0 else offset + i for block, i in order]]
+
+    def top_k(self, query, k):
+        """Best k (id, score) pairs per query row, by dot product of normalized vectors"""
+        candidates = [[] for _ in range(query.shape[0])]
+        blocks = [(self._base, self._base_ids, self._base_alive)]
+        if self._delta_rows:
+            blocks.append((self._delta_matrix(), np.array(self._delta_ids, dtype=np.int64),
+                           np.array(self._delta_alive, dtype=bool)))
+
+        for matrix, ids, alive in blocks:
+            if matrix.shape[0] == 0:
+                continue
+            scores = (query @ matrix.T).tocsr()
+            for row in range(scores.shape[0]):
+                start, end = scores.indptr[row], scores.indptr[row + 1]
+                data = scores.data[start:end]
+                columns = scores.indices[start:end]
+                keep = alive[columns]
+                data, columns = data[keep], columns[keep]
+                if len(data) > k:
+                    best = np.argpartition(-data, k - 1)[:k]
+                    data, columns = data[best], columns[best]
+                candidates[row].extend(zip(ids[columns].tolist(), data.tolist()))
+
+        results = []
+        for matches in candidates:
+            matches.sort(key=lambda m: -m[1])
+            results.append([(item_id, round(score, 4)) for item_id, score in matches[:k] if score > 0])
+        return results
+
+
+class _MatchCache:
+    """Cached top-k lists per source item, with a reverse index of which lists name each target"""
+
+    def __init__(self, k, max_entries):
+        self.k = k
+        self.max_entries = max_entries
+        self.entries = {}
+        self._listed = {}
+
+    def get(self, source_id):
+        return self.entries.get(source_id)
+
+    def put(self, source_id, matches):
+        self.drop(source_id)
+        self.entries[source_id] = matches
+        for target_id, _ in matches:
+            self._listed.setdefault(target_id, set()).add(source_id)
+        while len(self.entries) > self.max_entries:
+            self.drop(next(iter(self.entries)))
+
+    def drop(self, source_id):
+        matches = self.entries.pop(source_id, None)
+        for target_id, _ in matches or ():
+            listed = self._listed.get(target_id)
+            if listed is not None:
+                listed.discard(source_id)
+                if not listed:
+                    del self._listed[target_id]
+
+    def drop_listing(self, target_id):
+        """Forget every list that names a target whose score is no longer valid"""
+        for source_id in list(self._listed.get(target_id, ())):
+            self.drop(source_id)
+
+    def merge(self, source_id, candidates):
+        """Fold newly scored targets into a cached list, keeping the best k"""
+        current = self.entries.get(source_id)
+        if current is None:
+            return
+        merged = sorted(current + candidates, key=lambda m: -m[1])[:self.k]
+        if merged != current:
+            self.put(source_id, merged)
+
+
+class InterestMatcher:
+    """Top-k stakeholder/problem matches by cosine similarity of hashed term vectors
+
+    Stakeholder interests and problem text are hashed into sparse vectors, so
+    either side can change without refitting a vocabulary, and scored with
+    batched sparse matrix products. Top-k lists are cached per item and patched
+    in place as stakeholders and problems are added, changed or removed.
+    """
+
+    def __init__(self, n_features=N_FEATURES, cache_k=50, batch_size=128, max_cached=100000):
+        self.vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2), stop_words='english',
+                                            alternate_sign=False, norm='l2', dtype=np.float32)
+        self.problems = _VectorIndex(n_features)
+        self.stakeholders = _VectorIndex(n_features)
+        self.cache_k = cache_k
+        self.batch_size = batch_size
+        self._problem_matches = _MatchCache(cache_k, max_cached)
+        self._stakeholder_matches = _MatchCache(cache_k, max_cached)
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def load(self, session, problem_model, stakeholder_model, chunk_size=50000):
+        """Vectorize every problem and stakeholder, streaming rows in chunks"""
+        problem = problem_model.__table__
+        stakeholder = stakeholder_model.__table__
+
+        problem_ids, problem_matrix = self._vectorize_stream(session, select(
+            problem.c.id, problem.c.title, problem.c.description, problem.c.category
+        ), lambda row: problem_text(row[1], row[2], row[3]), chunk_size)
+        stakeholder_ids, stakeholder_matrix = self._vectorize_stream(session, select(
+            stakeholder.c.id, stakeholder.c.interests, stakeholder.c.organization
+        ), lambda row: stakeholder_text(row[1], row[2]), chunk_size)
+
+        with self._lock:
+            self.problems.set_all(problem_ids, problem_matrix)
+            self.stakeholders.set_all(stakeholder_ids, stakeholder_matrix)
+            self._problem_matches = _MatchCache(self.cache_k, self._problem_matches.max_entries)
+            self._stakeholder_matches = _MatchCache(self.cache_k, self._stakeholder_matches.max_entries)
+            self.loaded = True
+
+    def _vectorize_stream(self, session, stmt, to_text, chunk_size):
+        ids = []
+        blocks = []
+        result = session.execute(stmt.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            ids.extend(row[0] for row in rows)
+            blocks.append(self.vectorizer.transform([to_text(row) for row in rows]))
+        if not blocks:
+            return ids, sparse.csr_matrix((0, self.vectorizer.n_features), dtype=np.float32)
+        return ids, sparse.vstack(blocks, format='csr')
+
+    def update_problems(self, problems):
+        """Add or re-vectorize problems, given as (id, title, description, category) tuples"""
+        problems = list(problems)
+        if problems:
+            matrix = self.vectorizer.transform([problem_text(*p[1:]) for p in problems])
+            self._update([p[0] for p in problems], matrix, self.problems,
+                         self._problem_matches, self._stakeholder_matches)
+
+    def update_stakeholders(self, stakeholders):
+        """Add or re-vectorize stakeholders, given as (id, interests, organization) tuples"""
+        stakeholders = list(stakeholders)
+        if stakeholders:
+            matrix = self.vectorizer.transform([stakeholder_text(*s[1:]) for s in stakeholders])
+            self._update([s[0] for s in stakeholders], matrix, self.stakeholders,
+                         self._stakeholder_matches, self._problem_matches)
+
+    def remove_problem(self, problem_id):
+        with self._lock:
+            self.problems.remove(problem_id)
+            self._problem_matches.drop(problem_id)
+            self._stakeholder_matches.drop_listing(problem_id)
+
+    def remove_stakeholder(self, stakeholder_id):
+        with self._lock:
+            self.stakeholders.remove(stakeholder_id)
+            self._stakeholder_matches.drop(stakeholder_id)
+            self._problem_matches.drop_listing(stakeholder_id)
+
+    def _update(self, ids, matrix, index, own_cache, other_cache):
+        with self._lock:
+            for item_id in ids:
+                own_cache.drop(item_id)
+                # Lists that scored the old text are stale; new items can only add to the others
+                if item_id in index:
+                    other_cache.drop_listing(item_id)
+            index.add(ids, matrix)
+
+            # Score the changed items against every cached list on the other side in one product
+            cached = list(other_cache.entries)
+            if cached:
+                other_index = self.stakeholders if index is self.problems else self.problems
+                cached = [source_id for source_id in cached if source_id in other_index]
+                scores = (other_index.rows(cached) @ matrix.T).tocoo()
+                candidates = {}
+                for row, column, score in zip(scores.row, scores.col, scores.data):
+                    candidates.setdefault(cached[row], []).append((ids[column], round(float(score), 4)))
+                for source_id, new_matches in candidates.items():
+                    other_cache.merge(source_id, new_matches)
+
+    def stakeholders_for_problem(self, problem_id, k=10):
+        return self.stakeholders_for_problems([problem_id], k).get(problem_id)
+
+    def problems_for_stakeholder(self, stakeholder_id, k=10):
+        return self.problems_for_stakeholders([stakeholder_id], k).get(stakeholder_id)
+
+    def stakeholders_for_problems(self, problem_ids, k=10):
+        """Top-k stakeholders for each known problem id, computed in batches"""
+        return self._matches(problem_ids, k, self.problems, self.stakeholders, self._problem_matches)
+
+    def problems_for_stakeholders(self, stakeholder_ids, k=10):
+        """Top-k problems for each known stakeholder id, computed in batches"""
+        return self._matches(stakeholder_ids, k, self.stakeholders, self.problems, self._stakeholder_matches)
+
+    def _matches(self, ids, k, source, target, cache):
+        k = min(k, self.cache_k)
+        with self._lock:
+            missing = [item_id for item_id in dict.fromkeys(ids) if item_id in source and cache.get(item_id) is None]
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                for item_id, matches in zip(batch, target.top_k(source.rows(batch), self.cache_k)):
+                    cache.put(item_id, matches)
+
+            results = {}
+            for item_id in ids:
+                matches = cache.get(item_id)
+                if matches is not None:
+                    results[item_id] = matches[:k]
+            return results
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import logging
+import random
+import smtplib
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+# One message for one recipient; dedup_key identifies repeats (e.g. the same problem twice)
+Notification = namedtuple('Notification', ['channel', 'recipient', 'subject', 'body', 'dedup_key'])
+
+# Everything queued for one (channel, recipient) during a batch window, sent as one delivery
+Delivery = namedtuple('Delivery', ['channel', 'recipient', 'subject', 'body', 'count'])
+
+
+def digest(channel, recipient, notifications):
+    """Combine a recipient's batched notifications into one delivery"""
+    if len(notifications) == 1:
+        n = notifications[0]
+        return Delivery(channel, recipient, n.subject, n.body, 1)
+    subject = f'{len(notifications)} community problems need your attention'
+    body = '\n\n'.join(f'{n.subject}\n{n.body}' for n in notifications)
+    return Delivery(channel, recipient, subject, body, len(notifications))
+
+
+class OutboxTransport:
+    """Local stand-in for SMTP and webhooks
+
+    Deliveries are kept in memory (and appended to a JSON lines file if a path
+    is given) instead of leaving the machine. fail_rate makes a share of sends
+    fail, to exercise retries.
+    """
+
+    def __init__(self, path=None, fail_rate=0.0, latency=0.0, keep=10000):
+        self.path = path
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.sent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def send(self, deliveries):
+        """Send deliveries, returning the ones that failed"""
+        if self.latency:
+            time.sleep(self.latency)
+        failed, sent = [], []
+        for d in deliveries:
+            (failed if self.fail_rate and random.random() < self.fail_rate else sent).append(d)
+
+        with self._lock:
+            self.sent.extend(sent)
+            if self.path and sent:
+                with open(self.path, 'a') as f:
+                    for d in sent:
+                        f.write(json.dumps(d._asdict()) + '\n')
+        return failed
+
+
+class SmtpTransport:
+    """Email deliveries over one SMTP connection per batch"""
+
+    def __init__(self, host, port=25, sender='notifications@localhost', timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, deliveries):
+        failed = []
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            for d in deliveries:
+                message = EmailMessage()
+                message['From'] = self.sender
+                message['To'] = d.recipient
+                message['Subject'] = d.subject
+                message.set_content(d.body)
+                try:
+                    smtp.send_message(message)
+                except smtplib.SMTPException:
+                    failed.append(d)
+        return failed
+
+
+class WebhookTransport:
+    """Deliveries POSTed to a webhook as one JSON array per batch"""
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, deliveries):
+        body = json.dumps([d._asdict() for d in deliveries]).encode()
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            if not 200 <= response.status < 300:
+                raise OSError(f'Webhook returned {response.status}')
+        return []
+
+
+class NotificationDispatcher:
+    """Fans notifications out to stakeholders without blocking the caller
+
+    submit() hands a job to an asyncio loop on a background thread and returns
+    immediately. The loop expands each job into notifications with compose(),
+    drops repeats of the same (channel, recipient, dedup_key) within
+    dedup_seconds, collects what is left per recipient for batch_seconds and
+    sends the resulting deliveries in chunks through the channel's transport,
+    with at most `concurrency` sends in flight. Failed deliveries are retried
+    with exponential backoff and jitter up to max_attempts.
+    """
+
+    def __init__(self, compose, transports, concurrency=4, batch_seconds=2.0, send_batch_size=100,
+                 dedup_seconds=3600, max_attempts=5, backoff_seconds=1.0, max_queued_jobs=10000):
+        self.compose = compose
+        self.transports = transports
+        self.concurrency = concurrency
+        self.batch_seconds = batch_seconds
+        self.send_batch_size = send_batch_size
+        self.dedup_seconds = dedup_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_queued_jobs = max_queued_jobs
+        self.counts = {'jobs': 0, 'dropped_jobs': 0, 'notifications': 0, 'duplicates': 0,
+                       'deliveries': 0, 'sent': 0, 'retries': 0, 'failed': 0}
+        self.dead_letters = deque(maxlen=1000)
+        self._seen = OrderedDict()
+        self._batches = {}
+        self._flush_handle = None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._loop = None
+        self._tasks = set()
+        self._started = threading.Lock()
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._started:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency + 1,
+                                                             thread_name_prefix='notify'))
+                thread = threading.Thread(target=loop.run_forever, name='notification-dispatcher', daemon=True)
+                thread.start()
+                self._loop = loop
+
+    def _track(self, change):
+        with self._pending_lock:
+            self._pending += change
+
+    def submit(self, job):
+        """Queue a job for compose(); never waits on delivery"""
+        self._ensure_started()
+        if self._pending >= self.max_queued_jobs:
+            self.counts['dropped_jobs'] += 1
+            logger.warning('Notification queue full, dropping job')
+            return False
+        self._track(1)
+        self._loop.call_soon_threadsafe(self._accept, job)
+        return True
+
+    def _spawn(self, coroutine):
+        # The loop only keeps weak references to tasks
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _accept(self, job):
+        self.counts['jobs'] += 1
+        self._spawn(self._expand(job))
+
+    async def _expand(self, job):
+        try:
+            # compose may query the database, so it runs off the loop
+            notifications = await self._loop.run_in_executor(None, self.compose, job)
+            now = time.monotonic()
+            self._expire(now)
+            for i, n in enumerate(notifications):
+                self.counts['notifications'] += 1
+                key = (n.channel, n.recipient, n.dedup_key)
+                if key in self._seen:
+                    self.counts['duplicates'] += 1
+                    continue
+                self._seen[key] = now + self.dedup_seconds
+                self._batches.setdefault((n.channel, n.recipient), []).append(n)
+                if i % 1000 == 999:
+                    await asyncio.sleep(0)
+
+            if self._batches and self._flush_handle is None:
+                self._track(1)
+                self._flush_handle = self._loop.call_later(self.batch_seconds, self._flush)
+        except Exception:
+            logger.exception('Could not compose notifications')
+        finally:
+            self._track(-1)
+
+    def _expire(self, now):
+        while self._seen:
+            key, expires = next(iter(self._seen.items()))
+            if expires > now:
+                break
+            del self._seen[key]
+
+    def _flush(self):
+        batches, self._batches, self._flush_handle = self._batches, {}, None
+        by_channel = {}
+        for (channel, recipient), notifications in batches.items():
+            by_channel.setdefault(channel, []).append(digest(channel, recipient, notifications))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        for channel, deliveries in by_channel.items():
+            self.counts['deliveries'] += len(deliveries)
+            for start in range(0, len(deliveries), self.send_batch_size):
+                self._track(1)
+                self._spawn(self._send(channel, deliveries[start:start + self.send_batch_size], semaphore))
+        self._track(-1)
+
+    async def _send(self, channel, deliveries, semaphore):
+        transport = self.transports.get(channel)
+        try:
+            if transport is None:
+                logger.warning('No transport for channel %s', channel)
+                self._give_up(deliveries)
+                return
+
+            for attempt in range(1, self.max_attempts + 1):
+                async with semaphore:
+                    try:
+                        failed = await self._loop.run_in_executor(None, transport.send, deliveries)
+                    except Exception as e:
+                        logger.warning('Sending %d %s deliveries failed: %s', len(deliveries), channel, e)
+                        failed = deliveries
+                self.counts['sent'] += len(deliveries) - len(failed)
+                if not failed:
+                    return
+                if attempt == self.max_attempts:
+                    self._give_up(failed)
+                    return
+
+                self.counts['retries'] += len(failed)
+                deliveries = failed
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        finally:
+            self._track(-1)
+
+    def _give_up(self, deliveries):
+        self.counts['failed'] += len(deliveries)
+        self.dead_letters.extend(deliveries)
+
+    def stats(self):
+        return dict(self.counts, pending=self._pending, batched=len(self._batches))
+
+    def drain(self, timeout=60):
+        """Wait until everything submitted so far has been sent or given up on"""
+        deadline = time.monotonic() + timeout
+        while self._loop is not None and self._pending:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
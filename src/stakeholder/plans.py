@@ -0,0 +1,207 @@
+import argparse
+import hashlib
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, select, update
+
+# Stakeholders named in a stored plan; the rest are reachable through their roles
+PLAN_STAKEHOLDERS = 20
+
+OPEN_STATUSES = ('Open', 'In Progress')
+
+
+class PlanBuilder:
+    """Builds per-problem engagement plans from one stakeholder snapshot
+
+    A problem's plan names the stakeholders in its category's roles whose
+    interests best match the problem, topped up in join order when there are
+    too few matches. The inputs hash covers category, severity and those
+    stakeholders, so a stored plan only needs regenerating when it changes.
+    """
+
+    def __init__(self, manager, registry, matcher, limit=PLAN_STAKEHOLDERS):
+        self.manager = manager
+        self.registry = registry
+        self.matcher = matcher
+        self.limit = limit
+        self._fallbacks = {}
+        self._fallbacks_version = None
+
+    def stakeholders_for(self, problems):
+        """Chosen stakeholders for (problem_id, category) pairs, matched in one batch"""
+        matches = self.matcher.stakeholders_for_problems([problem_id for problem_id, _ in problems],
+                                                         self.matcher.cache_k)
+        chosen = {}
+        for problem_id, category in problems:
+            roles = set(self.manager.category_stakeholder_mapping.get(category, []))
+            picked = {}
+            for stakeholder_id, _ in matches.get(problem_id, ()):
+                entry = self.registry.get(stakeholder_id)
+                if entry is not None and entry.role in roles:
+                    picked[entry.id] = entry
+                    if len(picked) == self.limit:
+                        break
+            for entry in self._fallback(category):
+                if len(picked) >= self.limit:
+                    break
+                picked.setdefault(entry.id, entry)
+            chosen[problem_id] = list(picked.values())
+        return chosen
+
+    def _fallback(self, category):
+        if self._fallbacks_version != self.registry.version:
+            self._fallbacks = {}
+            self._fallbacks_version = self.registry.version
+        if category not in self._fallbacks:
+            roles = self.manager.category_stakeholder_mapping.get(category, [])
+            self._fallbacks[category] = self.registry.by_roles(roles)[:self.limit]
+        return self._fallbacks[category]
+
+    def inputs_hash(self, category, severity, stakeholders):
+        digest = hashlib.sha256(json.dumps([category, severity]).encode())
+        for s in stakeholders:
+            digest.update(json.dumps([s.id, s.name, s.role, s.organization, s.email]).encode())
+        return digest.hexdigest()
+
+    def build(self, problems, existing_hashes=None):
+        """(problem_id, category, severity, inputs_hash, plan_json) for problems whose inputs changed"""
+        existing_hashes = existing_hashes or {}
+        chosen = self.stakeholders_for([(problem_id, category) for problem_id, category, _ in problems])
+
+        results = []
+        for problem_id, category, severity in problems:
+            stakeholders = chosen[problem_id]
+            inputs_hash = self.inputs_hash(category, severity, stakeholders)
+            if existing_hashes.get(problem_id) == inputs_hash:
+                continue
+            plan = self.manager.generate_engagement_plan(category, stakeholders, severity)
+            results.append((problem_id, category, severity, inputs_hash, json.dumps(plan)))
+        return results
+
+
+def save_plans(connection, plan_model, results, existing_ids, progress=None):
+    """Update changed plans and insert new ones with one executemany each
+
+    With a progress tracker, tracked problems whose plans were replaced get
+    their phase counters rebuilt against the new timeline.
+    """
+    table = plan_model.__table__
+    now = datetime.utcnow()
+    rows = [{'pid': problem_id, 'category': category, 'severity': severity, 'inputs_hash': inputs_hash,
+             'plan': plan_json, 'generated_date': now}
+            for problem_id, category, severity, inputs_hash, plan_json in results]
+
+    updates = [row for row in rows if row['pid'] in existing_ids]
+    inserts = [row for row in rows if row['pid'] not in existing_ids]
+    if updates:
+        connection.execute(
+            update(table).where(table.c.problem_id == bindparam('pid')).values(
+                category=bindparam('category'), severity=bindparam('severity'),
+                inputs_hash=bindparam('inputs_hash'), plan=bindparam('plan'),
+                generated_date=bindparam('generated_date')),
+            updates)
+    if inserts:
+        connection.execute(insert(table), [dict(row, problem_id=row.pop('pid')) for row in inserts])
+    if updates and progress is not None:
+        progress.resync(connection, [row['pid'] for row in updates])
+
+
+# Snapshot shared with forked workers, so it is loaded once per run rather than per chunk
+_builder = None
+
+
+def _build_chunk(chunk):
+    problems, existing_hashes = chunk
+    return _builder.build(problems, existing_hashes)
+
+
+def refresh_plans(session, problem_model, plan_model, builder, statuses=OPEN_STATUSES, workers=1,
+                  chunk_size=2000, progress=None, log=print):
+    """Generate missing plans and regenerate stale ones for every problem in the given statuses
+
+    Chunks are built in parallel by forked worker processes that share the
+    builder's stakeholder snapshot; writes happen in this process per chunk.
+    """
+    global _builder
+    problem = problem_model.__table__
+    plan = plan_model.__table__
+    started = time.perf_counter()
+
+    stmt = select(problem.c.id, problem.c.category, problem.c.severity).order_by(problem.c.id)
+    if statuses:
+        stmt = stmt.where(problem.c.status.in_(statuses))
+    problems = session.execute(stmt).all()
+    existing = dict(session.execute(select(plan.c.problem_id, plan.c.inputs_hash)).all())
+
+    chunks = [([tuple(row) for row in problems[i:i + chunk_size]],
+               {row.id: existing[row.id] for row in problems[i:i + chunk_size] if row.id in existing})
+              for i in range(0, len(problems), chunk_size)]
+
+    counts = {'problems': len(problems), 'generated': 0, 'unchanged': 0}
+    _builder = builder
+    try:
+        if workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+            chunk_results = pool.map(_build_chunk, chunks)
+        else:
+            pool = None
+            chunk_results = map(_build_chunk, chunks)
+
+        connection = session.connection()
+        for (chunk_problems, _), results in zip(chunks, chunk_results):
+            save_plans(connection, plan_model, results, existing, progress)
+            session.commit()
+            connection = session.connection()
+            counts['generated'] += len(results)
+            counts['unchanged'] += len(chunk_problems) - len(results)
+            log(f"   {counts['generated'] + counts['unchanged']:,}/{len(problems):,} problems "
+                f"({time.perf_counter() - started:.1f}s)")
+        if pool is not None:
+            pool.shutdown()
+    finally:
+        _builder = None
+
+    counts['seconds'] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate or refresh stored engagement plans')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes building plans')
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--all-statuses', action='store_true', help='include resolved problems')
+    args = parser.parse_args(argv)
+
+    from app import app, db, engagement_manager, engagement_progress, CommunityProblem, EngagementPlan, Stakeholder
+    from src.data_ingestion.schema import upgrade_schema
+    from src.stakeholder.matching import InterestMatcher
+    from src.stakeholder.registry import StakeholderRegistry
+
+    with app.app_context():
+        upgrade_schema(db)
+
+        # One snapshot of stakeholders for the whole run
+        print("Loading stakeholder snapshot...")
+        registry = StakeholderRegistry()
+        registry.load(db.session, Stakeholder, roles=engagement_manager.engagement_strategies.keys())
+        matcher = InterestMatcher()
+        matcher.load(db.session, CommunityProblem, Stakeholder)
+
+        builder = PlanBuilder(engagement_manager, registry, matcher)
+        counts = refresh_plans(db.session, CommunityProblem, EngagementPlan, builder,
+                               statuses=None if args.all_statuses else OPEN_STATUSES,
+                               workers=args.workers, chunk_size=args.chunk_size,
+                               progress=engagement_progress)
+
+    print(f"Generated {counts['generated']:,} plans, {counts['unchanged']:,} unchanged "
+          f"out of {counts['problems']:,} problems in {counts['seconds']}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import argparse
+import sys
+from datetime import datetime
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+
+class EngagementProgressTracker:
+    """Per-phase completed/total counters maintained from an append-only activity log
+
+    Each recorded activity marks one timeline action of a problem's plan as
+    completed or reopened. The log is never rewritten; the counter for the
+    action's phase only moves when the action's state actually changes, so a
+    progress report reads one row per phase. replay() rebuilds the counters
+    from the log.
+    """
+
+    def __init__(self, activity_model, progress_model, plan_model, manager):
+        self.activity = activity_model.__table__
+        self.progress_table = progress_model.__table__
+        self.plan = plan_model.__table__
+        self.manager = manager
+
+    def timeline(self, category, severity):
+        return self.manager.plan_template(category, severity).timeline
+
+    def record(self, connection, problem_id, category, severity, phase, action, completed=True, actor=None):
+        """Append an activity and apply its change to the phase counter"""
+        timeline = self.timeline(category, severity)
+        if phase not in timeline:
+            raise ValueError(f'Unknown phase: {phase}')
+        if action not in timeline[phase]['actions']:
+            raise ValueError(f'Unknown action for phase {phase}: {action}')
+
+        self._start(connection, problem_id, timeline)
+
+        # Touching the phase counter first locks its row (the whole database on SQLite) until commit, so
+        # concurrent records for the phase read the action's previous state and move the counter in turn
+        p = self.progress_table.c
+        phase_counter = update(self.progress_table).where(p.problem_id == problem_id, p.phase == phase)
+        connection.execute(phase_counter.values(completed=p.completed))
+
+        a = self.activity.c
+        was_completed = connection.execute(
+            select(a.completed).where(a.problem_id == problem_id, a.phase == phase, a.action == action)
+            .order_by(a.id.desc()).limit(1)
+        ).scalar()
+        result = connection.execute(insert(self.activity).values(
+            problem_id=problem_id, phase=phase, action=action, completed=completed, actor=actor,
+            recorded_date=datetime.utcnow()))
+
+        if completed != bool(was_completed):
+            connection.execute(phase_counter.values(completed=p.completed + (1 if completed else -1)))
+        return result.inserted_primary_key[0]
+
+    def _start(self, connection, problem_id, timeline):
+        """Create zeroed counters the first time a problem's progress is tracked"""
+        p = self.progress_table.c
+        if connection.execute(select(p.phase).where(p.problem_id == problem_id).limit(1)).first() is None:
+            # A concurrent first record may have created them since the check
+            insert_ignore(connection, self.progress_table, [{
+                'problem_id': problem_id,
+                'phase': phase,
+                'position': position,
+                'completed': 0,
+                'total': len(details['actions'])
+            } for position, (phase, details) in enumerate(timeline.items())])
+
+    def progress(self, connection, problem_id, category, severity):
+        """Progress report from the phase counters, or an empty one if nothing was recorded"""
+        p = self.progress_table.c
+        rows = connection.execute(
+            select(p.phase, p.completed, p.total).where(p.problem_id == problem_id).order_by(p.position)
+        ).all()
+        if not rows:
+            rows = [(phase, 0, len(details['actions'])) for phase, details in self.timeline(category, severity).items()]
+        return self.manager.progress_report(rows)
+
+    def activities(self, connection, problem_id, limit=100):
+        """Most recent activities first"""
+        a = self.activity.c
+        rows = connection.execute(
+            select(a.id, a.phase, a.action, a.completed, a.actor, a.recorded_date)
+            .where(a.problem_id == problem_id).order_by(a.id.desc()).limit(limit)
+        )
+        return [{
+            'id': row.id,
+            'phase': row.phase,
+            'action': row.action,
+            'completed': row.completed,
+            'actor': row.actor,
+            'recorded_date': row.recorded_date.isoformat()
+        } for row in rows]
+
+    def resync(self, connection, problem_ids):
+        """Rebuild counters for problems whose plans changed, if they are being tracked"""
+        p = self.progress_table.c
+        tracked = connection.execute(
+            select(p.problem_id).where(p.problem_id.in_(list(problem_ids))).distinct()
+        ).scalars().all()
+        if tracked:
+            self.replay(connection, tracked)
+
+    def replay(self, connection, problem_ids=None):
+        """Rebuild counters from the activity log, for every problem or only the given ones
+
+        Totals come from each problem's stored plan; activities for actions no
+        longer in the plan's timeline are kept in the log but not counted.
+        """
+        a = self.activity.c
+        p = self.progress_table.c
+        stmt = select(a.problem_id, a.phase, a.action, a.completed).order_by(a.id)
+        clear = delete(self.progress_table)
+        if problem_ids is not None:
+            problem_ids = list(problem_ids)
+            stmt = stmt.where(a.problem_id.in_(problem_ids))
+            clear = clear.where(p.problem_id.in_(problem_ids))
+
+        # Latest state per action; later activities overwrite earlier ones
+        states = {}
+        for problem_id, phase, action, completed in connection.execute(stmt.execution_options(yield_per=50000)):
+            states[(problem_id, phase, action)] = completed
+
+        completed_counts = {}
+        for (problem_id, phase, action), completed in states.items():
+            if completed:
+                completed_counts.setdefault(problem_id, {}).setdefault(phase, set()).add(action)
+
+        problems = {problem_id for problem_id, _, _ in states}
+        plans = connection.execute(
+            select(self.plan.c.problem_id, self.plan.c.category, self.plan.c.severity)
+            .where(self.plan.c.problem_id.in_(list(problems)))
+        ).all() if problems else []
+
+        rows = []
+        for problem_id, category, severity in plans:
+            done = completed_counts.get(problem_id, {})
+            for position, (phase, details) in enumerate(self.timeline(category, severity).items()):
+                rows.append({
+                    'problem_id': problem_id,
+                    'phase': phase,
+                    'position': position,
+                    'completed': len(done.get(phase, set()) & set(details['actions'])),
+                    'total': len(details['actions'])
+                })
+
+        connection.execute(clear)
+        if rows:
+            connection.execute(insert(self.progress_table), rows)
+        return len(plans)
+
+
+def insert_ignore(connection, table, rows):
+    """Insert rows, skipping any whose primary key already exists"""
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(table).on_conflict_do_nothing()
+        connection.execute(stmt, rows)
+    elif dialect in ('mysql', 'mariadb'):
+        connection.execute(insert(table).prefix_with('IGNORE'), rows)
+    else:
+        for row in rows:
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(table), row)
+            except IntegrityError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain engagement progress counters')
+    parser.add_argument('command', choices=['replay'])
+    parser.add_argument('--problem', type=int, action='append', help='only replay these problem ids')
+    args = parser.parse_args(argv)
+
+    from app import app, db, engagement_progress
+    from src.data_ingestion.schema import upgrade_schema
+
+    with app.app_context():
+        upgrade_schema(db)
+        replayed = engagement_progress.replay(db.session.connection(), args.problem)
+        db.session.commit()
+    print(f'Rebuilt engagement progress for {replayed:,} problems')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
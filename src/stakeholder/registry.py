@@ -0,0 +1,147 @@
+import re
+import threading
+from collections import namedtuple
+
+from sqlalchemy import select
+
+StakeholderEntry = namedtuple('StakeholderEntry', ['id', 'name', 'email', 'role', 'organization', 'interests'])
+
+# Filler words that would otherwise link unrelated interests
+INTEREST_STOPWORDS = {'and', 'the', 'for', 'of', 'in', 'on', 'to', 'with', 'a', 'an'}
+
+
+def interest_terms(text):
+    """Lowercased interest phrases ("media literacy") and their words ("media", "literacy")"""
+    terms = set()
+    for phrase in re.split(r'[,;/\n]+', (text or '').lower()):
+        words = re.findall(r'[a-z0-9][a-z0-9\-]*', phrase)
+        if words:
+            terms.add(' '.join(words))
+            terms.update(word for word in words if word not in INTEREST_STOPWORDS and len(word) > 2)
+    return terms
+
+
+def organization_key(name):
+    return ' '.join((name or '').lower().split())
+
+
+class StakeholderRegistry:
+    """In-memory stakeholder indexes by role, organization and interest term
+
+    Lookups cost the size of the answer rather than the stakeholder count.
+    The registry is loaded once from SQL and then kept current by add()/remove();
+    version increases on every change so derived caches can tell when they are
+    stale. Each process holds its own copy.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.loaded = False
+        self.roles_filter = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._by_id = {}
+        self._by_role = {}
+        self._by_organization = {}
+        self._by_interest = {}
+
+    def load(self, session, stakeholder_model, roles=None):
+        """Rebuild from the database, only fetching stakeholders in the given roles"""
+        table = stakeholder_model.__table__
+        stmt = select(table.c.id, table.c.name, table.c.email, table.c.role,
+                      table.c.organization, table.c.interests).order_by(table.c.id)
+        if roles is not None:
+            stmt = stmt.where(table.c.role.in_(list(roles)))
+        rows = session.execute(stmt).all()
+
+        with self._lock:
+            self._reset()
+            self.roles_filter = set(roles) if roles is not None else None
+            for row in rows:
+                self._index(StakeholderEntry(*row))
+            self.loaded = True
+            self.version += 1
+
+    def add(self, stakeholder):
+        """Index a new or updated stakeholder (ORM object, row or entry)"""
+        entry = StakeholderEntry(stakeholder.id, stakeholder.name, stakeholder.email, stakeholder.role,
+                                 stakeholder.organization, stakeholder.interests)
+        if self.roles_filter is not None and entry.role not in self.roles_filter:
+            return False
+
+        with self._lock:
+            if entry.id in self._by_id:
+                self._unindex(self._by_id[entry.id])
+            self._index(entry)
+            self.version += 1
+        return True
+
+    def remove(self, stakeholder_id):
+        with self._lock:
+            entry = self._by_id.get(stakeholder_id)
+            if entry is None:
+                return False
+            self._unindex(entry)
+            self.version += 1
+        return True
+
+    def _index(self, entry):
+        self._by_id[entry.id] = entry
+        # Dicts keyed by id keep join order and make removal O(1)
+        self._by_role.setdefault(entry.role, {})[entry.id] = entry
+        if entry.organization:
+            self._by_organization.setdefault(organization_key(entry.organization), {})[entry.id] = entry
+        for term in interest_terms(entry.interests):
+            self._by_interest.setdefault(term, {})[entry.id] = entry
+
+    def _unindex(self, entry):
+        del self._by_id[entry.id]
+        self._discard(self._by_role, entry.role, entry.id)
+        if entry.organization:
+            self._discard(self._by_organization, organization_key(entry.organization), entry.id)
+        for term in interest_terms(entry.interests):
+            self._discard(self._by_interest, term, entry.id)
+
+    def _discard(self, index, key, stakeholder_id):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.pop(stakeholder_id, None)
+            if not bucket:
+                del index[key]
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def get(self, stakeholder_id):
+        return self._by_id.get(stakeholder_id)
+
+    def roles(self):
+        """Roles with at least one stakeholder"""
+        with self._lock:
+            return set(self._by_role)
+
+    def role_counts(self):
+        with self._lock:
+            return {role: len(bucket) for role, bucket in self._by_role.items()}
+
+    def by_role(self, role):
+        with self._lock:
+            return list(self._by_role.get(role, {}).values())
+
+    def by_roles(self, roles):
+        """Stakeholders in any of the roles, grouped in the order the roles are given"""
+        matches = []
+        with self._lock:
+            for role in roles:
+                matches.extend(self._by_role.get(role, {}).values())
+        return matches
+
+    def by_organization(self, organization):
+        with self._lock:
+            return list(self._by_organization.get(organization_key(organization), {}).values())
+
+    def by_interest(self, term):
+        with self._lock:
+            return list(self._by_interest.get(' '.join(term.lower().split()), {}).values())
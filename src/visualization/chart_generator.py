@@ -1,6 +1,10 @@
 import json
+import math
 from collections import Counter
 from datetime import datetime, timedelta
+import pandas as pd
+from src.visualization.columnar import aggregate_timeline, problems_to_frame
+from src.visualization.solution_analytics import solution_stats_from_objects
 
 class ChartGenerator:
     def __init__(self):
@@ -12,10 +16,11 @@ class ChartGenerator:
             'info': '#7209B7'
         }
 
-    def generate_category_chart(self, problems):
-        """Generate chart data for problem categories"""
-        categories = [p.category for p in problems]
-        category_counts = Counter(categories)
+    def generate_category_chart(self, problems=None, counts=None):
+        """Generate chart data for problem categories (or precomputed category counts)"""
+        if counts is None:
+            counts = Counter(p.category for p in problems)
+        category_counts = counts
         
         chart_data = {
             'type': 'doughnut',
@@ -51,10 +56,11 @@ class ChartGenerator:
         
         return json.dumps(chart_data)
 
-    def generate_severity_chart(self, problems):
-        """Generate chart data for problem severity"""
-        severities = [p.severity for p in problems]
-        severity_counts = Counter(severities)
+    def generate_severity_chart(self, problems=None, counts=None):
+        """Generate chart data for problem severity (or precomputed severity counts)"""
+        if counts is None:
+            counts = Counter(p.severity for p in problems)
+        severity_counts = counts
         
         # Define severity order and colors
         severity_order = ['Critical', 'High', 'Medium', 'Low']
@@ -105,40 +111,48 @@ class ChartGenerator:
         
         return json.dumps(chart_data)
 
-    def generate_timeline_chart(self, problems):
-        """Generate timeline chart for problem submissions"""
-        # Group problems by month
-        monthly_counts = {}
+    def generate_timeline_chart(self, problems, bucket='month', facet=None, weight=None):
+        """Generate timeline chart for problem submissions
         
-        for problem in problems:
-            month_key = problem.submitted_date.strftime('%Y-%m')
-            monthly_counts[month_key] = monthly_counts.get(month_key, 0) + 1
+        problems may be a list of problems or a columnar DataFrame from
+        load_problem_columns; bucket is day, week, month or quarter, and facet
+        splits the line by category, severity or status.
+        """
+        frame = problems if isinstance(problems, pd.DataFrame) else problems_to_frame(problems)
+        labels, series = aggregate_timeline(frame, bucket, facet, weight)
         
-        # Sort by date
-        sorted_months = sorted(monthly_counts.items())
-        
-        if not sorted_months:
+        if not labels:
             return json.dumps({
                 'type': 'line',
                 'data': {'labels': [], 'datasets': []},
                 'options': {'responsive': True}
             })
         
-        labels = [item[0] for item in sorted_months]
-        data = [item[1] for item in sorted_months]
+        if facet is None:
+            datasets = [{
+                'label': 'Problems Submitted',
+                'data': series[None],
+                'borderColor': self.chart_colors['primary'],
+                'backgroundColor': self.chart_colors['primary'] + '20',
+                'fill': True,
+                'tension': 0.4
+            }]
+        else:
+            colors = list(self.chart_colors.values())
+            datasets = [{
+                'label': value,
+                'data': data,
+                'borderColor': colors[i % len(colors)],
+                'backgroundColor': colors[i % len(colors)] + '20',
+                'fill': False,
+                'tension': 0.4
+            } for i, (value, data) in enumerate(series.items())]
         
         chart_data = {
             'type': 'line',
             'data': {
                 'labels': labels,
-                'datasets': [{
-                    'label': 'Problems Submitted',
-                    'data': data,
-                    'borderColor': self.chart_colors['primary'],
-                    'backgroundColor': self.chart_colors['primary'] + '20',
-                    'fill': True,
-                    'tension': 0.4
-                }]
+                'datasets': datasets
             },
             'options': {
                 'responsive': True,
@@ -158,29 +172,78 @@ class ChartGenerator:
         
         return json.dumps(chart_data)
 
-    def generate_solution_effectiveness_chart(self, problems, solutions):
-        """Generate chart showing solution effectiveness"""
-        problem_solution_counts = {}
+    def generate_solution_effectiveness_chart(self, problems=None, solutions=None, stats=None):
+        """Generate chart showing solutions and votes per problem category"""
+        if stats is None:
+            stats = solution_stats_from_objects(problems or [], solutions or [])
         
-        for problem in problems:
-            solution_count = len([s for s in solutions if s.problem_id == problem.id])
-            problem_solution_counts[problem.category] = problem_solution_counts.get(problem.category, 0) + solution_count
+        categories = stats['categories']
         
         chart_data = {
             'type': 'bar',
             'data': {
-                'labels': list(problem_solution_counts.keys()),
+                'labels': list(categories.keys()),
                 'datasets': [{
                     'label': 'Solutions Proposed',
-                    'data': list(problem_solution_counts.values()),
+                    'data': [c['solutions'] for c in categories.values()],
                     'backgroundColor': self.chart_colors['success'],
                     'borderColor': self.chart_colors['success'],
+                    'borderWidth': 1,
+                    'yAxisID': 'y'
+                }, {
+                    'label': 'Votes',
+                    'data': [c['votes'] for c in categories.values()],
+                    'backgroundColor': self.chart_colors['secondary'],
+                    'borderColor': self.chart_colors['secondary'],
+                    'borderWidth': 1,
+                    'yAxisID': 'votes'
+                }]
+            },
+            'options': {
+                'responsive': True,
+                'scales': {
+                    'y': {
+                        'beginAtZero': True
+                    },
+                    'votes': {
+                        'beginAtZero': True,
+                        'position': 'right',
+                        'grid': {'drawOnChartArea': False}
+                    }
+                },
+                'plugins': {
+                    'title': {
+                        'display': True,
+                        'text': 'Solutions and Votes by Problem Category'
+                    }
+                }
+            }
+        }
+        
+        return json.dumps(chart_data)
+
+    def generate_solution_distribution_chart(self, stats):
+        """Generate chart for how many solutions each problem has received"""
+        distribution = stats['distribution']
+        
+        chart_data = {
+            'type': 'bar',
+            'data': {
+                'labels': list(distribution.keys()),
+                'datasets': [{
+                    'label': 'Problems',
+                    'data': list(distribution.values()),
+                    'backgroundColor': self.chart_colors['primary'],
+                    'borderColor': self.chart_colors['primary'],
                     'borderWidth': 1
                 }]
             },
             'options': {
                 'responsive': True,
                 'scales': {
+                    'x': {
+                        'title': {'display': True, 'text': 'Solutions per problem'}
+                    },
                     'y': {
                         'beginAtZero': True
                     }
@@ -188,7 +251,87 @@ class ChartGenerator:
                 'plugins': {
                     'title': {
                         'display': True,
-                        'text': 'Solutions by Problem Category'
+                        'text': 'Solutions per Problem'
+                    }
+                }
+            }
+        }
+        
+        return json.dumps(chart_data)
+
+    def generate_time_to_first_solution_chart(self, stats):
+        """Generate chart for the median time until a problem gets its first solution"""
+        time_to_first = stats['time_to_first']
+        
+        chart_data = {
+            'type': 'bar',
+            'data': {
+                'labels': list(time_to_first.keys()),
+                'datasets': [{
+                    'label': 'Median hours to first solution',
+                    'data': [t['median_hours'] for t in time_to_first.values()],
+                    'backgroundColor': self.chart_colors['info'],
+                    'borderColor': self.chart_colors['info'],
+                    'borderWidth': 1
+                }]
+            },
+            'options': {
+                'responsive': True,
+                'indexAxis': 'y',
+                'scales': {
+                    'x': {
+                        'beginAtZero': True
+                    }
+                },
+                'plugins': {
+                    'title': {
+                        'display': True,
+                        'text': 'Time to First Solution by Category'
+                    }
+                }
+            }
+        }
+        
+        return json.dumps(chart_data)
+
+    def generate_spatial_chart(self, cells):
+        """Generate a bubble map of problem counts per geohash cell"""
+        largest = max((c['count'] for c in cells), default=0)
+        
+        chart_data = {
+            'type': 'bubble',
+            'data': {
+                'datasets': [{
+                    'label': 'Problems',
+                    'data': [{
+                        'x': c['longitude'],
+                        'y': c['latitude'],
+                        'r': round(3 + 22 * math.sqrt(c['count'] / largest), 1),
+                        'count': c['count'],
+                        'geohash': c['geohash']
+                    } for c in cells],
+                    'backgroundColor': self.chart_colors['secondary'] + '80',
+                    'borderColor': self.chart_colors['secondary'],
+                    'borderWidth': 1
+                }]
+            },
+            'options': {
+                'responsive': True,
+                'scales': {
+                    'x': {
+                        'title': {'display': True, 'text': 'Longitude'}
+                    },
+                    'y': {
+                        'title': {'display': True, 'text': 'Latitude'}
+                    }
+                },
+                'plugins': {
+                    'legend': {
+                        'display': False
+                    },
+                    'title': {
+                        'display': True,
+                        'text': 'Problem Hotspots'
                     }
                 }
             }
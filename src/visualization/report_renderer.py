@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import matplotlib
+from sqlalchemy import select
+
+from src.visualization.chart_generator import ChartGenerator
+from src.visualization.columnar import columns_to_frame, fetch_columns, union_archived
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+REPORT_COLUMNS = ['location', 'category', 'severity', 'status', 'submitted_date']
+
+REPORT_FORMATS = ('png', 'svg', 'pdf')
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def collect_report_data(session, problem_model, start=None, end=None, places=None, archive=None):
+    """Problem counts per (location, category, severity, status, day) for every report at once
+
+    One columnar read and one group-by feed all reports; each report is then
+    a slice of this frame rather than its own query. Given the gazetteer's
+    places, problems are grouped by canonical place so different spellings of
+    a city share one report; unresolved locations keep their own text.
+    Archived problems are included when an archive is given.
+    """
+    table = problem_model.__table__
+    stmt = select(table.c.location, table.c.place_id, table.c.category, table.c.severity, table.c.status,
+                  table.c.submitted_date)
+    if start is not None:
+        stmt = stmt.where(table.c.submitted_date >= start)
+    if end is not None:
+        stmt = stmt.where(table.c.submitted_date < end)
+
+    columns = ['location', 'place_id'] + REPORT_COLUMNS[1:]
+    frame = fetch_columns(session, stmt, columns)
+    if archive is not None:
+        frame = union_archived(frame, archive.problem_columns(columns, start, end))
+    frame['location'] = frame['location'].fillna('Unknown').str.strip()
+    if places:
+        names = {place_id: f'{place.name}, {place.admin1}' for place_id, place in places.items()}
+        frame['location'] = frame['place_id'].map(names).fillna(frame['location'])
+    frame = frame.drop(columns='place_id')
+    frame['status'] = frame['status'].fillna('Open')
+    frame = columns_to_frame(frame)
+    frame['location'] = frame['location'].astype('category')
+    frame['submitted_date'] = frame['submitted_date'].dt.floor('D')
+
+    return frame.groupby(REPORT_COLUMNS, observed=True).size().reset_index(name='count')
+
+
+def _counts(rows, column):
+    return {str(value): int(count) for value, count in rows.groupby(column, observed=True)['count'].sum().items()
+            if count}
+
+
+def _slug(*parts):
+    return '--'.join(re.sub(r'[^a-z0-9]+', '-', part.lower()).strip('-') or 'unknown' for part in parts)
+
+
+def build_reports(data, chart_generator=None, bucket='day', min_problems=1):
+    """Chart.js specs for one report per location and one per (location, category)"""
+    chart_generator = chart_generator or ChartGenerator()
+    reports = []
+    keys = set()
+
+    def add(key, title, rows, charts):
+        total = int(rows['count'].sum())
+        if total >= min_problems:
+            if key in keys:
+                # Locations that differ only in punctuation or case share a slug
+                key = f'{key}-{hashlib.sha256(title.encode()).hexdigest()[:8]}'
+            keys.add(key)
+            reports.append({
+                'key': key,
+                'title': title,
+                'problems': total,
+                'charts': [json.loads(chart) for chart in charts]
+            })
+
+    for location, location_rows in data.groupby('location', observed=True):
+        add(_slug(location), location, location_rows, [
+            chart_generator.generate_category_chart(counts=_counts(location_rows, 'category')),
+            chart_generator.generate_severity_chart(counts=_counts(location_rows, 'severity')),
+            chart_generator.generate_timeline_chart(location_rows, bucket=bucket, weight='count')
+        ])
+
+        for category, rows in location_rows.groupby('category', observed=True):
+            add(_slug(location, category), f'{location} - {category}', rows, [
+                chart_generator.generate_severity_chart(counts=_counts(rows, 'severity')),
+                chart_generator.generate_timeline_chart(rows, bucket=bucket, facet='status', weight='count')
+            ])
+
+    return reports
+
+
+def report_hash(report, formats):
+    """Content hash of everything that ends up in a report's files"""
+    content = json.dumps({'title': report['title'], 'charts': report['charts'], 'formats': sorted(formats)},
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _color(value, index=0):
+    if isinstance(value, list):
+        return value[index % len(value)] if value else None
+    return value
+
+
+def _draw_chart(ax, spec):
+    """Draw one Chart.js spec (bar, line, pie or doughnut) on a matplotlib axis"""
+    chart_type = spec.get('type')
+    labels = spec['data']['labels']
+    datasets = spec['data']['datasets']
+    options = spec.get('options', {})
+    title = options.get('plugins', {}).get('title', {}).get('text')
+    positions = list(range(len(labels)))
+
+    if not labels or not datasets:
+        ax.text(0.5, 0.5, 'No data', ha='center', va='center', transform=ax.transAxes)
+        ax.set_axis_off()
+    elif chart_type in ('pie', 'doughnut'):
+        dataset = datasets[0]
+        colors = [_color(dataset.get('backgroundColor'), i) for i in positions]
+        wedges = {'width': 0.45, 'edgecolor': 'white'} if chart_type == 'doughnut' else {'edgecolor': 'white'}
+        ax.pie(dataset['data'], labels=labels, colors=colors, wedgeprops=wedges, autopct='%1.0f%%',
+               pctdistance=0.78, textprops={'fontsize': 8})
+        ax.axis('equal')
+    elif chart_type == 'bar':
+        horizontal = options.get('indexAxis') == 'y'
+        width = 0.8 / len(datasets)
+        for n, dataset in enumerate(datasets):
+            offsets = [p + (n - (len(datasets) - 1) / 2) * width for p in positions]
+            colors = [_color(dataset.get('backgroundColor'), i) for i in positions]
+            draw = ax.barh if horizontal else ax.bar
+            draw(offsets, dataset['data'], width, label=dataset.get('label'), color=colors)
+        if horizontal:
+            ax.set_yticks(positions, labels, fontsize=8)
+        else:
+            ax.set_xticks(positions, labels, fontsize=8, rotation=30, ha='right')
+    else:
+        for dataset in datasets:
+            color = _color(dataset.get('borderColor'))
+            ax.plot(positions, dataset['data'], label=dataset.get('label'), color=color, linewidth=1.5)
+            if dataset.get('fill'):
+                ax.fill_between(positions, dataset['data'], color=_color(dataset.get('backgroundColor')))
+        step = max(1, len(labels) // 12)
+        ax.set_xticks(positions[::step], labels[::step], fontsize=8, rotation=30, ha='right')
+        ax.set_ylim(bottom=0)
+
+    if chart_type not in ('pie', 'doughnut') and len(datasets) > 1:
+        ax.legend(fontsize=8)
+    if title:
+        ax.set_title(title, fontsize=11)
+
+
+def render_report(report, output_dir, formats):
+    """Render one report to a file per format; runs inside a worker process"""
+    charts = report['charts']
+    fig, axes = plt.subplots(len(charts), 1, figsize=(8.27, 3.6 * len(charts)), squeeze=False)
+    for ax, spec in zip(axes[:, 0], charts):
+        _draw_chart(ax, spec)
+    fig.suptitle(f"{report['title']} ({report['problems']} problems)", fontsize=14)
+    fig.tight_layout(rect=(0, 0, 1, 0.97))
+
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{report['key']}.{fmt}")
+        fig.savefig(path, format=fmt, dpi=120)
+        paths.append(path)
+    plt.close(fig)
+    return report['key'], paths
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def render_reports(reports, output_dir, formats=('png',), workers=None, force=False):
+    """Render reports across a process pool, skipping those whose content hash is unchanged
+
+    Returns (rendered, skipped) counts. The manifest of content hashes is kept
+    in the output directory.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    pending = []
+    skipped = 0
+
+    for report in reports:
+        digest = report_hash(report, formats)
+        files_exist = all(os.path.exists(os.path.join(output_dir, f"{report['key']}.{fmt}")) for fmt in formats)
+        if not force and manifest.get(report['key'], {}).get('hash') == digest and files_exist:
+            skipped += 1
+        else:
+            pending.append((report, digest))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_report, report, output_dir, formats): (report, digest)
+                       for report, digest in pending}
+            for future in as_completed(futures):
+                report, digest = futures[future]
+                key, paths = future.result()
+                manifest[key] = {
+                    'hash': digest,
+                    'title': report['title'],
+                    'files': [os.path.basename(path) for path in paths],
+                    'rendered_at': datetime.utcnow().isoformat()
+                }
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    return len(pending), skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render static per-location and per-category problem reports')
+    parser.add_argument('--output', default='reports', help='directory for report files and the manifest')
+    parser.add_argument('--formats', default='png,pdf', help=f"comma-separated, from {', '.join(REPORT_FORMATS)}")
+    parser.add_argument('--days', type=int, default=7, help='reporting window in days (0 for all history)')
+    parser.add_argument('--end', help='end of the window as YYYY-MM-DD (default: tomorrow)')
+    parser.add_argument('--bucket', default='day', choices=['day', 'week', 'month', 'quarter'])
+    parser.add_argument('--min-problems', type=int, default=1, help='skip reports with fewer problems')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='render even if the content hash is unchanged')
+    args = parser.parse_args(argv)
+
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in REPORT_FORMATS]
+    if unknown or not formats:
+        parser.error(f"unsupported formats: {', '.join(unknown) or args.formats}")
+
+    end = datetime.strptime(args.end, '%Y-%m-%d') if args.end else datetime.combine(
+        datetime.utcnow().date() + timedelta(days=1), datetime.min.time())
+    start = end - timedelta(days=args.days) if args.days else None
+
+    from app import app, db, location_normalizer, problem_archive, CommunityProblem
+
+    with app.app_context():
+        data = collect_report_data(db.session, CommunityProblem, start, end, location_normalizer.gazetteer.places,
+                                   problem_archive)
+    reports = build_reports(data, bucket=args.bucket, min_problems=args.min_problems)
+
+    rendered, skipped = render_reports(reports, args.output, formats, args.workers, args.force)
+    print(f'Rendered {rendered} reports, {skipped} unchanged, into {args.output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+import argparse
+import sys
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+from sqlalchemy import and_, delete, event, func, insert, inspect, select, update
+
+from src.visualization.columnar import columns_to_frame, load_problem_columns
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter')
+
+ROLLUP_KEY = ('category', 'severity', 'status')
+
+
+def bucket_start(value, granularity):
+    """First day of the bucket containing a date or datetime"""
+    day = value.date() if isinstance(value, datetime) else value
+    if granularity == 'day':
+        return day
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    if granularity == 'quarter':
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    raise ValueError(f'Unknown granularity: {granularity}')
+
+
+def next_bucket_start(day, granularity):
+    """First day of the bucket after the one starting on day"""
+    if granularity == 'day':
+        return day + timedelta(days=1)
+    if granularity == 'week':
+        return day + timedelta(days=7)
+    months = 1 if granularity == 'month' else 3
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def snap_range(granularity, start=None, end=None):
+    """Widen [start, end) to whole buckets: (first bucket's start, day after the last bucket)
+
+    Either bound may be None for an open range.
+    """
+    if start is not None:
+        start = bucket_start(start, granularity)
+    if end is not None:
+        first = bucket_start(end, granularity)
+        on_boundary = end == first if not isinstance(end, datetime) else end == datetime.combine(first, time())
+        end = first if on_boundary else next_bucket_start(first, granularity)
+    return start, end
+
+
+class TimelineRollup:
+    """Problem counts per (time bucket, category, severity, status), kept current on write
+
+    Every granularity is updated incrementally when problems are inserted or
+    change category, severity or status, so timeline reads never scan the
+    problems table. Deleting or archiving a problem keeps it in the history.
+    """
+
+    def __init__(self, rollup_model, granularities=GRANULARITIES):
+        self.rollup_model = rollup_model
+        self.table = rollup_model.__table__
+        self.granularities = granularities
+
+    def listen(self, session, problem_model):
+        """Track problem writes on a session (or session factory)"""
+        self.problem_model = problem_model
+        event.listen(session, 'after_flush', self._after_flush)
+
+    def _after_flush(self, session, flush_context):
+        deltas = Counter()
+
+        for obj in session.new:
+            if isinstance(obj, self.problem_model):
+                deltas[self._key(obj.submitted_date, obj.category, obj.severity, obj.status)] += 1
+
+        for obj in session.dirty:
+            if not isinstance(obj, self.problem_model):
+                continue
+
+            state = inspect(obj)
+            old_values = {}
+            for attr in ('submitted_date',) + ROLLUP_KEY:
+                history = state.attrs[attr].history
+                if history.deleted:
+                    old_values[attr] = history.deleted[0]
+            if not old_values:
+                continue
+
+            current = {attr: getattr(obj, attr) for attr in ('submitted_date',) + ROLLUP_KEY}
+            previous = dict(current, **old_values)
+            deltas[self._key(*(previous[a] for a in ('submitted_date',) + ROLLUP_KEY))] -= 1
+            deltas[self._key(*(current[a] for a in ('submitted_date',) + ROLLUP_KEY))] += 1
+
+        if deltas:
+            self.apply_deltas(session.connection(), deltas)
+
+    def _key(self, submitted_date, category, severity, status):
+        return ((submitted_date or datetime.utcnow()).date(), category, severity, status or 'Open')
+
+    def apply_deltas(self, connection, deltas):
+        """Add per-day count deltas to every granularity with upserts"""
+        expanded = Counter()
+        for (day, category, severity, status), change in deltas.items():
+            if change:
+                for granularity in self.granularities:
+                    expanded[(granularity, bucket_start(day, granularity), category, severity, status)] += change
+
+        c = self.table.c
+        for (granularity, start, category, severity, status), change in expanded.items():
+            if not change:
+                continue
+
+            match = and_(c.granularity == granularity, c.bucket_start == start, c.category == category,
+                         c.severity == severity, c.status == status)
+            result = connection.execute(update(self.table).where(match).values(problem_count=c.problem_count + change))
+            if result.rowcount == 0:
+                connection.execute(insert(self.table).values(
+                    granularity=granularity, bucket_start=start, category=category,
+                    severity=severity, status=status, problem_count=change))
+
+    def read(self, session, granularity, start=None, end=None):
+        """Rollup rows for one granularity as a weighted columnar frame
+
+        Only whole buckets are stored, so the range is widened to every bucket
+        it touches (see snap_range).
+        """
+        c = self.table.c
+        start, end = snap_range(granularity, start, end)
+        stmt = select(c.bucket_start, c.category, c.severity, c.status, c.problem_count).where(
+            c.granularity == granularity, c.problem_count != 0)
+        if start is not None:
+            stmt = stmt.where(c.bucket_start >= start)
+        if end is not None:
+            stmt = stmt.where(c.bucket_start < end)
+
+        rows = session.execute(stmt).all()
+        frame = pd.DataFrame(rows, columns=['submitted_date', 'category', 'severity', 'status', 'count'])
+        return columns_to_frame(frame)
+
+    def backfill(self, session, archive=None):
+        """Rebuild every bucket from the problems table (and the archive, if given)"""
+        frame = load_problem_columns(session, self.problem_model, archive=archive)
+        session.execute(delete(self.table))
+
+        if not frame.empty:
+            frame['day'] = frame['submitted_date'].dt.floor('D')
+            grouped = frame.groupby(['day'] + list(ROLLUP_KEY), observed=True).size().reset_index(name='count')
+            rows = [{
+                'granularity': 'day',
+                'bucket_start': row.day.date(),
+                'category': row.category,
+                'severity': row.severity,
+                'status': row.status,
+                'problem_count': int(row.count)
+            } for row in grouped.itertuples(index=False)]
+            session.execute(insert(self.table), rows)
+
+        self._rebuild_coarse(session)
+        session.commit()
+
+    def compact(self, session, retain_days=None):
+        """Rebuild coarser buckets from day buckets, optionally pruning old day rows
+
+        Once pruned, day-level timelines only cover the retained window; the
+        coarser buckets keep the full history.
+        """
+        c = self.table.c
+        earliest = session.execute(select(func.min(c.bucket_start)).where(c.granularity == 'day')).scalar()
+
+        # Buckets reaching back before the oldest day row (pruned earlier)
+        # keep their incrementally maintained counts
+        if earliest is not None:
+            self._rebuild_coarse(session, floor=earliest)
+
+        if retain_days is not None:
+            cutoff = date.today() - timedelta(days=retain_days)
+            session.execute(delete(self.table).where(c.granularity == 'day', c.bucket_start < cutoff))
+
+        session.commit()
+
+    def _rebuild_coarse(self, session, floor=None):
+        """Replace coarse buckets starting at or after floor with sums of day buckets"""
+        c = self.table.c
+        coarse = [g for g in self.granularities if g != 'day']
+        day_rows = session.execute(
+            select(c.bucket_start, c.category, c.severity, c.status, c.problem_count).where(c.granularity == 'day')
+        )
+
+        totals = Counter()
+        for start, category, severity, status, count in day_rows:
+            for granularity in coarse:
+                totals[(granularity, bucket_start(start, granularity), category, severity, status)] += count
+
+        stale = delete(self.table).where(c.granularity.in_(coarse))
+        if floor is not None:
+            stale = stale.where(c.bucket_start >= floor)
+        session.execute(stale)
+
+        rows = [{
+            'granularity': granularity,
+            'bucket_start': start,
+            'category': category,
+            'severity': severity,
+            'status': status,
+            'problem_count': count
+        } for (granularity, start, category, severity, status), count in totals.items()
+            if count and (floor is None or start >= floor)]
+        if rows:
+            session.execute(insert(self.table), rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain the problem timeline rollup')
+    parser.add_argument('command', choices=['backfill', 'compact'])
+    parser.add_argument('--retain-days', type=int, help='prune day buckets older than this when compacting')
+    args = parser.parse_args(argv)
+
+    from app import app, db, problem_archive, timeline_rollup
+
+    with app.app_context():
+        db.create_all()
+        if args.command == 'backfill':
+            timeline_rollup.backfill(db.session, problem_archive)
+        else:
+            timeline_rollup.compact(db.session, args.retain_days)
+    print(f'Timeline rollup {args.command} complete')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
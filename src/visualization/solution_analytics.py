@@ -0,0 +1,140 @@
+from collections import Counter, defaultdict
+from statistics import median
+
+from sqlalchemy import func, select
+
+# Buckets for the solutions-per-problem distribution
+DISTRIBUTION_BUCKETS = [(0, 0, '0'), (1, 1, '1'), (2, 2, '2'), (3, 5, '3-5'), (6, 10, '6-10'), (11, None, '11+')]
+
+
+def _bucket_label(count):
+    for low, high, label in DISTRIBUTION_BUCKETS:
+        if count >= low and (high is None or count <= high):
+            return label
+    return DISTRIBUTION_BUCKETS[-1][2]
+
+
+def _empty_stats():
+    return {
+        'categories': {},
+        'distribution': {label: 0 for _, _, label in DISTRIBUTION_BUCKETS},
+        'time_to_first': {}
+    }
+
+
+def _summarize_delays(delays_by_category):
+    return {
+        category: {
+            'median_hours': round(median(hours), 2),
+            'mean_hours': round(sum(hours) / len(hours), 2),
+            'problems': len(hours)
+        } for category, hours in delays_by_category.items()
+    }
+
+
+def collect_solution_stats(session, problem_model, solution_model, archive=None):
+    """Solution and vote analytics from grouped SQL aggregates, linear in the row count
+
+    Archived problems and solutions are aggregated from the archive's columns
+    and added in when an archive is given.
+    """
+    stats = _empty_stats()
+    problem = problem_model.__table__
+    solution = solution_model.__table__
+
+    # Solutions and votes per category in one grouped join
+    per_category = session.execute(
+        select(problem.c.category, func.count(solution.c.id), func.coalesce(func.sum(solution.c.votes), 0))
+        .select_from(solution.join(problem, problem.c.id == solution.c.problem_id))
+        .group_by(problem.c.category)
+    )
+    for category, solutions, votes in per_category:
+        stats['categories'][category] = {'solutions': solutions, 'votes': int(votes)}
+
+    # Distribution straight from the denormalized solution_count column
+    per_count = session.execute(
+        select(problem.c.solution_count, func.count()).group_by(problem.c.solution_count)
+    )
+    for count, problems in per_count:
+        stats['distribution'][_bucket_label(count or 0)] += problems
+
+    # Earliest solution per problem, joined back to the problem's submission date
+    first_solution = (
+        select(solution.c.problem_id, func.min(solution.c.proposed_date).label('first_date'))
+        .group_by(solution.c.problem_id)
+        .subquery()
+    )
+    firsts = session.execute(
+        select(problem.c.category, problem.c.submitted_date, first_solution.c.first_date)
+        .select_from(problem.join(first_solution, first_solution.c.problem_id == problem.c.id))
+    )
+    delays = defaultdict(list)
+    for category, submitted, first in firsts:
+        if submitted and first:
+            delays[category].append(max((first - submitted).total_seconds(), 0) / 3600)
+
+    if archive is not None:
+        _add_archived_stats(stats, delays, archive)
+    stats['time_to_first'] = _summarize_delays(delays)
+
+    return stats
+
+
+def _add_archived_stats(stats, delays, archive):
+    """Fold archived rows into the stats; archived solutions always belong to archived problems"""
+    problems = archive.problem_columns(['id', 'category', 'submitted_date', 'solution_count'])
+    if problems.empty:
+        return
+
+    for count, problems_with_count in problems['solution_count'].fillna(0).value_counts().items():
+        stats['distribution'][_bucket_label(int(count))] += int(problems_with_count)
+
+    solutions = archive.solution_columns(['problem_id', 'votes', 'proposed_date'])
+    if solutions.empty:
+        return
+    joined = solutions.merge(problems, left_on='problem_id', right_on='id')
+
+    per_category = joined.groupby('category').agg(solutions=('problem_id', 'size'), votes=('votes', 'sum'))
+    for category, row in per_category.iterrows():
+        category_stats = stats['categories'].setdefault(category, {'solutions': 0, 'votes': 0})
+        category_stats['solutions'] += int(row['solutions'])
+        category_stats['votes'] += int(row['votes'])
+
+    firsts = joined.groupby('problem_id').agg(category=('category', 'first'), submitted=('submitted_date', 'first'),
+                                              first=('proposed_date', 'min')).dropna()
+    hours = ((firsts['first'] - firsts['submitted']).dt.total_seconds() / 3600).clip(lower=0)
+    for category, value in zip(firsts['category'], hours):
+        delays[category].append(value)
+
+
+def solution_stats_from_objects(problems, solutions):
+    """The same analytics over in-memory objects, using a one-pass hash index"""
+    stats = _empty_stats()
+    problems_by_id = {p.id: p for p in problems}
+    solutions_per_problem = Counter()
+    first_dates = {}
+
+    for s in solutions:
+        problem = problems_by_id.get(s.problem_id)
+        if problem is None:
+            continue
+
+        solutions_per_problem[s.problem_id] += 1
+        category_stats = stats['categories'].setdefault(problem.category, {'solutions': 0, 'votes': 0})
+        category_stats['solutions'] += 1
+        category_stats['votes'] += s.votes or 0
+
+        if s.proposed_date and (s.problem_id not in first_dates or s.proposed_date < first_dates[s.problem_id]):
+            first_dates[s.problem_id] = s.proposed_date
+
+    for p in problems:
+        stats['distribution'][_bucket_label(solutions_per_problem[p.id])] += 1
+
+    delays = defaultdict(list)
+    for problem_id, first in first_dates.items():
+        problem = problems_by_id[problem_id]
+        if problem.submitted_date:
+            delays[problem.category].append(max((first - problem.submitted_date).total_seconds(), 0) / 3600)
+    stats['time_to_first'] = _summarize_delays(delays)
+
+    return stats
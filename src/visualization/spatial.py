@@ -0,0 +1,62 @@
+from sqlalchemy import func, select
+
+# Geohash prefix lengths that make sense for a heatmap (1 is ~5000km, 6 is ~1km)
+MIN_PRECISION = 1
+MAX_PRECISION = 6
+
+
+def spatial_aggregate(session, problem_model, precision=4, category=None, start=None, end=None, archive=None):
+    """Problem counts per geohash cell, grouped in SQL on a prefix of the stored geohash
+
+    Returns (cells, unresolved) where each cell has its count and the mean
+    coordinate of its problems; unresolved counts problems without a place.
+    Archived problems are grouped the same way and merged in when an archive
+    is given.
+    """
+    if not MIN_PRECISION <= precision <= MAX_PRECISION:
+        raise ValueError(f'precision must be between {MIN_PRECISION} and {MAX_PRECISION}')
+
+    table = problem_model.__table__
+    cell = func.substr(table.c.geohash, 1, precision).label('cell')
+    filters = []
+    if category:
+        filters.append(table.c.category == category)
+    if start is not None:
+        filters.append(table.c.submitted_date >= start)
+    if end is not None:
+        filters.append(table.c.submitted_date < end)
+
+    rows = session.execute(
+        select(cell, func.count(), func.sum(table.c.latitude), func.sum(table.c.longitude))
+        .where(table.c.geohash.isnot(None), *filters)
+        .group_by(cell)
+    )
+    totals = {geohash: [count, latitude, longitude] for geohash, count, latitude, longitude in rows}
+
+    unresolved = session.execute(
+        select(func.count()).select_from(table).where(table.c.geohash.is_(None), *filters)
+    ).scalar()
+
+    if archive is not None:
+        archived = archive.problem_columns(['category', 'geohash', 'latitude', 'longitude'], start, end)
+        if category:
+            archived = archived[archived['category'] == category]
+        resolved = archived['geohash'].notna()
+        unresolved += int((~resolved).sum())
+        located = archived[resolved]
+        grouped = located.groupby(located['geohash'].str[:precision]).agg(
+            count=('geohash', 'size'), latitude=('latitude', 'sum'), longitude=('longitude', 'sum'))
+        for geohash, row in grouped.iterrows():
+            current = totals.setdefault(geohash, [0, 0.0, 0.0])
+            current[0] += int(row['count'])
+            current[1] += row['latitude']
+            current[2] += row['longitude']
+
+    cells = [{
+        'geohash': geohash,
+        'count': count,
+        'latitude': round(latitude / count, 4),
+        'longitude': round(longitude / count, 4)
+    } for geohash, (count, latitude, longitude) in sorted(totals.items(), key=lambda item: -item[1][0])]
+
+    return cells, unresolved
@@ -0,0 +1,3 @@
+"""
+web module for Community Solver.
+"""
@@ -0,0 +1,96 @@
+import itertools
+import json
+import queue
+import threading
+from collections import deque
+
+
+class EventBroadcaster:
+    """In-process fan-out of Server-Sent Events to every open stream
+
+    Each event is serialized once and the same bytes are handed to every
+    subscriber queue, so the cost per subscriber is a queue put. Events only
+    reach streams served by the same process.
+
+    Every open stream holds a server worker (a thread under the threaded
+    development server or a threaded WSGI server) for as long as the client
+    stays connected, so the app must run on a threaded or async server, and
+    streams are capped at max_subscribers to leave workers for other requests.
+    """
+
+    def __init__(self, queue_size=256, history_size=500, heartbeat_seconds=15, max_subscribers=100):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers = set()
+        self._history = deque(maxlen=history_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self):
+        return len(self._subscribers)
+
+    def publish(self, event_type, data):
+        """Send one event to all subscribers"""
+        payload = json.dumps(data, default=str, separators=(',', ':'))
+
+        with self._lock:
+            event_id = next(self._ids)
+            frame = f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'.encode()
+            self._history.append((event_id, frame))
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(frame)
+            except queue.Full:
+                # A stalled client shouldn't hold events for everyone else;
+                # closing its stream makes the browser reconnect and catch up
+                subscriber.put_nowait_closing()
+
+        return event_id
+
+    def stream(self, last_event_id=None):
+        """Generator of SSE frames for one client, starting after last_event_id; None if at capacity"""
+        subscriber = _Subscriber(self.queue_size)
+
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+            missed = [frame for event_id, frame in self._history
+                      if last_event_id is not None and event_id > last_event_id]
+
+        def generate():
+            try:
+                yield b'retry: 5000\n\n'
+                for frame in missed:
+                    yield frame
+
+                while True:
+                    try:
+                        frame = subscriber.get(timeout=self.heartbeat_seconds)
+                    except queue.Empty:
+                        # Comment lines keep proxies from closing idle streams
+                        yield b': keepalive\n\n'
+                        continue
+
+                    if frame is None:
+                        return
+                    yield frame
+            finally:
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+
+        return generate()
+
+
+class _Subscriber(queue.Queue):
+    """Bounded frame queue that can always accept a final close marker"""
+
+    def put_nowait_closing(self):
+        with self.mutex:
+            self.queue.clear()
+            self.queue.append(None)
+            self.not_empty.notify()
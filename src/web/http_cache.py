@@ -0,0 +1,170 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# File types worth shipping precompressed variants for
+PRECOMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt')
+
+# Precompressed variants in order of preference
+STATIC_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def precompress_static(static_folder, gzip_level=9, brotli_quality=11):
+    """Write .gz (and .br when brotli is installed) variants next to static assets"""
+    written = []
+
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # mtime=0 keeps the gzip output reproducible between builds
+            variants = [(path + '.gz', gzip.compress(data, compresslevel=gzip_level, mtime=0))]
+            if brotli is not None:
+                variants.append((path + '.br', brotli.compress(data, quality=brotli_quality)))
+
+            for variant_path, compressed in variants:
+                # Only keep variants that actually save bytes
+                if len(compressed) >= len(data):
+                    continue
+                with open(variant_path, 'wb') as f:
+                    f.write(compressed)
+                written.append(variant_path)
+
+    return written
+
+
+class HttpCache:
+    """Cache validators, fingerprinted static URLs and response compression"""
+
+    def __init__(self, app=None):
+        self._asset_hashes = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('STATIC_MAX_AGE', 31536000)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_MIMETYPES', ['application/json'])
+        app.config.setdefault('CONDITIONAL_MIMETYPES', ['application/json', 'text/html'])
+
+        self.app = app
+        app.url_defaults(self._fingerprint_static_url)
+        app.view_functions['static'] = self.send_static
+        app.after_request(self._after_request)
+
+    def asset_hash(self, filename):
+        """Return a short content hash for a static file, or None if it doesn't exist"""
+        path = os.path.join(self.app.static_folder, filename)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return None
+
+        cached = self._asset_hashes.get(filename)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+
+        self._asset_hashes[filename] = (mtime, digest)
+        return digest
+
+    def _fingerprint_static_url(self, endpoint, values):
+        """Append the content hash to url_for('static', ...) URLs"""
+        if endpoint != 'static' or 'filename' not in values or 'v' in values:
+            return
+
+        digest = self.asset_hash(values['filename'])
+        if digest:
+            values['v'] = digest
+
+    def send_static(self, filename):
+        """Serve a static file, preferring fresh precompressed variants"""
+        static_folder = self.app.static_folder
+        source_path = os.path.join(static_folder, filename)
+        response = None
+
+        for encoding, suffix in STATIC_ENCODINGS:
+            if not request.accept_encodings[encoding]:
+                continue
+
+            variant_path = source_path + suffix
+            try:
+                # Ignore variants left over from an older build of the file
+                if os.stat(variant_path).st_mtime < os.stat(source_path).st_mtime:
+                    continue
+            except OSError:
+                continue
+
+            response = send_from_directory(static_folder, filename + suffix)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Disposition', None)
+            response.mimetype = self._guess_mimetype(filename)
+            break
+
+        if response is None:
+            response = send_from_directory(static_folder, filename)
+
+        response.vary.add('Accept-Encoding')
+
+        # Fingerprinted URLs never change content, so they can be cached forever
+        digest = request.args.get('v')
+        if digest and digest == self.asset_hash(filename):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = self.app.config['STATIC_MAX_AGE']
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+
+        return response
+
+    def _guess_mimetype(self, filename):
+        return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    def _after_request(self, response):
+        if request.endpoint == 'static':
+            return response
+
+        # Streams (and files) are sent as-is
+        if response.direct_passthrough or response.is_streamed:
+            return response
+
+        config = self.app.config
+
+        # Conditional GET for mutable pages and endpoints
+        if (request.method in ('GET', 'HEAD') and response.status_code == 200
+                and response.mimetype in config['CONDITIONAL_MIMETYPES']):
+            if not response.cache_control.max_age:
+                response.cache_control.no_cache = True
+            # Weak, since the same validator covers compressed and plain bodies
+            response.add_etag(weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        # On-the-fly compression above a size threshold
+        if (response.status_code == 200
+                and response.mimetype in config['COMPRESS_MIMETYPES']
+                and 'Content-Encoding' not in response.headers):
+            response.vary.add('Accept-Encoding')
+            data = response.get_data()
+            if len(data) >= config['COMPRESS_MIN_SIZE'] and request.accept_encodings['gzip']:
+                response.set_data(gzip.compress(data, compresslevel=config['COMPRESS_LEVEL']))
+                response.headers['Content-Encoding'] = 'gzip'
+
+        return response
@@ -0,0 +1,164 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+def record_rows(count):
+    """Count rows fetched through core selects, which never fire the ORM load event, toward the request profile"""
+    if has_request_context():
+        profile = g.get('profile')
+        if profile is not None:
+            profile['rows'] += count
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into folded stacks"""
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+
+    def write_folded(self, path):
+        """Write stacks in the folded format read by flamegraph.pl and speedscope"""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+
+class RequestProfiler:
+    """Opt-in per-request timing, SQL statement counting, slow-query log and stack sampling"""
+
+    def __init__(self, app=None, db=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db=None):
+        app.config.setdefault('PROFILE_REQUESTS', False)
+        app.config.setdefault('SLOW_QUERY_MS', 100)
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_SAMPLE_INTERVAL', 0.005)
+        app.config.setdefault('PROFILE_OUTPUT_DIR', os.path.join('logs', 'profiles'))
+
+        self.app = app
+        if not app.config['PROFILE_REQUESTS']:
+            return
+
+        # The per-request records are logged at INFO, which an unconfigured logger drops
+        if logger.getEffectiveLevel() > logging.INFO:
+            logger.setLevel(logging.INFO)
+        if not logger.handlers and not logging.getLogger().handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(levelname)s %(message)s'))
+            logger.addHandler(handler)
+
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            if db is not None:
+                event.listen(db.Model, 'load', self._on_load, propagate=True)
+            self._listening = True
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.profile = {'started': time.perf_counter(), 'statements': 0, 'sql_time': 0.0, 'rows': 0}
+
+        config = self.app.config
+        if config['PROFILE_SAMPLE_RATE'] and random.random() < config['PROFILE_SAMPLE_RATE']:
+            sampler = StackSampler(threading.get_ident(), config['PROFILE_SAMPLE_INTERVAL'])
+            sampler.start()
+            g.profile['sampler'] = sampler
+
+    def _after_request(self, response):
+        profile = g.get('profile')
+        if profile is None:
+            return response
+
+        wall_ms = (time.perf_counter() - profile['started']) * 1000
+        sql_ms = profile['sql_time'] * 1000
+        logger.info('%s %s endpoint=%s status=%s wall=%.1fms sql=%d sql_time=%.1fms rows=%d',
+                    request.method, request.path, request.endpoint, response.status_code,
+                    wall_ms, profile['statements'], sql_ms, profile['rows'])
+        response.headers['Server-Timing'] = (f'app;dur={wall_ms:.1f}, '
+                                             f'sql;dur={sql_ms:.1f};desc="{profile["statements"]} queries", '
+                                             f'rows;desc="{profile["rows"]} rows"')
+        return response
+
+    def _teardown_request(self, exc):
+        profile = g.get('profile')
+        sampler = profile.pop('sampler', None) if profile else None
+        if sampler is None:
+            return
+
+        sampler.stop()
+        output_dir = self.app.config['PROFILE_OUTPUT_DIR']
+        os.makedirs(output_dir, exist_ok=True)
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}-{request.endpoint or 'unknown'}.folded"
+        sampler.write_folded(os.path.join(output_dir, name))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        if not has_request_context():
+            return
+
+        profile = g.get('profile')
+        if profile is None:
+            return
+
+        profile['statements'] += 1
+        profile['sql_time'] += elapsed
+        # SELECT rows are counted as ORM entities and read models are loaded; DML reports its rowcount
+        if cursor.rowcount and cursor.rowcount > 0:
+            profile['rows'] += cursor.rowcount
+
+        if elapsed * 1000 >= self.app.config['SLOW_QUERY_MS']:
+            # Bulk executemany parameters can be huge, so only log the start
+            params = repr(parameters)
+            if len(params) > 500:
+                params = params[:500] + '...'
+            logger.warning('Slow query (%.1fms) in %s: %s params=%s',
+                           elapsed * 1000, request.endpoint, statement, params)
+
+    def _on_load(self, target, context):
+        if has_request_context() and 'profile' in g:
+            g.profile['rows'] += 1
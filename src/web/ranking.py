@@ -0,0 +1,119 @@
+import argparse
+import math
+import sys
+from datetime import datetime
+
+from sqlalchemy import bindparam, event, func, inspect, select, update
+
+# Fixed origin of the recency term; scores only need to share it, not track the clock
+HOT_EPOCH = datetime(2024, 1, 1)
+
+# Hours of recency worth a tenfold lead in votes
+HOT_DECAY_HOURS = 168
+
+
+class HotRanking:
+    """Hot score for solutions from their votes and when they were proposed
+
+    score = log10(max(votes, 1)) + (proposed_date - HOT_EPOCH) / decay
+
+    Instead of shrinking every score as time passes, newer solutions start
+    higher: each decay period later a solution is proposed is worth ten times
+    the votes. The order of any two scores never changes with the clock, so a
+    score only changes when its own votes do and the column is never rescored
+    globally. The decay must stay fixed once scores are stored; changing it
+    needs a forced backfill.
+    """
+
+    def __init__(self, decay_hours=HOT_DECAY_HOURS):
+        self.decay_seconds = decay_hours * 3600
+
+    def score(self, votes, proposed_date):
+        return math.log10(max(votes or 0, 1)) + (proposed_date - HOT_EPOCH).total_seconds() / self.decay_seconds
+
+    def apply(self, row):
+        """Score a solution row dict in place (for core inserts)"""
+        row['hot_score'] = self.score(row.get('votes'), row['proposed_date'])
+        return row
+
+    def listen(self, session, solution_model):
+        """Score solutions added or voted on through a session (or session factory)"""
+        self.solution_model = solution_model
+        event.listen(session, 'before_flush', self._before_flush)
+
+    def _before_flush(self, session, flush_context, instances):
+        for obj in list(session.new) + list(session.dirty):
+            if not isinstance(obj, self.solution_model):
+                continue
+            if obj in session.new or inspect(obj).attrs.votes.history.has_changes():
+                if obj.proposed_date is None:
+                    obj.proposed_date = datetime.utcnow()
+                obj.hot_score = self.score(obj.votes, obj.proposed_date)
+
+    def add_vote(self, session, solution_model, solution_id):
+        """Count one vote with an atomic increment and rescore from the new total; returns (votes, hot_score)"""
+        table = solution_model.__table__
+        c = table.c
+        increment = update(table).where(c.id == solution_id).values(votes=func.coalesce(c.votes, 0) + 1)
+        if session.get_bind().dialect.update_returning:
+            votes, proposed_date = session.execute(increment.returning(c.votes, c.proposed_date)).one()
+        else:
+            # The increment holds the row's write lock until commit, so this reads our own total
+            session.execute(increment)
+            votes, proposed_date = session.execute(select(c.votes, c.proposed_date).where(c.id == solution_id)).one()
+        score = self.score(votes, proposed_date or datetime.utcnow())
+        session.execute(update(table).where(c.id == solution_id).values(hot_score=score))
+        return votes, score
+
+    def backfill(self, session, solution_model, force=False, chunk_size=10000):
+        """Score stored solutions, by default only those without a score; returns how many"""
+        table = solution_model.__table__
+        c = table.c
+        stmt = select(c.id, c.votes, c.proposed_date).order_by(c.id).limit(chunk_size)
+        if not force:
+            stmt = stmt.where(c.hot_score.is_(None))
+        scored = update(table).where(c.id == bindparam('solution_id')).values(hot_score=bindparam('score'))
+
+        count = 0
+        last_id = 0
+        while True:
+            rows = session.execute(stmt.where(c.id > last_id)).all()
+            if not rows:
+                break
+            session.execute(scored, [
+                {'solution_id': id, 'score': self.score(votes, proposed_date or datetime.utcnow())}
+                for id, votes, proposed_date in rows
+            ])
+            session.commit()
+            count += len(rows)
+            last_id = rows[-1][0]
+        return count
+
+
+def parse_cursor(text):
+    """(hot_score, id) from a cursor returned by a previous page; ValueError if malformed"""
+    score, _, solution_id = text.partition(':')
+    return float(score), int(solution_id)
+
+
+def format_cursor(solution):
+    return f'{solution.hot_score!r}:{solution.id}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute hot scores for stored solutions')
+    parser.add_argument('--force', action='store_true', help='rescore every solution, e.g. after changing the decay')
+    args = parser.parse_args(argv)
+
+    from app import app, db, hot_ranking, Solution
+    from src.data_ingestion.schema import upgrade_schema
+
+    with app.app_context():
+        upgrade_schema(db)
+        count = hot_ranking.backfill(db.session, Solution, args.force)
+    print(f'Scored {count:,} solutions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+from sqlalchemy import and_, func, or_, select
+
+from src.web.profiling import record_rows
+
+# Characters of description shown in problem lists
+EXCERPT_LENGTH = 150
+
+
+class ReadModel:
+    """Read-only row for templates and JSON, filled positionally from a projected select
+
+    Instances hold plain values in __slots__, so they carry no ORM state,
+    aren't tracked by the session and cost a fraction of an entity.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def fetch(cls, session, stmt):
+        rows = [cls(*row) for row in session.execute(stmt)]
+        record_rows(len(rows))
+        return rows
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ProblemSummary(ReadModel):
+    __slots__ = ('id', 'title', 'excerpt', 'truncated', 'category', 'severity', 'status', 'location',
+                 'submitted_by', 'submitted_date', 'stakeholder_count', 'solution_count')
+
+
+class ProblemDetail(ReadModel):
+    __slots__ = ('id', 'title', 'description', 'category', 'severity', 'status', 'location', 'submitted_by',
+                 'submitted_date', 'ai_analysis', 'stakeholder_count', 'solution_count')
+
+
+class ProblemListing(ReadModel):
+    __slots__ = ('id', 'title', 'category', 'severity', 'location', 'place_id', 'latitude', 'longitude', 'status',
+                 'submitted_date', 'stakeholder_count', 'solution_count')
+
+
+class SolutionView(ReadModel):
+    __slots__ = ('id', 'problem_id', 'title', 'description', 'proposed_by', 'proposed_date', 'votes', 'status')
+
+
+class HotSolution(ReadModel):
+    __slots__ = ('id', 'problem_id', 'title', 'proposed_by', 'proposed_date', 'votes', 'status', 'hot_score',
+                 'problem_title', 'category')
+
+
+class StakeholderSummary(ReadModel):
+    __slots__ = ('id', 'name', 'role', 'organization')
+
+
+def _columns(table, names):
+    return [table.c[name] for name in names]
+
+
+def recent_problems(session, problem_model, limit=6, excerpt_length=EXCERPT_LENGTH):
+    """Newest problems with their description cut to an excerpt by the database"""
+    table = problem_model.__table__
+    c = table.c
+    stmt = select(
+        c.id, c.title, func.substr(c.description, 1, excerpt_length), func.length(c.description) > excerpt_length,
+        *_columns(table, ProblemSummary.__slots__[4:])
+    ).order_by(c.submitted_date.desc()).limit(limit)
+    return ProblemSummary.fetch(session, stmt)
+
+
+def problem_detail(session, problem_model, problem_id):
+    table = problem_model.__table__
+    rows = ProblemDetail.fetch(session, select(*_columns(table, ProblemDetail.__slots__)).where(table.c.id == problem_id))
+    return rows[0] if rows else None
+
+
+def problem_listing(session, problem_model):
+    table = problem_model.__table__
+    return ProblemListing.fetch(session, select(*_columns(table, ProblemListing.__slots__)).order_by(table.c.id))
+
+
+def problems_by_id(session, problem_model, ids):
+    table = problem_model.__table__
+    return ProblemListing.fetch(session, select(*_columns(table, ProblemListing.__slots__)).where(table.c.id.in_(ids)))
+
+
+def problem_solutions(session, solution_model, problem_id):
+    """A problem's solutions, hottest first"""
+    table = solution_model.__table__
+    stmt = select(*_columns(table, SolutionView.__slots__)).where(table.c.problem_id == problem_id).order_by(
+        table.c.hot_score.desc(), table.c.votes.desc())
+    return SolutionView.fetch(session, stmt)
+
+
+def hot_solutions(session, solution_model, problem_model, limit=20, after=None):
+    """Solutions across all problems by hot score, continuing past an (hot_score, id) cursor"""
+    s = solution_model.__table__.c
+    p = problem_model.__table__.c
+    stmt = select(*[s[name] for name in HotSolution.__slots__[:8]], p.title, p.category).join_from(
+        solution_model.__table__, problem_model.__table__, s.problem_id == p.id).where(
+        s.hot_score.is_not(None)).order_by(s.hot_score.desc(), s.id.desc()).limit(limit)
+    if after is not None:
+        score, solution_id = after
+        stmt = stmt.where(or_(s.hot_score < score, and_(s.hot_score == score, s.id < solution_id)))
+    return HotSolution.fetch(session, stmt)
+
+
+def first_stakeholders(session, stakeholder_model, limit=5):
+    table = stakeholder_model.__table__
+    stmt = select(*_columns(table, StakeholderSummary.__slots__)).order_by(table.c.id).limit(limit)
+    return StakeholderSummary.fetch(session, stmt)
+
+
+def stakeholders_by_id(session, stakeholder_model, ids):
+    table = stakeholder_model.__table__
+    stmt = select(*_columns(table, StakeholderSummary.__slots__)).where(table.c.id.in_(ids))
+    return StakeholderSummary.fetch(session, stmt)
+
+
+def row_count(session, model):
+    return session.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def counts_by(session, model, column):
+    """Row counts per value of one column"""
+    c = model.__table__.c[column]
+    return dict(session.execute(select(c, func.count()).group_by(c)).all())
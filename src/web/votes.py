@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import math
+import threading
+from datetime import datetime
+
+from sqlalchemy import exists, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size set membership with no false negatives
+
+    Sized for capacity items at the given false positive rate; past capacity
+    it keeps working but false positives grow.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, digest):
+        """Bit positions for a key, by double hashing the first 128 bits of its digest"""
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:16], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+        for position in self._positions(digest):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    @property
+    def nbytes(self):
+        return len(self.bits)
+
+
+class VoteFilter:
+    """Per-voter vote deduplication: sharded Bloom filters in front of the vote table
+
+    Every recorded (solution, voter) pair is added to one of the shards. A
+    pair the filters have never seen is new for certain, so a first vote
+    costs only the insert into the vote table; only pairs the filters
+    report, which are repeat votes or the rare false positive, are looked up.
+    The table's primary key stays the arbiter, so votes recorded by other
+    processes since the rebuild are still caught when the insert fails.
+
+    Once the filters hold more votes than they were sized for, they report
+    full and the next rebuild sizes them for twice the votes stored.
+    """
+
+    def __init__(self, vote_model, capacity=1000000, error_rate=0.001, shards=16):
+        self.table = vote_model.__table__
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.shard_count = shards
+        self.shards = self._empty_shards(capacity)
+        self.sized_for = capacity
+        self.count = 0
+        self.loaded = False
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._rebuild_lock = threading.Lock()
+
+    def _empty_shards(self, capacity):
+        return [BloomFilter(max(capacity // self.shard_count, 1), self.error_rate) for _ in range(self.shard_count)]
+
+    @staticmethod
+    def digest(solution_id, voter):
+        return hashlib.blake2b(f'{solution_id}\x1f{voter}'.encode('utf-8'), digest_size=20).digest()
+
+    def _shard(self, digest):
+        # The last bytes pick the shard; the first 16 place the bits within it
+        return int.from_bytes(digest[16:], 'little') % self.shard_count
+
+    def might_contain(self, solution_id, voter):
+        digest = self.digest(solution_id, voter)
+        return digest in self.shards[self._shard(digest)]
+
+    def add(self, solution_id, voter):
+        digest = self.digest(solution_id, voter)
+        shard = self._shard(digest)
+        with self._locks[shard]:
+            self.shards[shard].add(digest)
+        self.count += 1
+
+    @property
+    def full(self):
+        """Whether the filters hold more votes than they were sized for"""
+        return self.count > self.sized_for
+
+    def record(self, session, solution_id, voter):
+        """Record a voter's vote in the session's transaction; returns False if they already voted"""
+        c = self.table.c
+        if self.might_contain(solution_id, voter) and session.execute(
+                select(exists().where(c.solution_id == solution_id, c.voter == voter))).scalar():
+            return False
+        try:
+            with session.begin_nested():
+                session.execute(insert(self.table).values(solution_id=solution_id, voter=voter,
+                                                          voted_date=datetime.utcnow()))
+        except IntegrityError:
+            # Recorded by another process since the filters were built
+            self.add(solution_id, voter)
+            return False
+        # Added before commit: if the transaction fails, the stale bit only costs a lookup
+        self.add(solution_id, voter)
+        return True
+
+    def rebuild(self, session, chunk_size=50000):
+        """Refill the filters from the vote table, sized for at least twice the votes stored
+
+        Returns how many votes were loaded, or None if another thread is
+        already rebuilding; the current filters stay in use meanwhile.
+        """
+        if not self._rebuild_lock.acquire(blocking=False):
+            return None
+        try:
+            c = self.table.c
+            stored = session.execute(select(func.count()).select_from(self.table)).scalar()
+            sized_for = max(self.capacity, 2 * stored)
+            if self.loaded:
+                logger.warning('Vote filters hold %d votes, more than the %d they were sized for; '
+                               'rebuilding for %d', self.count, self.sized_for, sized_for)
+            shards = self._empty_shards(sized_for)
+            stmt = select(c.solution_id, c.voter)
+            count = 0
+            for rows in session.execute(stmt.execution_options(yield_per=chunk_size)).partitions():
+                for solution_id, voter in rows:
+                    digest = self.digest(solution_id, voter)
+                    shards[self._shard(digest)].add(digest)
+                count += len(rows)
+            self.shards = shards
+            self.sized_for = sized_for
+            self.count = count
+            self.loaded = True
+            return count
+        finally:
+            self._rebuild_lock.release()
+
+    def stats(self):
+        return {
+            'votes': self.count,
+            'capacity': self.sized_for,
+            'shards': self.shard_count,
+            'bytes': sum(shard.nbytes for shard in self.shards)
+        }
@@ -218,7 +218,7 @@ async function fetchProblems() {
 async function voteSolution(solutionId) {
     try {
         const response = await fetch(`/vote_solution/${solutionId}`, {
-            method: 'GET'
+            method: 'POST'
         });
         
         if (response.ok) {
@@ -252,6 +252,134 @@ function updateChart(chart, newData) {
     }
 }
 
+// Live update functions
+function subscribeToEvents(handlers) {
+    if (!window.EventSource) return null;
+    
+    // EventSource reconnects on its own and resumes from the last event id
+    const source = new EventSource('/api/events');
+    Object.keys(handlers).forEach(eventType => {
+        source.addEventListener(eventType, function(e) {
+            handlers[eventType](JSON.parse(e.data));
+        });
+    });
+    return source;
+}
+
+function adjustCounter(elementId, delta) {
+    const element = document.getElementById(elementId);
+    if (element) {
+        element.textContent = (parseInt(element.textContent, 10) || 0) + delta;
+    }
+}
+
+function incrementChartLabel(chart, label, datasetIndex = 0) {
+    if (!chart) return;
+    
+    const dataset = chart.data.datasets[datasetIndex];
+    if (!dataset) return;
+    
+    const index = chart.data.labels.indexOf(label);
+    if (index === -1) {
+        chart.data.labels.push(label);
+        // The other datasets start at zero for a new label
+        chart.data.datasets.forEach(d => d.data.push(0));
+        dataset.data[dataset.data.length - 1] = 1;
+    } else {
+        dataset.data[index] += 1;
+    }
+    chart.update('none');
+}
+
+function prependRecentProblem(problem) {
+    const list = document.getElementById('recent-problems');
+    if (!list) return;
+    document.getElementById('recent-problems-empty')?.remove();
+    
+    const severityClass = {Critical: 'danger', High: 'warning', Medium: 'info', Low: 'success'};
+    const item = document.createElement('div');
+    item.className = 'list-group-item';
+    item.innerHTML = `
+        <div class="d-flex w-100 justify-content-between">
+            <h6 class="mb-1"></h6>
+            <small class="text-muted">${new Date(problem.submitted_date).toLocaleDateString('en-US')}</small>
+        </div>
+        <p class="mb-1"></p>
+        <div class="d-flex justify-content-between align-items-center">
+            <div>
+                <span class="badge bg-${severityClass[problem.severity] || 'secondary'} me-2 severity-badge"></span>
+                <span class="badge bg-primary category-badge"></span>
+            </div>
+            <a href="/problem/${problem.id}" class="btn btn-outline-primary btn-sm">View Details</a>
+        </div>
+    `;
+    // User-supplied text goes in through textContent only
+    item.querySelector('h6').textContent = problem.title;
+    item.querySelector('p').textContent = problem.description;
+    item.querySelector('.severity-badge').textContent = problem.severity;
+    item.querySelector('.category-badge').textContent = problem.category;
+    
+    list.prepend(item);
+    while (list.children.length > 5) {
+        list.lastElementChild.remove();
+    }
+}
+
+function prependSpikeAlert(alert) {
+    const list = document.getElementById('spike-alerts');
+    if (!list) return;
+    document.getElementById('spike-alerts-empty')?.remove();
+    
+    const item = document.createElement('div');
+    item.className = 'list-group-item list-group-item-warning';
+    item.innerHTML = `
+        <div class="d-flex w-100 justify-content-between">
+            <h6 class="mb-1"></h6>
+            <small class="text-muted">${alert.bucket_start.slice(0, 16).replace('T', ' ')}</small>
+        </div>
+        <p class="mb-1">${alert.count} submissions, about ${alert.expected.toFixed(1)} expected</p>
+        <small class="text-muted"></small>
+    `;
+    item.querySelector('h6').textContent = alert.location ? `${alert.category} · ${alert.location}` : alert.category;
+    item.querySelector('small:last-child').textContent = `Convene: ${alert.engagement.roles.join(', ')}`;
+    
+    list.prepend(item);
+    while (list.children.length > 5) {
+        list.lastElementChild.remove();
+    }
+}
+
+function subscribeToDashboard(charts) {
+    return subscribeToEvents({
+        problem_created: function(problem) {
+            adjustCounter('stat-problems', 1);
+            incrementChartLabel(charts.category, problem.category);
+            incrementChartLabel(charts.severity, problem.severity);
+            incrementChartLabel(charts.timeline, problem.submitted_date.slice(0, 7));
+            prependRecentProblem(problem);
+        },
+        solution_created: function(solution) {
+            adjustCounter('stat-solutions', 1);
+            incrementChartLabel(charts.solutions, solution.category);
+        },
+        vote_changed: function(vote) {
+            // The second dataset of the solutions chart counts votes
+            incrementChartLabel(charts.solutions, vote.category, 1);
+        },
+        stakeholder_joined: function() {
+            adjustCounter('stat-stakeholders', 1);
+        },
+        problem_status_changed: function(change) {
+            if (change.status === 'Resolved') adjustCounter('stat-resolved', 1);
+            if (change.old_status === 'Resolved') adjustCounter('stat-resolved', -1);
+        },
+        spike_alert: function(alert) {
+            prependSpikeAlert(alert);
+            showNotification(`Surge in ${alert.category} reports`, 'warning');
+        }
+    });
+}
+
 // Search and filter functions
 function filterProblems(category, severity) {
     const problemCards = document.querySelectorAll('.problem-card');
@@ -283,5 +411,7 @@ window.CommunitySolver = {
     voteSolution,
     createChart,
     updateChart,
+    subscribeToEvents,
+    subscribeToDashboard,
     filterProblems
 };
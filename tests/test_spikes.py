@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.ai_analysis.spikes import BUCKET, COUNT, MEAN, VARIANCE, SpikeDetector
+
+
+@pytest.mark.parametrize('empty_buckets', [0, 1, 5, 40])
+def test_advance_over_empty_buckets_matches_single_steps(empty_buckets):
+    detector = SpikeDetector(alpha=0.1)
+    jumped = [100, 7, 3.5, 2.0, None]
+    stepped = list(jumped)
+
+    detector._advance(jumped, 100 + empty_buckets + 1)
+    for bucket in range(101, 100 + empty_buckets + 2):
+        detector._advance(stepped, bucket)
+
+    assert jumped[BUCKET] == stepped[BUCKET] == 100 + empty_buckets + 1
+    assert jumped[COUNT] == stepped[COUNT] == 0
+    assert jumped[MEAN] == pytest.approx(stepped[MEAN], rel=1e-9)
+    assert jumped[VARIANCE] == pytest.approx(stepped[VARIANCE], rel=1e-9)
+
+
+def test_advance_ignores_past_buckets():
+    detector = SpikeDetector()
+    state = [10, 4, 2.0, 1.0, None]
+    detector._advance(state, 9)
+    detector._advance(state, 10)
+    assert state == [10, 4, 2.0, 1.0, None]
+
+
+def observe_history(detector, start, hours):
+    for hour in range(hours):
+        for _ in range(hour % 4 + 1):
+            detector.observe('Roads', 'springfield', start + timedelta(hours=hour, minutes=hour % 60))
+
+
+def test_restore_reproduces_baselines(tmp_path):
+    path = str(tmp_path / 'spikes.json')
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=48)
+    detector = SpikeDetector(state_path=path, checkpoint_seconds=3600)
+    observe_history(detector, start, 48)
+    detector.checkpoint()
+
+    restored = SpikeDetector(state_path=path)
+    assert restored.restore()
+    now = start + timedelta(hours=50)
+    for scope in (('Roads', 'springfield'), ('Roads', None)):
+        assert restored.baseline(*scope, now=now) == detector.baseline(*scope, now=now)
+    assert restored.baseline('Parks', now=now) is None
+
+
+def test_restore_rejects_other_bucket_sizes(tmp_path):
+    path = str(tmp_path / 'spikes.json')
+    detector = SpikeDetector(state_path=path)
+    observe_history(detector, datetime.utcnow() - timedelta(hours=4), 4)
+    detector.checkpoint()
+
+    assert not SpikeDetector(bucket_minutes=30, state_path=path).restore()
+    assert not SpikeDetector(state_path=str(tmp_path / 'missing.json')).restore()
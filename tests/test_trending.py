@@ -0,0 +1,76 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+from src.ai_analysis.trending import CountMinSketch, SpaceSaving, TrendingTracker, TrendingWindow
+
+
+def test_count_min_sketch_never_undercounts():
+    rng = random.Random(7)
+    # Narrow enough that many keys share cells
+    sketch = CountMinSketch(width=64, depth=3)
+    truth = Counter()
+    for _ in range(200):
+        batch = list({f'term-{int(rng.paretovariate(1.2))}' for _ in range(rng.randint(1, 8))})
+        sketch.add(batch)
+        truth.update(batch)
+
+    keys = sorted(truth)
+    estimates = sketch.estimate(keys)
+    assert all(estimate >= truth[key] for key, estimate in zip(keys, estimates))
+    assert sketch.estimate(['never-added'])[0] >= 0
+
+
+def test_space_saving_counts_are_upper_bounds():
+    counter = SpaceSaving(2)
+    for item in 'aab':
+        counter.add(item)
+    assert counter.add('c') == 'b'
+    # c inherits b's count
+    assert counter.counts == {'a': 2, 'c': 2}
+    assert counter.upper('b') == counter.floor() == 2
+
+
+def test_evicted_scope_summary_is_dropped():
+    window = TrendingWindow(datetime(2024, 1, 1), top_k=4, max_scopes={'category': 2, 'location': 2},
+                            sketch_width=256, sketch_depth=3)
+    window.add(['pothole'], [('category', 'Roads')])
+    window.add(['pothole'], [('category', 'Roads')])
+    window.add(['litter'], [('category', 'Parks')])
+    assert ('category', 'Parks') in window.terms
+
+    window.add(['noise'], [('category', 'Noise')])
+    assert ('category', 'Parks') not in window.terms
+    assert ('category', 'Roads') in window.terms
+
+    # Noise took over Parks' single problem, so its summary starts from that base
+    summary = window.terms[('category', 'Noise')]
+    assert summary.base == 1
+    assert summary.upper('noise') == 2
+    assert summary.upper('litter') == 1
+    assert window.scope_problems(('category', 'Noise')) == 2
+
+
+def test_old_windows_fall_off_after_the_tracked_span():
+    tracker = TrendingTracker(str.split, window_hours=1, windows=3, sketch_width=256, sketch_depth=3)
+    # Ahead of the clock, so only the submissions drive rotation
+    base = tracker.window_start(datetime.utcnow() + timedelta(days=365))
+
+    assert tracker.add(base, 'Roads', None, 'pothole')
+    assert tracker.add(base + timedelta(hours=1), 'Roads', None, 'pothole')
+    assert tracker.add(base + timedelta(hours=2), 'Roads', None, 'crack')
+    assert [window.start for window in tracker.windows] == [base + timedelta(hours=h) for h in range(3)]
+    assert tracker.trending(category='Roads')['problems'] == 3
+
+    assert tracker.add(base + timedelta(hours=3), 'Roads', None, 'crack')
+    assert [window.start for window in tracker.windows] == [base + timedelta(hours=h) for h in range(1, 4)]
+    assert not tracker.add(base, 'Roads', None, 'pothole')
+
+    result = tracker.trending(category='Roads')
+    assert result['problems'] == 3
+    assert [(term['term'], term['count']) for term in result['terms']] == [('crack', 2), ('pothole', 1)]
+
+    # A gap longer than the span leaves only empty windows besides the newest
+    assert tracker.add(base + timedelta(hours=10), 'Roads', None, 'flood')
+    assert [window.start for window in tracker.windows] == [base + timedelta(hours=h) for h in range(8, 11)]
+    assert tracker.stats()['problems'] == 1
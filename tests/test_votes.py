@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, DateTime, Integer, String, create_engine, insert, select
+from sqlalchemy.orm import Session, declarative_base
+
+from src.web.votes import VoteFilter
+
+Base = declarative_base()
+
+
+class Vote(Base):
+    __tablename__ = 'solution_vote'
+    solution_id = Column(Integer, primary_key=True)
+    voter = Column(String(64), primary_key=True)
+    voted_date = Column(DateTime, default=datetime.utcnow)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def stored_votes(session):
+    return set(session.execute(select(Vote.solution_id, Vote.voter)).all())
+
+
+def test_repeat_vote_is_rejected(session):
+    votes = VoteFilter(Vote, capacity=100)
+    votes.rebuild(session)
+    assert votes.record(session, 1, 'alice')
+    session.commit()
+    assert not votes.record(session, 1, 'alice')
+    session.commit()
+    assert stored_votes(session) == {(1, 'alice')}
+
+
+def test_other_voters_and_solutions_are_accepted(session):
+    votes = VoteFilter(Vote, capacity=100)
+    votes.rebuild(session)
+    assert votes.record(session, 1, 'alice')
+    assert votes.record(session, 1, 'bob')
+    assert votes.record(session, 2, 'alice')
+    session.commit()
+    assert stored_votes(session) == {(1, 'alice'), (1, 'bob'), (2, 'alice')}
+
+
+def test_vote_recorded_elsewhere_is_rejected(session):
+    votes = VoteFilter(Vote, capacity=100)
+    votes.rebuild(session)
+    # Recorded by another process after the filters were built
+    session.execute(insert(Vote).values(solution_id=1, voter='alice'))
+    session.commit()
+    assert not votes.might_contain(1, 'alice')
+    assert not votes.record(session, 1, 'alice')
+    assert votes.might_contain(1, 'alice')
+
+
+def test_rebuild_matches_vote_table(session):
+    rows = [{'solution_id': solution_id, 'voter': f'voter-{voter}'}
+            for solution_id in range(20) for voter in range(solution_id)]
+    session.execute(insert(Vote), rows)
+    session.commit()
+
+    votes = VoteFilter(Vote, capacity=1000)
+    assert votes.rebuild(session) == len(rows)
+    assert votes.loaded
+    assert votes.stats()['votes'] == len(rows)
+    assert all(votes.might_contain(row['solution_id'], row['voter']) for row in rows)
+    for row in rows:
+        assert not votes.record(session, row['solution_id'], row['voter'])
+    assert votes.record(session, 0, 'voter-0')
+    session.commit()
+    assert len(stored_votes(session)) == len(rows) + 1
+
+
+def test_full_filters_rebuild_larger(session):
+    votes = VoteFilter(Vote, capacity=8, shards=2)
+    votes.rebuild(session)
+    for solution_id in range(10):
+        assert votes.record(session, solution_id, 'alice')
+    session.commit()
+    assert votes.full
+    assert votes.rebuild(session) == 10
+    assert not votes.full
+    assert votes.stats()['capacity'] == 20